@@ -0,0 +1,121 @@
+# --------------------------------------------------------------------------------------------
+# Copyright (c) Microsoft Corporation. All rights reserved.
+# Licensed under the MIT License. See License.txt in the project root for license information.
+# --------------------------------------------------------------------------------------------
+
+"""
+Benchmark the DNS zone file parser and writer used by `az network dns zone import/export` on synthetic zones.
+
+Usage: python scripts/performance/dns_zone_file.py [--records 100000 1000000] [--loop 3]
+"""
+
+from __future__ import print_function
+
+import argparse
+import gc
+import time
+from collections import OrderedDict
+
+from azure.cli.command_modules.network.zone_file import iter_zone_records, write_zone_file
+from azure.cli.command_modules.network.zone_file.parse_zone_file import iter_text_lines
+
+ZONE_NAME = 'contoso.com'
+
+
+def generate_zone(records):
+    """ Return the text of a zone with the given number of records, spread over A, AAAA, MX, TXT and CNAME. """
+    lines = [
+        '$ORIGIN {}.'.format(ZONE_NAME),
+        '$TTL 3600',
+        '@ IN SOA ns1-01.azure-dns.com. hostmaster.{}. ('.format(ZONE_NAME),
+        '    1 ; serial',
+        '    3600 ; refresh',
+        '    300 ; retry',
+        '    2419200 ; expire',
+        '    300 ) ; minimum',
+        '@ 172800 IN NS ns1-01.azure-dns.com.',
+    ]
+    for i in range(records):
+        kind = i % 5
+        if kind == 0:
+            lines.append('host{} IN A 10.{}.{}.{}'.format(i, i >> 16 & 255, i >> 8 & 255, i & 255))
+            lines.append('    IN A 10.{}.{}.{} ; second address'.format(i >> 16 & 255, i >> 8 & 255, (i + 1) & 255))
+        elif kind == 1:
+            lines.append('host{} 300 IN AAAA 2001:db8::{:x}'.format(i, i & 0xffff))
+        elif kind == 2:
+            lines.append('mail{} IN MX 10 mx{}.{}.'.format(i, i, ZONE_NAME))
+        elif kind == 3:
+            lines.append('txt{} IN TXT "v=spf1 include:{} -all" "record {}"'.format(i, ZONE_NAME, i))
+        else:
+            lines.append('alias{} IN CNAME host{}'.format(i, i - 4))
+    return '\n'.join(lines)
+
+
+def _group_record_sets(records):
+    """ Group parsed records into the (name, {type: [records]}) shape consumed by the writer. """
+    record_sets = OrderedDict()
+    for name, record_type, record in records:
+        record = dict(record)
+        if record_type == 'soa':
+            record.update({'mname': record['host'], 'rname': record['email']})
+        elif record_type == 'txt':
+            record['txt'] = ''.join(record['txt'])
+        record_sets.setdefault(name, OrderedDict()).setdefault(record_type, []).append(record)
+    return record_sets
+
+
+class _NullWriter(object):  # pylint: disable=too-few-public-methods
+
+    def __init__(self):
+        self.size = 0
+
+    def write(self, text):
+        self.size += len(text)
+
+
+def _time(func, loop, setup=tuple):
+    times = []
+    result = None
+    for _ in range(loop):
+        args = setup()
+        gc.collect()
+        start = time.time()
+        result = func(*args)
+        times.append(time.time() - start)
+    return min(times), result
+
+
+def scenario(records, loop):
+    text = generate_zone(records)
+    print('Zone with {} records ({:.1f} MB)'.format(records, len(text) / 1024.0 / 1024.0))
+
+    def _parse():
+        return sum(1 for _ in iter_zone_records(iter_text_lines(text), ZONE_NAME))
+
+    elapsed, count = _time(_parse, loop)
+    print('Parse: {:.2f}s => {:.0f} records/s'.format(elapsed, count / elapsed))
+
+    def _write(record_sets):
+        writer = _NullWriter()
+        write_zone_file(writer, zone_name=ZONE_NAME, resource_group='MyResourceGroup', datetime='now',
+                        ttl=3600, origin=ZONE_NAME + '.', record_sets=record_sets.items())
+        return writer.size
+
+    # the record processors quote TXT and CAA values in place, so each run writes freshly parsed records
+    elapsed, _ = _time(_write, loop,
+                       setup=lambda: (_group_record_sets(iter_zone_records(iter_text_lines(text), ZONE_NAME)),))
+    print('Write: {:.2f}s => {:.0f} records/s'.format(elapsed, count / elapsed))
+    print('')
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().split('\n')[0])
+    parser.add_argument('--records', type=int, nargs='+', default=[100000, 1000000])
+    parser.add_argument('--loop', type=int, default=3)
+    args = parser.parse_args()
+    for records in args.records:
+        scenario(records, args.loop)
+
+
+if __name__ == '__main__':
+    main()
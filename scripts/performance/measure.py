@@ -3,8 +3,49 @@
 # Licensed under the MIT License. See License.txt in the project root for license information.
 # --------------------------------------------------------------------------------------------
 
+"""
+Benchmark `az` startup and command latency, broken down per phase.
+
+Every run of a scenario is a fresh interpreter with its own empty config directory. It reports the time to start the
+interpreter, construct the CLI, import and load the command loader of each module, load the arguments, parse, execute
+(commands which call Azure replay a test recording instead) and format the output.
+
+Usage: python scripts/performance/measure.py [--loop 10] [--output results.json] [--baseline baseline.json]
+
+Results written with --output can be passed back with --baseline; the script exits with 1 when the median of a phase
+or module is slower than the baseline by more than --threshold.
+"""
+
+from __future__ import print_function
+
+import argparse
+import json
+import os
+import platform
+import shutil
+import subprocess
 import sys
-from subprocess import check_output, STDOUT, CalledProcessError
+import tempfile
+from collections import OrderedDict
+from timeit import default_timer as timer
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..'))
+RECORDINGS = os.path.join(ROOT, 'src', 'azure-cli', 'azure', 'cli', 'command_modules', '{}', 'tests', 'latest',
+                          'recordings', '{}.yaml')
+
+SCENARIOS = [
+    ('help', ['--help'], None),
+    ('group_help', ['cloud', '--help'], None),
+    ('cloud_list', ['cloud', 'list'], None),
+    ('cloud_show_error', ['cloud', 'show', '--this-does-not-exist'], None),
+    ('lock_list', ['lock', 'list'], RECORDINGS.format('resource', 'test_list_locks')),
+]
+
+PHASES = ['interpreter', 'cli', 'load_commands', 'load_arguments', 'parse', 'execute', 'output']
+
+# slower phases than this (in seconds) are not reported as regressions, they are within the noise
+MIN_REGRESSION = 0.005
+
 
 def mean(data):
     """Return the sample arithmetic mean of data."""
@@ -24,37 +65,232 @@ def pstdev(data):
     """Calculates the population standard deviation."""
     n = len(data)
     if n < 2:
-        raise ValueError('len < 2')
+        return 0.0
     ss = sq_deviation(data)
     return (ss/n) ** 0.5
 
 
-def scenario(command, loop=10):
-    real = []
-    user = []
-    syst = []
+def median(data):
+    """Return the median of data."""
+    data = sorted(data)
+    n = len(data)
+    if n < 1:
+        raise ValueError('len < 1')
+    return data[n // 2] if n % 2 else (data[n // 2 - 1] + data[n // 2]) / 2.0
+
+
+def _summarize(samples):
+    return OrderedDict([('median', median(samples)), ('mean', mean(samples)), ('pstdev', pstdev(samples))])
+
+
+def _replay(recording):
+    """ Serve the requests of the command from a test recording, signed in as the mocked test subscription. """
+    import unittest
+    import vcr
+    from azure.cli.testsdk.patches import (patch_load_cached_subscriptions, patch_retrieve_token_for_user,
+                                           patch_long_run_operation_delay, patch_progress_controller)
+
+    class _Patches(unittest.TestCase):
+        def runTest(self):
+            pass
+
+    patches = _Patches()
+    for patch in [patch_load_cached_subscriptions, patch_retrieve_token_for_user, patch_long_run_operation_delay,
+                  patch_progress_controller]:
+        patch(patches)
+    cassette = vcr.VCR(record_mode='none', match_on=['method', 'path']).use_cassette(recording)
+    return patches, cassette
+
+
+def run_child(command, recording, result_file):
+    """ Invoke the command in this interpreter and save the elapsed time of each phase. """
+    start = timer()
+    from azure.cli.core import get_default_cli, commands
+    from azure.cli.core.commands.events import EVENT_INVOKER_PRE_LOAD_ARGUMENTS, EVENT_INVOKER_POST_LOAD_ARGUMENTS
+    from knack.events import (EVENT_INVOKER_PRE_CMD_TBL_CREATE, EVENT_INVOKER_POST_PARSE_ARGS,
+                              EVENT_INVOKER_FILTER_RESULT, EVENT_CLI_POST_EXECUTE)
+
+    cli = get_default_cli()
+    result = {'phases': OrderedDict([('cli', timer() - start)]), 'modules': OrderedDict()}
+
+    # each phase ends with the event which starts the next one
+    marks = {}
+    boundaries = [('load_commands', EVENT_INVOKER_PRE_CMD_TBL_CREATE),
+                  ('load_arguments', EVENT_INVOKER_PRE_LOAD_ARGUMENTS),
+                  ('parse', EVENT_INVOKER_POST_LOAD_ARGUMENTS),
+                  ('execute', EVENT_INVOKER_POST_PARSE_ARGS),
+                  ('output', EVENT_INVOKER_FILTER_RESULT),
+                  (None, EVENT_CLI_POST_EXECUTE)]
+    for _, event in boundaries:
+        cli.register_event(event, lambda _, event=event, **kwargs: marks.setdefault(event, timer()))
+
+    load_module_command_loader = commands._load_module_command_loader  # pylint: disable=protected-access
 
-    test_command = 'time -p ' + command
-    for i in range(loop):
+    def _timed_load_module_command_loader(loader, args, mod):
+        from importlib import import_module
+        import_start = timer()
         try:
-            lines = check_output([test_command], shell=True, stderr=STDOUT).split('\n')
-        except CalledProcessError as e:
-            lines = e.output.split('\n')
-        real_time = float(lines[-4].split()[1])
-        real.append(float(lines[-4].split()[1]))
-        user.append(float(lines[-3].split()[1]))
-        syst.append(float(lines[-2].split()[1]))
-        sys.stdout.write('Loop {} => {} \n'.format(i, real_time))
-        sys.stdout.flush()
-
-    print('Command: {}'.format(command))
-    print('Real: mean => {} \t pstdev => {}'.format(mean(real), pstdev(real)))
-    print('User: mean => {} \t pstdev => {}'.format(mean(user), pstdev(user)))
-    print('Syst: mean => {} \t pstdev => {}'.format(mean(syst), pstdev(syst)))
+            import_module('azure.cli.command_modules.' + mod)
+        except ImportError:
+            pass
+        load_start = timer()
+        try:
+            return load_module_command_loader(loader, args, mod)
+        finally:
+            result['modules'][mod] = {'import': load_start - import_start, 'load': timer() - load_start}
+
+    commands._load_module_command_loader = _timed_load_module_command_loader  # pylint: disable=protected-access
+
+    def _invoke(out_file):
+        try:
+            return cli.invoke(command, out_file=out_file)
+        except SystemExit as ex:  # help and argument errors exit from the parser
+            return ex.code
+
+    patches, cassette = _replay(recording) if recording else (None, None)
+    with open(os.devnull, 'w') as out_file:
+        if cassette:
+            with cassette:
+                result['exit_code'] = _invoke(out_file)
+        else:
+            result['exit_code'] = _invoke(out_file)
+    if patches:
+        patches.doCleanups()
+
+    for (phase, event), (_, next_event) in zip(boundaries, boundaries[1:]):
+        if event in marks and next_event in marks:
+            result['phases'][phase] = marks[next_event] - marks[event]
+
+    with open(result_file, 'w') as f:
+        json.dump(result, f)
+
+
+def _run_process(args, env):
+    with open(os.devnull, 'w') as devnull:
+        start = timer()
+        subprocess.call(args, stdout=devnull, stderr=devnull, env=env)
+        return timer() - start
+
+
+def scenario(command, recording, loop):
+    config_dir = tempfile.mkdtemp()
+    env = dict(os.environ, AZURE_CONFIG_DIR=config_dir, AZURE_CORE_COLLECT_TELEMETRY='no')
+    result_file = os.path.join(config_dir, 'result.json')
+    phases = OrderedDict((phase, []) for phase in PHASES + ['total'])
+    modules = OrderedDict()
+    exit_code = None
+    try:
+        # the first run creates the config directory and the caches in it, it isn't measured
+        for i in range(loop + 1):
+            phases['interpreter'].append(_run_process([sys.executable, '-c', 'pass'], env))
+            child_args = [sys.executable, os.path.abspath(__file__), '--child', '--result-file', result_file]
+            if recording:
+                child_args.extend(['--recording', recording])
+            total = _run_process(child_args + ['--'] + command, env)
+            with open(result_file) as f:
+                result = json.load(f)
+            if not i:
+                phases['interpreter'].pop()
+                continue
+            phases['total'].append(total)
+            for phase, elapsed in result['phases'].items():
+                phases[phase].append(elapsed)
+            for mod, elapsed in result['modules'].items():
+                for step in ['import', 'load']:
+                    modules.setdefault(mod, {'import': [], 'load': []})[step].append(elapsed[step])
+            exit_code = result['exit_code']
+            sys.stdout.write('Loop {} => {:.3f}s\n'.format(i, total))
+            sys.stdout.flush()
+    finally:
+        shutil.rmtree(config_dir, ignore_errors=True)
+
+    summary = OrderedDict([
+        ('command', command),
+        ('exit_code', exit_code),
+        ('phases', OrderedDict((phase, _summarize(samples)) for phase, samples in phases.items() if samples)),
+        ('modules', OrderedDict((mod, OrderedDict((step, _summarize(samples)) for step, samples in steps.items()))
+                                for mod, steps in sorted(modules.items())))
+    ])
+
+    print('Command: az {} (exit code {})'.format(' '.join(command), exit_code))
+    for phase, stats in summary['phases'].items():
+        print('{:<16} median => {:.3f}s \t mean => {:.3f}s \t pstdev => {:.3f}s'.format(
+            phase, stats['median'], stats['mean'], stats['pstdev']))
+    slowest = sorted(summary['modules'].items(),
+                     key=lambda item: -(item[1]['import']['median'] + item[1]['load']['median']))
+    for mod, stats in slowest[:5]:
+        print('  module {:<16} import => {:.3f}s \t load => {:.3f}s'.format(
+            mod, stats['import']['median'], stats['load']['median']))
     print('')
+    return summary
+
+
+def compare(results, baseline, threshold):
+    """ Return a message for each phase and module which is slower than in the baseline. """
+    regressions = []
+
+    def _check(label, current, base):
+        if current - base > max(base * threshold, MIN_REGRESSION):
+            regressions.append('{}: {:.3f}s => {:.3f}s (+{:.0%})'.format(
+                label, base, current, (current - base) / base if base else 1))
+
+    for name, summary in results['scenarios'].items():
+        base_summary = baseline.get('scenarios', {}).get(name)
+        if not base_summary:
+            continue
+        for phase, stats in summary['phases'].items():
+            if phase in base_summary['phases']:
+                _check('{} {}'.format(name, phase), stats['median'], base_summary['phases'][phase]['median'])
+        for mod, steps in summary['modules'].items():
+            for step, stats in steps.items():
+                if mod in base_summary['modules']:
+                    _check('{} module {} {}'.format(name, mod, step), stats['median'],
+                           base_summary['modules'][mod][step]['median'])
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().split('\n')[0])
+    parser.add_argument('--loop', type=int, default=10)
+    parser.add_argument('--scenarios', nargs='+', choices=[name for name, _, _ in SCENARIOS],
+                        help='Scenarios to run. All by default.')
+    parser.add_argument('--output', help='Save the results as JSON to this file.')
+    parser.add_argument('--baseline', help='Compare the results with the JSON results saved in this file.')
+    parser.add_argument('--threshold', type=float, default=0.2,
+                        help='Relative slowdown of a median reported as a regression.')
+    parser.add_argument('--child', action='store_true', help=argparse.SUPPRESS)
+    parser.add_argument('--result-file', help=argparse.SUPPRESS)
+    parser.add_argument('--recording', help=argparse.SUPPRESS)
+    parser.add_argument('command', nargs=argparse.REMAINDER, help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        run_child(args.command[1:] if args.command[:1] == ['--'] else args.command, args.recording, args.result_file)
+        return
+
+    results = OrderedDict([
+        ('python', platform.python_version()),
+        ('platform', platform.platform()),
+        ('loop', args.loop),
+        ('scenarios', OrderedDict())
+    ])
+    for name, command, recording in SCENARIOS:
+        if not args.scenarios or name in args.scenarios:
+            results['scenarios'][name] = scenario(command, recording, args.loop)
+
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(results, f, indent=2)
+
+    if args.baseline:
+        with open(args.baseline) as f:
+            regressions = compare(results, json.load(f), args.threshold)
+        for regression in regressions:
+            print('Regression: {}'.format(regression))
+        if regressions:
+            sys.exit(1)
+        print('No regression compared to {}'.format(args.baseline))
+
 
-scenario('az')
-scenario('az cl')
-scenario('az cloud')
-scenario('az cloud list')
-scenario('az cloud show --this-does-not-exist')
+if __name__ == '__main__':
+    main()
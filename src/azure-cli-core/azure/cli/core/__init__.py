@@ -164,7 +164,8 @@ class MainCommandsLoader(CLICommandsLoader):
 
         def _update_command_table_from_extensions(ext_suppressions):
 
-            from azure.cli.core.extension.operations import check_version_compatibility
+            from azure.cli.core.extension import Extension
+            from azure.cli.core.extension._manifest import ExtensionManifest, EXTENSION_MANIFEST_FILE_NAME
 
             def _handle_extension_suppressions(extensions):
                 filtered_extensions = []
@@ -177,19 +178,48 @@ class MainCommandsLoader(CLICommandsLoader):
                         filtered_extensions.append(ext)
                 return filtered_extensions
 
+            def _get_command_search(args):
+                if not args:
+                    return None
+                nouns = []
+                for arg in args:
+                    if not arg or arg[0] == '-':
+                        break
+                    nouns.append(arg)
+                return ' '.join(nouns).lower()
+
+            def _provides(names, search):
+                # the search may be a group, a command, or a command followed by positional arguments
+                return any(n == search or n.startswith(search + ' ') or search.startswith(n + ' ') for n in names)
+
             extensions = get_extensions()
             if extensions:
                 logger.debug("Found %s extensions: %s", len(extensions), [e.name for e in extensions])
+                manifest = ExtensionManifest(os.path.join(self.cli_ctx.config.config_dir, EXTENSION_MANIFEST_FILE_NAME))
+                entries = {}
+                for ext in extensions:
+                    entries[ext.name] = manifest.get_entry(ext)
+                    if isinstance(ext, Extension):
+                        ext._metadata = entries[ext.name]['metadata']  # pylint: disable=protected-access
                 allowed_extensions = _handle_extension_suppressions(extensions)
                 module_commands = set(self.command_table.keys())
+
+                # Only load the extensions which provide the requested command, unless the command is unknown
+                search = _get_command_search(args)
+                skip_unrelated = bool(search) and (
+                    _provides(set(self.command_table) | set(self.command_group_table), search) or
+                    any(_provides(entries[e.name]['commands'] or [], search) for e in allowed_extensions))
+
                 for ext in allowed_extensions:
-                    try:
-                        check_version_compatibility(ext.get_metadata())
-                    except CLIError as ex:
+                    entry = entries[ext.name]
+                    if entry['error']:
                         # issue warning and skip loading extensions that aren't compatible with the CLI core
-                        logger.warning(ex)
+                        logger.warning(entry['error'])
                         continue
                     ext_name = ext.name
+                    if skip_unrelated and entry['commands'] is not None and not _provides(entry['commands'], search):
+                        logger.debug("Skipped extension '%s' which doesn't provide '%s'.", ext_name, search)
+                        continue
                     ext_dir = ext.path or get_extension_path(ext_name)
                     sys.path.append(ext_dir)
                     try:
@@ -209,12 +239,14 @@ class MainCommandsLoader(CLICommandsLoader):
 
                         self.command_table.update(extension_command_table)
                         self.command_group_table.update(extension_group_table)
+                        manifest.set_commands(ext, list(extension_command_table) + list(extension_group_table))
                         elapsed_time = timeit.default_timer() - start_time
                         logger.debug("Loaded extension '%s' in %.3f seconds.", ext_name, elapsed_time)
                     except Exception:  # pylint: disable=broad-except
                         self.cli_ctx.raise_event(EVENT_FAILED_EXTENSION_LOAD, extension_name=ext_name)
                         logger.warning("Unable to load extension '%s'. Use --debug for more information.", ext_name)
                         logger.debug(traceback.format_exc())
+                manifest.save()
 
         def _wrap_suppress_extension_func(func, ext):
             """ Wrapper method to handle centralization of log messages for extension filters """
@@ -0,0 +1,185 @@
+# --------------------------------------------------------------------------------------------
+# Copyright (c) Microsoft Corporation. All rights reserved.
+# Licensed under the MIT License. See License.txt in the project root for license information.
+# --------------------------------------------------------------------------------------------
+
+"""
+A process-wide and on-disk cache of resource provider metadata (namespace -> resource types -> API versions).
+
+Generic resource commands need the API versions of a provider before they can issue a request. Fetching them
+costs a `providers.get` round trip, which used to be paid once per resource ID. Entries are persisted under the
+config directory and expire after `core.provider_cache_ttl` minutes. Concurrent lookups of the same namespace
+are coalesced so that only one request is sent.
+"""
+
+import json
+import os
+import threading
+import time
+from collections import namedtuple
+from codecs import open as codecs_open
+
+import six
+from knack.log import get_logger
+
+logger = get_logger(__name__)
+
+PROVIDER_CACHE_FILE_NAME = 'providerCache.json'
+DEFAULT_PROVIDER_CACHE_TTL = 1440  # minutes
+
+ResourceTypeMetadata = namedtuple('ResourceTypeMetadata', ['resource_type', 'api_versions', 'default_api_version'])
+
+
+def _get_cache_ttl(cli_ctx):
+    if _get_cache_path(cli_ctx) is None:
+        return 0
+    try:
+        return cli_ctx.config.getint('core', 'provider_cache_ttl', fallback=DEFAULT_PROVIDER_CACHE_TTL)
+    except ValueError:
+        logger.warning("Invalid value for 'core.provider_cache_ttl'. Using the default of %s minutes.",
+                       DEFAULT_PROVIDER_CACHE_TTL)
+        return DEFAULT_PROVIDER_CACHE_TTL
+
+
+def _get_cache_path(cli_ctx):
+    # the cache is only used with the config directory of a CLI context, not when the context is missing or mocked
+    config_dir = getattr(getattr(cli_ctx, 'config', None), 'config_dir', None)
+    if not isinstance(config_dir, six.string_types):
+        return None
+    return os.path.join(config_dir, PROVIDER_CACHE_FILE_NAME)
+
+
+def _serialize_provider(provider):
+    return [{
+        'resourceType': rt.resource_type,
+        'apiVersions': list(rt.api_versions or []),
+        'defaultApiVersion': getattr(rt, 'default_api_version', None)
+    } for rt in provider.resource_types or []]
+
+
+def _to_metadata(resource_types):
+    return [ResourceTypeMetadata(rt['resourceType'], rt['apiVersions'], rt.get('defaultApiVersion'))
+            for rt in resource_types]
+
+
+class ProviderMetadataCache(object):
+    """
+    Thread-safe cache of provider resource types, backed by a JSON file.
+
+    Entries are keyed by management endpoint, subscription and namespace. The file is read lazily on first
+    use and merged with the latest content on disk before each write, so concurrent `az` processes do not
+    drop each other's entries.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._fetch_locks = {}
+        self._entries = None
+        self._filename = None
+
+    def _ensure_loaded(self, filename):
+        if self._entries is not None and self._filename == filename:
+            return
+        self._filename = filename
+        self._entries = self._read_file(filename)
+
+    @staticmethod
+    def _read_file(filename):
+        try:
+            with codecs_open(filename, 'r', encoding='utf-8-sig') as f:
+                data = json.load(f)
+            return data if isinstance(data, dict) else {}
+        except (OSError, IOError, ValueError):
+            return {}
+
+    def _write_file(self):
+        entries = self._read_file(self._filename)
+        for key, entry in self._entries.items():
+            if entry['timestamp'] >= entries.get(key, {}).get('timestamp', 0):
+                entries[key] = entry
+        self._entries = entries
+        try:
+            with codecs_open(self._filename, 'w', encoding='utf-8') as f:
+                json.dump(entries, f)
+        except (OSError, IOError, TypeError, ValueError) as ex:
+            logger.debug("Unable to save provider metadata cache '%s': %s", self._filename, ex)
+
+    def _get_fresh(self, key, ttl):
+        entry = self._entries.get(key)
+        if entry and time.time() - entry['timestamp'] < ttl * 60:
+            return entry['resourceTypes']
+        return None
+
+    def _get_fetch_lock(self, key):
+        with self._lock:
+            return self._fetch_locks.setdefault(key, threading.Lock())
+
+    def get(self, filename, key, ttl, fetch, force_refresh=False):
+        """ Return the cached resource types for `key`, calling `fetch` on a miss. Only one caller per key
+        fetches at a time; the others wait for and reuse its result. """
+        with self._lock:
+            self._ensure_loaded(filename)
+            if not force_refresh:
+                cached = self._get_fresh(key, ttl)
+                if cached is not None:
+                    return cached
+            requested_at = time.time()
+
+        with self._get_fetch_lock(key):
+            with self._lock:
+                self._ensure_loaded(filename)
+                entry = self._entries.get(key)
+                # another thread refreshed the entry while we were waiting on it
+                if entry and entry['timestamp'] >= requested_at:
+                    return entry['resourceTypes']
+            resource_types = fetch()
+            with self._lock:
+                self._entries[key] = {'timestamp': time.time(), 'resourceTypes': resource_types}
+                self._write_file()
+        return resource_types
+
+    def clear(self):
+        with self._lock:
+            self._entries = None
+            self._filename = None
+
+
+PROVIDER_CACHE = ProviderMetadataCache()
+
+
+def get_provider_resource_types(cli_ctx, client, namespace, force_refresh=False):
+    """
+    Return the resource types of a provider as a list of `ResourceTypeMetadata`.
+
+    :param cli_ctx: the CLI context, used for the cache location and TTL. Without one the cache is not used.
+    :param client: a `ResourceManagementClient`
+    :param str namespace: the resource provider namespace, e.g. 'Microsoft.Compute'
+    :param bool force_refresh: bypass cached entries and query the service
+    """
+    def _fetch():
+        return _serialize_provider(client.providers.get(namespace))
+
+    ttl = _get_cache_ttl(cli_ctx)
+    endpoint, subscription_id = client.config.base_url, client.config.subscription_id
+    if ttl <= 0 or not all(isinstance(v, six.string_types) for v in (endpoint, subscription_id)):
+        # nothing is cached for a mocked client either
+        return _to_metadata(_fetch())
+
+    key = '{}|{}|{}'.format(endpoint.rstrip('/').lower(), subscription_id, namespace.lower())
+    resource_types = PROVIDER_CACHE.get(_get_cache_path(cli_ctx), key, ttl, _fetch, force_refresh=force_refresh)
+    return _to_metadata(resource_types)
+
+
+def find_provider_resource_type(cli_ctx, client, namespace, resource_type):
+    """
+    Return the `ResourceTypeMetadata` for `namespace/resource_type`, or None if the provider does not have it.
+
+    A miss on cached metadata triggers one refresh, since the type may have been added since it was cached.
+    """
+    def _find(resource_types):
+        return next((t for t in resource_types if t.resource_type.lower() == resource_type.lower()), None)
+
+    rt = _find(get_provider_resource_types(cli_ctx, client, namespace))
+    if rt is None and _get_cache_ttl(cli_ctx) > 0:
+        rt = _find(get_provider_resource_types(cli_ctx, client, namespace, force_refresh=True))
+    return rt
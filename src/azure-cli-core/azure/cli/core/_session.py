@@ -96,6 +96,43 @@ class Session(collections.MutableMapping):
         return len(self.data)
 
 
+class SessionCache(object):
+    """
+    Base class of the caches kept in a JSON file in the config directory. Subclasses store their entries with the time
+    they were cached and use `is_fresh` to expire them after the number of minutes configured by `TTL_CONFIG`, a
+    (section, option) pair. A TTL of 0 disables the cache: the file is neither loaded nor saved.
+    """
+    FILE_NAME = None
+    TTL_CONFIG = ()  # (section, option)
+    DEFAULT_TTL = 60  # minutes
+
+    def __init__(self, cli_ctx):
+        try:
+            self.ttl = cli_ctx.config.getint(*self.TTL_CONFIG, fallback=self.DEFAULT_TTL)
+        except ValueError:
+            self.ttl = self.DEFAULT_TTL
+        self._session = Session()
+        if self.ttl > 0:
+            try:
+                self._session.load(self._get_filename(cli_ctx))
+            except (OSError, IOError) as ex:
+                get_logger(__name__).debug("Failed to load the cache %s: %s", self.FILE_NAME, ex)
+                self.ttl = 0
+
+    def _get_filename(self, cli_ctx):
+        return os.path.join(cli_ctx.config.config_dir, self.FILE_NAME)
+
+    def is_fresh(self, timestamp):
+        return time.time() - timestamp < self.ttl * 60
+
+    def save(self):
+        """ Saves the cache. Failures are only logged since the cache is an optimization. """
+        try:
+            self._session.save_with_retry()
+        except (OSError, IOError) as ex:
+            get_logger(__name__).debug("Failed to save the cache %s: %s", self._session.filename, ex)
+
+
 # ACCOUNT contains subscriptions information
 ACCOUNT = Session()
 
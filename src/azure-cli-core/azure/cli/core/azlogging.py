@@ -25,6 +25,7 @@ omitted     Warning     Debug       Critical    Debug
 
 import os
 import logging
+import logging.handlers
 import datetime
 
 from azure.cli.core.commands.events import EVENT_INVOKER_PRE_CMD_TBL_TRUNCATE
@@ -35,6 +36,10 @@ from knack.util import ensure_dir
 
 _UNKNOWN_COMMAND = "unknown_command"
 _CMD_LOG_LINE_PREFIX = "CMD-LOG-LINE-BEGIN"
+_CMD_LOG_METADATA_FILE = "cleanup.meta"
+_CMD_LOG_BUFFER_CAPACITY = 100
+_CMD_LOG_KEEP_COUNT = 25
+_CMD_LOG_CLEANUP_THRESHOLD = 25
 
 
 class AzCliLogging(CLILogging):
@@ -52,24 +57,6 @@ class AzCliLogging(CLILogging):
 
     @staticmethod
     def init_command_file_logging(cli_ctx, **kwargs):
-        def _delete_old_logs(log_dir):
-            """
-            Periodically delete the 5 oldest command log files, ensuring that only the history of the last
-            25 commands (or less) are kept.
-            """
-
-            # get log file names and sort them from newest to oldest file.
-            log_file_names = [file for file in os.listdir(log_dir) if file.endswith(".log")]
-            sorted_files = sorted(log_file_names, reverse=True)
-
-            # if we have too many files, delete the 5 last / oldest command log files.
-            if len(sorted_files) > 25:
-                for file in sorted_files[-5:]:
-                    try:
-                        os.remove(os.path.join(log_dir, file))
-                    except OSError:  # FileNotFoundError introduced in Python 3
-                        continue
-
         # if tab-completion and not command don't log to file.
         if not cli_ctx.data.get('completer_active', False):
             self = cli_ctx.logging
@@ -80,8 +67,6 @@ class AzCliLogging(CLILogging):
             self._init_command_logfile_handlers(cmd_logger, args)  # pylint: disable=protected-access
             get_logger(__name__).debug("metadata file logging enabled - writing logs to '%s'.", self.command_log_dir)
 
-            _delete_old_logs(self.command_log_dir)
-
     def _init_command_logfile_handlers(self, command_metadata_logger, args):
 
         ensure_dir(self.command_log_dir)
@@ -98,10 +83,12 @@ class AzCliLogging(CLILogging):
 
         log_file_path = os.path.join(self.command_log_dir, log_name)
 
-        logfile_handler = logging.FileHandler(log_file_path)
+        # the records are buffered in memory and the log file is only created when they are flushed: once the buffer
+        # is full, on an error, at the end of the command or at exit.
+        logfile_handler = _CommandLogBufferingHandler(_CommandLogFileHandler(log_file_path))
 
         lfmt = logging.Formatter(_CMD_LOG_LINE_PREFIX + ' %(process)d | %(asctime)s | %(levelname)s | %(name)s | %(message)s')  # pylint: disable=line-too-long
-        logfile_handler.setFormatter(lfmt)
+        logfile_handler.target.setFormatter(lfmt)
         logfile_handler.setLevel(logging.DEBUG)
         command_metadata_logger.addHandler(logfile_handler)
 
@@ -176,9 +163,74 @@ class AzCliLogging(CLILogging):
             # crucial to remove handler as in python logger objects are shared which can affect testing of this logger
             # we do not want duplicate handlers to be added in subsequent calls of _init_command_logfile_handlers
             self.command_metadata_logger.removeHandler(self.command_logger_handler)
+            self.command_logger_handler.close()
             self.command_metadata_logger = None
 
 
+class _CommandLogFileHandler(logging.FileHandler):
+    """ A file handler which creates the command log file, and its directory, on the first record. Every
+    _CMD_LOG_CLEANUP_THRESHOLD log files created, the oldest log files are deleted so that only the history of the last
+    _CMD_LOG_KEEP_COUNT commands are kept. The count is the size of a small metadata file in the log directory, to
+    which one byte is appended per log file, so that most commands don't scan the log directory. """
+
+    def __init__(self, filename):
+        super(_CommandLogFileHandler, self).__init__(filename, delay=True)
+
+    def _open(self):
+        log_dir = os.path.dirname(self.baseFilename)
+        ensure_dir(log_dir)
+        stream = super(_CommandLogFileHandler, self)._open()
+        _count_command_log_file(log_dir)
+        return stream
+
+
+class _CommandLogBufferingHandler(logging.handlers.MemoryHandler):
+
+    def __init__(self, target):
+        super(_CommandLogBufferingHandler, self).__init__(_CMD_LOG_BUFFER_CAPACITY, target=target)
+
+    def close(self):
+        target = self.target
+        super(_CommandLogBufferingHandler, self).close()  # flushes the buffered records
+        if target:
+            target.close()
+
+
+def _count_command_log_file(log_dir):
+    metadata_file = os.path.join(log_dir, _CMD_LOG_METADATA_FILE)
+    try:
+        fd = os.open(metadata_file, os.O_WRONLY | os.O_APPEND | os.O_CREAT, 0o600)
+        try:
+            os.write(fd, b'.')
+            count = os.fstat(fd).st_size
+        finally:
+            os.close(fd)
+
+        if count >= _CMD_LOG_CLEANUP_THRESHOLD:
+            with open(metadata_file, 'w'):  # reset the count
+                pass
+            _delete_old_logs(log_dir)
+    except (IOError, OSError):
+        pass
+
+
+def _delete_old_logs(log_dir):
+    """
+    Delete the oldest command log files, ensuring that only the history of the last _CMD_LOG_KEEP_COUNT commands are
+    kept.
+    """
+
+    # get log file names and sort them from newest to oldest file.
+    log_file_names = [file for file in os.listdir(log_dir) if file.endswith(".log")]
+    sorted_files = sorted(log_file_names, reverse=True)
+
+    for file in sorted_files[_CMD_LOG_KEEP_COUNT:]:
+        try:
+            os.remove(os.path.join(log_dir, file))
+        except OSError:  # FileNotFoundError introduced in Python 3
+            continue
+
+
 class CommandLoggerContext(object):
     def __init__(self, module_logger):
         self.logger = module_logger
@@ -1126,9 +1126,6 @@ def get_arm_resource_by_id(cli_ctx, arm_id, api_version=None):
                 namespace = v
                 highest_child = child_number
 
-        # retrieve provider info for the namespace
-        provider = client.providers.get(namespace)
-
         # assemble the resource type key used by the provider list operation.  type1/type2/type3/...
         resource_type_str = ''
         if not highest_child:
@@ -1141,15 +1138,15 @@ def get_arm_resource_by_id(cli_ctx, arm_id, api_version=None):
                 resource_type_str = '{}{}/'.format(resource_type_str, parts['child_type_{}'.format(k)])
             resource_type_str = resource_type_str.rstrip('/')
 
-        api_version = None
-        rt = next((t for t in provider.resource_types if t.resource_type.lower() == resource_type_str.lower()), None)
+        # retrieve provider info for the namespace, reusing cached provider metadata when available
+        from azure.cli.core._provider_cache import find_provider_resource_type
+        rt = find_provider_resource_type(cli_ctx, client, namespace, resource_type_str)
         if not rt:
             from azure.cli.core.parser import IncorrectUsageError
             raise IncorrectUsageError('Resource type {} not found.'.format(resource_type_str))
-        try:
-            # if the service specifies, use the default API version
-            api_version = rt.default_api_version
-        except AttributeError:
+        # if the service specifies, use the default API version
+        api_version = rt.default_api_version
+        if not api_version:
             # if the service doesn't specify, use the most recent non-preview API version unless there is only a
             # single API version. API versions are returned by the service in a sorted list
             api_version = next((x for x in rt.api_versions if not x.endswith('preview')), rt.api_versions[0])
@@ -0,0 +1,123 @@
+# --------------------------------------------------------------------------------------------
+# Copyright (c) Microsoft Corporation. All rights reserved.
+# Licensed under the MIT License. See License.txt in the project root for license information.
+# --------------------------------------------------------------------------------------------
+
+"""
+A manifest of the installed extensions, saved under the config directory.
+
+Loading the command table used to read the metadata of every installed extension, check its compatibility with the
+CLI core and import it on each invocation. The manifest keeps, per extension, the metadata, the compatibility
+verdict and the commands and groups it provided when it was last loaded. An entry is rebuilt when the modified time
+of the extension directory or the CLI core version changes. Dev extensions are edited in place, so they are never
+cached.
+"""
+
+import json
+import os
+from codecs import open as codecs_open
+
+from knack.log import get_logger
+
+logger = get_logger(__name__)
+
+EXTENSION_MANIFEST_FILE_NAME = 'extensionManifest.json'
+
+
+def _get_extension_mtime(ext):
+    from azure.cli.core.extension import get_extension_path
+    if getattr(ext, 'ext_type', None) != 'whl':
+        return None
+    try:
+        return os.stat(ext.path or get_extension_path(ext.name)).st_mtime
+    except OSError:
+        return None
+
+
+def _build_entry(ext):
+    from azure.cli.core.extension.operations import check_version_compatibility
+    from azure.cli.core.util import CLIError
+
+    metadata = ext.get_metadata()
+    try:
+        check_version_compatibility(metadata)
+        error = None
+    except CLIError as ex:
+        error = str(ex)
+    return {'metadata': metadata, 'error': error, 'commands': None}
+
+
+class ExtensionManifest(object):
+
+    def __init__(self, filename):
+        self.filename = filename
+        self._extensions = None
+        self._dirty = False
+
+    def _load(self):
+        from azure.cli.core import __version__ as core_version
+
+        if self._extensions is None:
+            self._extensions = {}
+            try:
+                with codecs_open(self.filename, 'r', encoding='utf-8-sig') as f:
+                    data = json.load(f)
+                if data.get('coreVersion') == core_version:
+                    self._extensions = data['extensions']
+            except (OSError, IOError, ValueError, KeyError, AttributeError):
+                pass
+        return self._extensions
+
+    def get_entry(self, ext):
+        """
+        Return the manifest entry of an extension, a dict of its 'metadata', the 'error' message if it isn't
+        compatible with the CLI core, and the names of the 'commands' and groups it provides or None if unknown.
+        """
+        mtime = _get_extension_mtime(ext)
+        if mtime is None:
+            return _build_entry(ext)
+
+        extensions = self._load()
+        entry = extensions.get(ext.name)
+        if not entry or entry.get('mtime') != mtime:
+            entry = _build_entry(ext)
+            entry['mtime'] = mtime
+            extensions[ext.name] = entry
+            self._dirty = True
+        return entry
+
+    def set_commands(self, ext, names):
+        entry = self._load().get(ext.name)
+        if entry is not None and entry.get('mtime') == _get_extension_mtime(ext):
+            names = sorted(names)
+            if entry.get('commands') != names:
+                entry['commands'] = names
+                self._dirty = True
+
+    def save(self):
+        import tempfile
+        from azure.cli.core import __version__ as core_version
+
+        if not self._dirty:
+            return
+        # write a temporary file next to the manifest and move it over it, so that concurrent invocations never read
+        # a partially written manifest
+        temp_path = None
+        try:
+            fd, temp_path = tempfile.mkstemp(dir=os.path.dirname(self.filename),
+                                             prefix=os.path.basename(self.filename))
+            os.close(fd)
+            with codecs_open(temp_path, 'w', encoding='utf-8') as f:
+                json.dump({'coreVersion': core_version, 'extensions': self._extensions}, f)
+            try:
+                os.replace(temp_path, self.filename)
+            except AttributeError:  # in Python 2.7
+                if os.name == 'nt' and os.path.exists(self.filename):
+                    os.remove(self.filename)
+                os.rename(temp_path, self.filename)
+            self._dirty = False
+        except (OSError, IOError) as ex:
+            logger.debug("Unable to save extension manifest '%s': %s", self.filename, ex)
+        finally:
+            if temp_path and os.path.exists(temp_path):
+                os.remove(temp_path)
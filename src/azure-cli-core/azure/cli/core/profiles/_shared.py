@@ -23,6 +23,11 @@ class APIVersionException(Exception):
 # Sentinel value for profile
 PROFILE_TYPE = object()
 
+# Process wide caches of the loaded SDK objects, keyed by (versioned sdk path, attribute path), and of the resolved
+# API versions of the multi-API clients
+_SDK_ATTR_CACHE = {}
+_API_VERSIONS_CACHE = {}
+
 
 class CustomResourceType(object):  # pylint: disable=too-few-public-methods
     def __init__(self, import_prefix, client_name):
@@ -237,11 +242,20 @@ class _ApiVersions(object):  # pylint: disable=too-few-public-methods
             raise AttributeError('Attribute {} does not exist.'.format(item))
 
 
-def _get_api_version_tuple(resource_type, sdk_profile, post_process=lambda x: x):
+def _get_api_version_tuple(resource_type, sdk_profile, post_process=None):
     """Return a _ApiVersion instance where key are operation group and value are api version."""
-    return _ApiVersions(client_type=get_client_class(resource_type),
-                        sdk_profile=sdk_profile,
-                        post_process=post_process)
+    if post_process:
+        return _ApiVersions(client_type=get_client_class(resource_type),
+                            sdk_profile=sdk_profile,
+                            post_process=post_process)
+
+    # the operation groups of a client class never change, so the resolved instance is shared by all the callers
+    key = (resource_type, sdk_profile)
+    if key not in _API_VERSIONS_CACHE:
+        _API_VERSIONS_CACHE[key] = _ApiVersions(client_type=get_client_class(resource_type),
+                                                sdk_profile=sdk_profile,
+                                                post_process=lambda x: x)
+    return _API_VERSIONS_CACHE[key]
 
 
 def get_api_version(api_profile, resource_type, as_sdk_profile=False):
@@ -401,6 +415,14 @@ def supported_resource_type(api_profile, resource_type):
 
 
 def _get_attr(sdk_path, mod_attr_path, checked=True):
+    # The versioned sdk path already encodes the resource type and API version. Objects loaded once are memoized
+    # for the process so that repeated get_sdk/get_models calls don't import and traverse the SDK again.
+    key = (sdk_path, mod_attr_path)
+    try:
+        return _SDK_ATTR_CACHE[key]
+    except KeyError:
+        pass
+
     try:
         attr_mod, attr_path = mod_attr_path.split('#') \
             if '#' in mod_attr_path else (mod_attr_path, '')
@@ -410,6 +432,7 @@ def _get_attr(sdk_path, mod_attr_path, checked=True):
             # Only load attributes if needed
             for part in attr_path.split('.'):
                 op = getattr(op, part)
+        _SDK_ATTR_CACHE[key] = op
         return op
     except (ImportError, AttributeError) as ex:
         if checked:
@@ -445,7 +468,7 @@ def get_versioned_sdk(api_profile, resource_type, *attr_args, **kwargs):
     sdk_path = get_versioned_sdk_path(api_profile, resource_type, operation_group)
     if not attr_args:
         # No attributes to load. Return the versioned sdk
-        return import_module(sdk_path)
+        return _get_attr(sdk_path, '', checked=False)
     results = []
     for mod_attr_path in attr_args:
         if sub_mod_prefix and '#' not in mod_attr_path:
@@ -8,7 +8,8 @@ import mock
 
 from azure.cli.core.profiles import (ResourceType, PROFILE_TYPE, CustomResourceType,
                                      get_api_version, supported_api_version, register_resource_type)
-from azure.cli.core.profiles._shared import APIVersionException, get_versioned_sdk_path
+from azure.cli.core.profiles._shared import (APIVersionException, get_versioned_sdk_path, get_versioned_sdk,
+                                             _SDK_ATTR_CACHE)
 from azure.cli.core.cloud import Cloud
 from azure.cli.core.mock import DummyCli
 
@@ -271,6 +272,24 @@ class TestAPIProfiles(unittest.TestCase):
                 "azure.keyvault.v7_0"
             )
 
+    def test_get_versioned_sdk_is_memoized(self):
+        test_profile = {'latest': {ResourceType.MGMT_STORAGE: '2020-10-10'}}
+        models = mock.MagicMock()
+        with mock.patch('azure.cli.core.profiles._shared.AZURE_API_PROFILES', test_profile), \
+                mock.patch.dict(_SDK_ATTR_CACHE, clear=True), \
+                mock.patch('azure.cli.core.profiles._shared.import_module', return_value=models) as import_module:
+            for _ in range(3):
+                self.assertEqual(get_versioned_sdk('latest', ResourceType.MGMT_STORAGE, 'Sku', 'Kind', mod='models'),
+                                 [models.Sku, models.Kind])
+            import_module.assert_called_with('azure.mgmt.storage.v2020_10_10.models')
+            self.assertEqual(import_module.call_count, 2)
+
+            # a missing object is looked up again
+            import_module.side_effect = ImportError()
+            self.assertIsNone(get_versioned_sdk('latest', ResourceType.MGMT_STORAGE, 'Sku', mod='operations'))
+            self.assertIsNone(get_versioned_sdk('latest', ResourceType.MGMT_STORAGE, 'Sku', mod='operations'))
+            self.assertEqual(import_module.call_count, 4)
+
 
 if __name__ == '__main__':
     unittest.main()
@@ -220,6 +220,81 @@ class TestCommandRegistration(unittest.TestCase):
         self.assertTrue(isinstance(ext2.command_source, ExtensionCommandSource))
         self.assertTrue(ext2.command_source.overrides_command)
 
+    def test_register_command_from_extension_manifest(self):
+        import os
+        import shutil
+        import tempfile
+        from azure.cli.core.extension import WheelExtension
+
+        work_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, work_dir)
+        extensions = []
+        for name in ['ext1', 'ext2']:
+            os.makedirs(os.path.join(work_dir, name))
+            extensions.append(WheelExtension(name, os.path.join(work_dir, name)))
+
+        loaded = []
+        groups = {'azure.cli.command_modules.': ('hello', 'world'), 'ext1': ('hello', 'noodle'), 'ext2': ('bye', 'now')}
+
+        def _load_command_loader(loader, args, name, prefix):
+            group, command = groups[prefix or name]
+            loaded.append(prefix or name)
+
+            class TestCommandsLoader(AzCommandsLoader):
+                def load_command_table(self, args):
+                    super(TestCommandsLoader, self).load_command_table(args)
+                    with self.command_group(group, operations_tmpl='{}#TestCommandRegistration.{{}}'.format(
+                            __name__)) as g:
+                        g.command(command, 'sample_vm_get')
+                    return self.command_table
+
+            command_loader = TestCommandsLoader(cli_ctx=loader.cli_ctx)
+            loader.loaders.append(command_loader)
+            return command_loader.load_command_table(args), command_loader.command_group_table
+
+        cli = DummyCli()
+        cli.config.config_dir = work_dir
+        path = list(sys.path)
+
+        def _load(args):
+            del loaded[:]
+            sys.path[:] = path
+            cli.loader = MainCommandsLoader(cli)
+            return sorted(cli.loader.load_command_table(args))
+
+        with mock.patch('importlib.import_module', TestCommandRegistration._mock_import_lib), \
+                mock.patch('pkgutil.iter_modules', TestCommandRegistration._mock_iter_modules), \
+                mock.patch('azure.cli.core.commands._load_command_loader', _load_command_loader), \
+                mock.patch('azure.cli.core.extension.get_extension_modname',
+                           lambda ext_name=None, ext_dir=None: ext_name or os.path.basename(ext_dir)), \
+                mock.patch('azure.cli.core.extension.get_extensions', lambda ext_type=None: extensions), \
+                mock.patch.object(sys, 'path', list(sys.path)):
+            # the commands of the extensions are unknown until they are loaded once
+            self.assertEqual(_load(['hello', 'world']), ['bye now', 'hello noodle', 'hello world'])
+            self.assertEqual(loaded, ['azure.cli.command_modules.', 'ext1', 'ext2'])
+
+            self.assertEqual(_load(['hello', 'noodle', '--debug']), ['hello noodle', 'hello world'])
+            self.assertEqual(loaded, ['azure.cli.command_modules.', 'ext1'])
+            self.assertNotIn(os.path.join(work_dir, 'ext2'), sys.path)
+            self.assertEqual(_load(['bye', '-h']), ['bye now', 'hello world'])
+            self.assertEqual(loaded, ['azure.cli.command_modules.', 'ext2'])
+
+            # unknown commands and the root help need all the extensions
+            self.assertEqual(len(_load(['hi'])), 3)
+            self.assertEqual(len(_load(None)), 3)
+
+            # the manifest is replaced as a whole and only rewritten when the commands change
+            manifest_path = os.path.join(work_dir, 'extensionManifest.json')
+            self.assertEqual(sorted(os.listdir(work_dir)), ['ext1', 'ext2', 'extensionManifest.json'])
+            os.utime(manifest_path, (0, 0))
+            _load(None)
+            self.assertEqual(os.path.getmtime(manifest_path), 0)
+
+            # the manifest entry of an updated extension is rebuilt
+            os.utime(os.path.join(work_dir, 'ext1'), (0, 0))
+            _load(['bye'])
+            self.assertEqual(loaded, ['azure.cli.command_modules.', 'ext1', 'ext2'])
+
     def test_argument_with_overrides(self):
 
         global_vm_name_type = CLIArgumentType(
@@ -0,0 +1,81 @@
+# --------------------------------------------------------------------------------------------
+# Copyright (c) Microsoft Corporation. All rights reserved.
+# Licensed under the MIT License. See License.txt in the project root for license information.
+# --------------------------------------------------------------------------------------------
+
+import logging
+import os
+import shutil
+import tempfile
+import unittest
+
+import mock
+
+from azure.cli.core.azlogging import (AzCliLogging, _CommandLogBufferingHandler, _CommandLogFileHandler, _CMD_LOG_METADATA_FILE,
+                                      _CMD_LOG_KEEP_COUNT, _CMD_LOG_CLEANUP_THRESHOLD)
+
+
+class TestCommandLogging(unittest.TestCase):
+
+    def setUp(self):
+        self.log_dir = os.path.join(tempfile.mkdtemp(), 'commands')
+        self.addCleanup(shutil.rmtree, os.path.dirname(self.log_dir))
+        self.logger = logging.getLogger('az_command_data_logger_test')
+        self.logger.setLevel(logging.DEBUG)
+        self.logger.propagate = False
+
+    def _log_command(self, index, messages=('command args: group list',)):
+        log_file = os.path.join(self.log_dir, '2019-06-01.00-00-{:05}.group_list.1.log'.format(index))
+        handler = _CommandLogBufferingHandler(_CommandLogFileHandler(log_file))
+        self.logger.addHandler(handler)
+        try:
+            for message in messages:
+                self.logger.info(message)
+            return log_file, handler
+        finally:
+            self.logger.removeHandler(handler)
+
+    def test_command_log_file_is_created_on_flush(self):
+        log_file, handler = self._log_command(0, ['command args: group list', 'exit code: 0'])
+        self.assertFalse(os.path.exists(self.log_dir))
+
+        handler.close()
+        with open(log_file) as f:
+            self.assertEqual(f.read().splitlines(), ['command args: group list', 'exit code: 0'])
+
+    def test_command_log_file_is_flushed_on_error(self):
+        log_file, handler = self._log_command(0)
+        self.logger.addHandler(handler)
+        self.logger.error('expected')
+        self.logger.removeHandler(handler)
+        with open(log_file) as f:
+            self.assertEqual(f.read().splitlines(), ['command args: group list', 'expected'])
+        handler.close()
+
+    def test_command_log_files_are_deleted_periodically(self):
+        with mock.patch('azure.cli.core.azlogging._delete_old_logs') as delete_old_logs:
+            for i in range(_CMD_LOG_CLEANUP_THRESHOLD - 1):
+                self._log_command(i)[1].close()
+            delete_old_logs.assert_not_called()
+
+        for i in range(_CMD_LOG_CLEANUP_THRESHOLD - 1, _CMD_LOG_CLEANUP_THRESHOLD * 2):
+            self._log_command(i)[1].close()
+
+        log_files = sorted(f for f in os.listdir(self.log_dir) if f.endswith('.log'))
+        self.assertEqual(len(log_files), _CMD_LOG_KEEP_COUNT)
+        self.assertEqual(log_files[-1],
+                         '2019-06-01.00-00-{:05}.group_list.1.log'.format(_CMD_LOG_CLEANUP_THRESHOLD * 2 - 1))
+        self.assertEqual(os.path.getsize(os.path.join(self.log_dir, _CMD_LOG_METADATA_FILE)), 0)
+
+    def test_command_log_dir_is_created_for_feedback(self):
+        cli_ctx = mock.MagicMock()
+        cli_ctx.invocation._rudimentary_get_command.return_value = 'feedback'
+        az_logging = mock.MagicMock(spec=AzCliLogging, cli_ctx=cli_ctx, command_log_dir=self.log_dir)
+
+        AzCliLogging._init_command_logfile_handlers(az_logging, self.logger, ['feedback'])
+        self.assertTrue(os.path.isdir(self.log_dir))
+        self.assertEqual(os.listdir(self.log_dir), [])
+
+
+if __name__ == '__main__':
+    unittest.main()
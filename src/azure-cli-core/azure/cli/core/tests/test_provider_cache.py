@@ -0,0 +1,140 @@
+# --------------------------------------------------------------------------------------------
+# Copyright (c) Microsoft Corporation. All rights reserved.
+# Licensed under the MIT License. See License.txt in the project root for license information.
+# --------------------------------------------------------------------------------------------
+
+import json
+import os
+import shutil
+import tempfile
+import threading
+import time
+import unittest
+
+import mock
+
+from azure.cli.core._provider_cache import (
+    ProviderMetadataCache, get_provider_resource_types, find_provider_resource_type, PROVIDER_CACHE_FILE_NAME)
+
+
+def _mock_resource_type(name, api_versions):
+    rt = mock.MagicMock()
+    rt.resource_type = name
+    rt.api_versions = api_versions
+    rt.default_api_version = None
+    return rt
+
+
+def _mock_client(resource_types, delay=0):
+    client = mock.MagicMock()
+    client.config.base_url = 'https://management.azure.com'
+    client.config.subscription_id = '00000000-0000-0000-0000-000000000000'
+    provider = mock.MagicMock()
+    provider.resource_types = resource_types
+
+    def _get(namespace):  # pylint: disable=unused-argument
+        time.sleep(delay)
+        return provider
+
+    client.providers.get.side_effect = _get
+    return client
+
+
+class TestProviderMetadataCache(unittest.TestCase):
+
+    def setUp(self):
+        self.config_dir = tempfile.mkdtemp()
+        self.cli_ctx = mock.MagicMock()
+        self.cli_ctx.config.config_dir = self.config_dir
+        self.cli_ctx.config.getint.return_value = 60
+        self.cache = ProviderMetadataCache()
+        patcher = mock.patch('azure.cli.core._provider_cache.PROVIDER_CACHE', self.cache)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def tearDown(self):
+        shutil.rmtree(self.config_dir, ignore_errors=True)
+
+    def test_provider_cache_reuses_lookup(self):
+        client = _mock_client([_mock_resource_type('virtualMachines', ['2019-03-01', '2018-10-01'])])
+        for _ in range(5):
+            rt = find_provider_resource_type(self.cli_ctx, client, 'Microsoft.Compute', 'virtualmachines')
+            self.assertEqual(rt.api_versions, ['2019-03-01', '2018-10-01'])
+        self.assertEqual(client.providers.get.call_count, 1)
+
+    def test_provider_cache_persists_to_disk(self):
+        client = _mock_client([_mock_resource_type('sites', ['2018-02-01'])])
+        get_provider_resource_types(self.cli_ctx, client, 'Microsoft.Web')
+        with open(os.path.join(self.config_dir, PROVIDER_CACHE_FILE_NAME)) as f:
+            self.assertEqual(len(json.load(f)), 1)
+
+        # a new process reads the entry from disk rather than calling the service
+        self.cache.clear()
+        client = _mock_client([])
+        result = get_provider_resource_types(self.cli_ctx, client, 'Microsoft.Web')
+        self.assertEqual(result[0].resource_type, 'sites')
+        client.providers.get.assert_not_called()
+
+    def test_provider_cache_expires(self):
+        client = _mock_client([_mock_resource_type('sites', ['2018-02-01'])])
+        get_provider_resource_types(self.cli_ctx, client, 'Microsoft.Web')
+        with mock.patch('time.time', return_value=time.time() + 61 * 60):
+            get_provider_resource_types(self.cli_ctx, client, 'Microsoft.Web')
+        self.assertEqual(client.providers.get.call_count, 2)
+
+    def test_provider_cache_disabled_with_zero_ttl(self):
+        self.cli_ctx.config.getint.return_value = 0
+        client = _mock_client([_mock_resource_type('sites', ['2018-02-01'])])
+        get_provider_resource_types(self.cli_ctx, client, 'Microsoft.Web')
+        get_provider_resource_types(self.cli_ctx, client, 'Microsoft.Web')
+        self.assertEqual(client.providers.get.call_count, 2)
+        self.assertFalse(os.path.exists(os.path.join(self.config_dir, PROVIDER_CACHE_FILE_NAME)))
+
+    def test_provider_cache_not_used_without_config_dir(self):
+        client = _mock_client([_mock_resource_type('sites', ['2018-02-01'])])
+        for cli_ctx in [None, mock.MagicMock()]:
+            get_provider_resource_types(cli_ctx, client, 'Microsoft.Web')
+            self.assertIsNone(find_provider_resource_type(cli_ctx, client, 'Microsoft.Web', 'staticSites'))
+        self.assertEqual(client.providers.get.call_count, 4)
+
+        # nor for a mocked client
+        client.config.subscription_id = mock.MagicMock()
+        get_provider_resource_types(self.cli_ctx, client, 'Microsoft.Web')
+        self.assertEqual(client.providers.get.call_count, 5)
+        self.assertEqual(os.listdir(self.config_dir), [])
+
+    def test_provider_cache_ignores_unserializable_metadata(self):
+        rt = _mock_resource_type('sites', ['2018-02-01'])
+        rt.default_api_version = mock.MagicMock()
+        client = _mock_client([rt])
+        for _ in range(2):
+            self.assertEqual(get_provider_resource_types(self.cli_ctx, client, 'Microsoft.Web')[0].resource_type,
+                             'sites')
+        self.assertEqual(client.providers.get.call_count, 1)
+
+    def test_provider_cache_refreshes_on_unknown_type(self):
+        client = _mock_client([_mock_resource_type('sites', ['2018-02-01'])])
+        get_provider_resource_types(self.cli_ctx, client, 'Microsoft.Web')
+        self.assertIsNone(find_provider_resource_type(self.cli_ctx, client, 'Microsoft.Web', 'staticSites'))
+        self.assertEqual(client.providers.get.call_count, 2)
+
+    def test_provider_cache_coalesces_concurrent_lookups(self):
+        client = _mock_client([_mock_resource_type('vaults', ['2018-02-14'])], delay=0.2)
+        results = []
+
+        def _lookup():
+            results.append(find_provider_resource_type(self.cli_ctx, client, 'Microsoft.KeyVault', 'vaults'))
+
+        threads = [threading.Thread(target=_lookup) for _ in range(8)]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+
+        self.assertEqual(client.providers.get.call_count, 1)
+        self.assertEqual(len(results), 8)
+        self.assertTrue(all(r.api_versions == ['2018-02-14'] for r in results))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,63 @@
+# --------------------------------------------------------------------------------------------
+# Copyright (c) Microsoft Corporation. All rights reserved.
+# Licensed under the MIT License. See License.txt in the project root for license information.
+# --------------------------------------------------------------------------------------------
+
+import os
+import shutil
+import tempfile
+import time
+import unittest
+
+import mock
+
+from azure.cli.core._session import SessionCache
+
+
+class _TestCache(SessionCache):
+    FILE_NAME = 'testCache.json'
+    TTL_CONFIG = ('test', 'cache_ttl')
+
+
+class TestSessionCache(unittest.TestCase):
+
+    def setUp(self):
+        self.config_dir = tempfile.mkdtemp()
+        self.cli_ctx = mock.MagicMock()
+        self.cli_ctx.config.config_dir = self.config_dir
+        self.cli_ctx.config.getint.return_value = 60
+
+    def tearDown(self):
+        shutil.rmtree(self.config_dir, ignore_errors=True)
+
+    def test_session_cache_saves_and_loads_entries(self):
+        cache = _TestCache(self.cli_ctx)
+        self.cli_ctx.config.getint.assert_called_once_with('test', 'cache_ttl', fallback=60)
+        cache._session.data['key'] = ['value', time.time()]
+        cache.save()
+
+        cache = _TestCache(self.cli_ctx)
+        value, timestamp = cache._session.get('key')
+        self.assertEqual(value, 'value')
+        self.assertTrue(cache.is_fresh(timestamp))
+        self.assertFalse(cache.is_fresh(timestamp - 61 * 60))
+
+    def test_session_cache_disabled(self):
+        self.cli_ctx.config.getint.return_value = 0
+        cache = _TestCache(self.cli_ctx)
+        self.assertEqual(cache.ttl, 0)
+        self.assertEqual(os.listdir(self.config_dir), [])
+
+    def test_session_cache_invalid_ttl(self):
+        self.cli_ctx.config.getint.side_effect = ValueError('invalid literal')
+        self.assertEqual(_TestCache(self.cli_ctx).ttl, 60)
+
+    def test_session_cache_disabled_when_file_cannot_be_loaded(self):
+        self.cli_ctx.config.config_dir = os.path.join(self.config_dir, 'missing')
+        cache = _TestCache(self.cli_ctx)
+        self.assertEqual(cache.ttl, 0)
+        cache.save()  # ignored
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -14,7 +14,7 @@ import json
 from azure.cli.core.util import \
     (get_file_json, truncate_text, shell_safe_json_parse, b64_to_hex, hash_string, random_string,
      open_page_in_browser, can_launch_browser, handle_exception, ConfiguredDefaultSetter, send_raw_request,
-     should_disable_connection_verify)
+     should_disable_connection_verify, get_max_concurrent_workers)
 
 
 class TestUtils(unittest.TestCase):
@@ -89,6 +89,17 @@ class TestUtils(unittest.TestCase):
             len(failed_strings), 0,
             'The following patterns failed: {}'.format(failed_strings))
 
+    def test_get_max_concurrent_workers(self):
+        cli_ctx = mock.MagicMock()
+        cli_ctx.config.getboolean.return_value = False
+        self.assertEqual(get_max_concurrent_workers(cli_ctx, 0, 10), 1)
+        self.assertEqual(get_max_concurrent_workers(cli_ctx, 1, 10), 1)
+        self.assertEqual(get_max_concurrent_workers(cli_ctx, 3, 10), 3)
+        self.assertEqual(get_max_concurrent_workers(cli_ctx, 30, 10), 10)
+        cli_ctx.config.getboolean.return_value = True
+        self.assertEqual(get_max_concurrent_workers(cli_ctx, 30, 10), 1)
+        cli_ctx.config.getboolean.assert_called_with('core', 'disable_concurrent_ids', False)
+
     def test_hash_string(self):
         def _run_test(length, force_lower):
             import random
@@ -324,6 +324,14 @@ def should_disable_connection_verify():
     return bool(os.environ.get(DISABLE_VERIFY_VARIABLE_NAME))
 
 
+def get_max_concurrent_workers(cli_ctx, count, max_workers):
+    """ Returns how many of `count` independent operations to run at once, up to `max_workers`. The operations run
+    one at a time when `core.disable_concurrent_ids` is set, as commands given several --ids do. """
+    if count < 2 or cli_ctx.config.getboolean('core', 'disable_concurrent_ids', False):
+        return 1
+    return min(count, max_workers)
+
+
 def poller_classes():
     from msrestazure.azure_operation import AzureOperationPoller
     from msrest.polling.poller import LROPoller
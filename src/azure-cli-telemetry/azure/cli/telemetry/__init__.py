@@ -6,6 +6,7 @@
 import sys
 import os
 import subprocess
+import time
 
 try:
     import portalocker
@@ -57,7 +58,47 @@ def _start(config_dir):
     logger.info('Return from creating process')
 
 
+def upload(config_dir, time_budget=None):
+    """ Upload the spooled telemetry records in batches. The upload is skipped when another process is uploading. The
+    time_budget, in seconds, bounds the whole upload so that the caller's latency is limited: the spool files which
+    aren't read by then are left for the next upload and the records which aren't sent by then are dropped. """
+    begin = time.time()
+    deadline = begin + time_budget if time_budget else None
+
+    from azure.cli.telemetry.components.telemetry_note import TelemetryNote
+    from azure.cli.telemetry.components.records_collection import RecordsCollection
+    from azure.cli.telemetry.components.telemetry_client import CliTelemetryClient
+    from azure.cli.telemetry.components.telemetry_logging import get_logger
+
+    logger = get_logger('upload')
+    try:
+        with TelemetryNote(config_dir) as telemetry_note:
+            telemetry_note.touch()
+
+            collection = RecordsCollection(telemetry_note.get_last_sent(), config_dir)
+            collection.snapshot_and_read(deadline=deadline)
+
+            client = CliTelemetryClient(deadline=deadline)
+            for each in collection:
+                if deadline and time.time() >= deadline:
+                    logger.warning('Skip the rest of the records. The upload time budget is exhausted.')
+                    break
+                client.add(each, flush=True)
+            client.flush(force=True)
+
+            telemetry_note.update_telemetry_note(collection.next_send)
+    except portalocker.AlreadyLocked:
+        # another upload process is running.
+        logger.info('Lock out from note file under %s which means another process is running.', config_dir)
+        return False
+
+    logger.info('Finish uploading telemetry in %f seconds.', time.time() - begin)
+    return True
+
+
 def save(config_dir, payload):
+    """ Spool the payload. The upload process is only started once a batch of records is ready so that most commands
+    only pay for appending a line to the spool and never wait for the upload. """
     from azure.cli.telemetry.util import should_upload
     from azure.cli.telemetry.components.telemetry_logging import get_logger
 
@@ -69,10 +110,8 @@ def save(config_dir, payload):
 
 
 def main():
+    from azure.cli.telemetry.const import UPLOAD_TIME_BUDGET
     from azure.cli.telemetry.util import should_upload
-    from azure.cli.telemetry.components.telemetry_note import TelemetryNote
-    from azure.cli.telemetry.components.records_collection import RecordsCollection
-    from azure.cli.telemetry.components.telemetry_client import CliTelemetryClient
     from azure.cli.telemetry.components.telemetry_logging import config_logging_for_upload, get_logger
 
     try:
@@ -87,22 +126,7 @@ def main():
             sys.exit(0)
 
         try:
-            with TelemetryNote(config_dir) as telemetry_note:
-                telemetry_note.touch()
-
-                collection = RecordsCollection(telemetry_note.get_last_sent(), config_dir)
-                collection.snapshot_and_read()
-
-                client = CliTelemetryClient()
-                for each in collection:
-                    client.add(each, flush=True)
-                client.flush(force=True)
-
-                telemetry_note.update_telemetry_note(collection.next_send)
-        except portalocker.AlreadyLocked:
-            # another upload process is running.
-            logger.info('Lock out from note file under %s which means another process is running. Exit 0.', config_dir)
-            sys.exit(0)
+            upload(config_dir, time_budget=UPLOAD_TIME_BUDGET)
         except IOError as err:
             logger.warning('Unexpected IO Error %s. Exit 1.', err)
             sys.exit(1)
@@ -8,6 +8,7 @@ import os
 import shutil
 import stat
 import tempfile
+import time
 
 
 class RecordsCollection(object):
@@ -27,16 +28,18 @@ class RecordsCollection(object):
     def next_send(self):
         return self._next_send
 
-    def snapshot_and_read(self):
-        """ Scan the telemetry cache files and move all the rotated files to a temp directory. """
-        from azure.cli.telemetry.const import TELEMETRY_CACHE_DIR
+    def snapshot_and_read(self, deadline=None):
+        """ Scan the telemetry cache files and move all the rotated files to a temp directory. The files which aren't
+        read by the deadline are left for the next upload. """
+        from azure.cli.telemetry.const import TELEMETRY_CACHE_DIR, TELEMETRY_SPOOL_NAME
 
         folder = os.path.join(self._config_dir, TELEMETRY_CACHE_DIR)
         if not os.path.isdir(folder):
             return
 
         # sort the cache files base on their last modification time.
-        candidates = [(fn, os.stat(os.path.join(folder, fn))) for fn in os.listdir(folder) if fn != 'cache']
+        candidates = [(fn, os.stat(os.path.join(folder, fn)))
+                      for fn in os.listdir(folder) if fn != TELEMETRY_SPOOL_NAME]
         candidates = [(fn, file_stat) for fn, file_stat in candidates if stat.S_ISREG(file_stat.st_mode)]
         candidates.sort(key=lambda pair: pair[1].st_mtime, reverse=True)  # move the newer cache file first
 
@@ -49,6 +52,9 @@ class RecordsCollection(object):
         self._logger.info('Create temp folder %s', tmp)
 
         for each in candidates:
+            if deadline and time.time() >= deadline:
+                self._logger.info('Out of time. Leave the rest of the cache files for the next upload.')
+                break
             if stat.S_ISREG(each[1].st_mode):
                 try:
                     # Platform question: if this op is atom
@@ -57,9 +63,8 @@ class RecordsCollection(object):
                 except IOError as err:
                     self._logger.warning('Fail to move file from %s to %s. Reason: %s.',
                                          os.path.join(folder, each[0]), os.path.join(tmp, each[0]), err)
-
-        for each in os.listdir(tmp):
-            self._read_file(os.path.join(tmp, each))
+                else:
+                    self._read_file(os.path.join(tmp, each[0]))
 
         shutil.rmtree(tmp,
                       ignore_errors=True,
@@ -80,10 +85,10 @@ class RecordsCollection(object):
     def _add_record(self, content_line):
         """ Parse a line in the recording file. """
         try:
-            time, content = content_line.split(',', 1)
-            time = datetime.datetime.strptime(time, '%Y-%m-%dT%H:%M:%S')
-            if time > self._last_sent:
-                self._next_send = max(self._next_send, time)
+            timestamp, content = content_line.split(',', 1)
+            timestamp = datetime.datetime.strptime(timestamp, '%Y-%m-%dT%H:%M:%S')
+            if timestamp > self._last_sent:
+                self._next_send = max(self._next_send, timestamp)
                 self._records.append(content)
         except ValueError as err:
             self._logger.warning("Fail to parse a line of the record %s. Error %s.", content_line, err)
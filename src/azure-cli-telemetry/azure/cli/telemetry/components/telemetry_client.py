@@ -4,6 +4,7 @@
 # --------------------------------------------------------------------------------------------
 
 import json
+import time
 import datetime
 import six
 
@@ -21,13 +22,14 @@ except ImportError:
 
 
 class CliTelemetryClient(object):
-    def __init__(self, batch=100, sender=None):
+    def __init__(self, batch=100, sender=None, deadline=None):
+        """ The deadline, a time.time() value, bounds the time spent in uploading the events. """
         from azure.cli.telemetry.components.telemetry_logging import get_logger
 
         self._clients = dict()
         self._counter = 0
         self._batch = batch
-        self._sender = sender or _NoRetrySender
+        self._sender = sender or (lambda: _NoRetrySender(deadline=deadline))
         self._logger = get_logger('client')
 
     def add(self, raw, flush=False, force=False):
@@ -91,14 +93,24 @@ class CliTelemetryClient(object):
 
 
 class _NoRetrySender(SynchronousSender):
-    def __init__(self):
+    def __init__(self, timeout=10, deadline=None):
         from azure.cli.telemetry.components.telemetry_logging import get_logger
 
         super(_NoRetrySender, self).__init__()
         self._logger = get_logger('sender')
+        self._timeout = timeout
+        self._deadline = deadline
 
     def send(self, data_to_send):
         """ Override the default resend mechanism in SenderBase. Stop resend when it fails."""
+        timeout = self._timeout
+        if self._deadline is not None:
+            timeout = min(timeout, self._deadline - time.time())
+            if timeout <= 0:
+                self._logger.warning('Skip uploading %d events. The upload time budget is exhausted.',
+                                     len(data_to_send))
+                return
+
         request_payload = json.dumps([a.write() for a in data_to_send])
 
         content = bytearray(request_payload, 'utf-8')
@@ -107,7 +119,7 @@ class _NoRetrySender(SynchronousSender):
                                         {'Accept': 'application/json',
                                          'Content-Type': 'application/json; charset=utf-8'})
         try:
-            http_client_t.urlopen(request, timeout=10)
+            http_client_t.urlopen(request, timeout=timeout)
             self._logger.info('Sending %d bytes', len(content))
         except HTTPError as e:
             self._logger.error('Upload failed. HTTPError: %s', e)
@@ -6,6 +6,12 @@
 from datetime import timedelta
 
 MANDATORY_WAIT_PERIOD = timedelta(minutes=10)
+MAX_UPLOAD_PERIOD = timedelta(days=1)
+UPLOAD_TIME_BUDGET = 60  # seconds
+
+TELEMETRY_SPOOL_NAME = 'cache'
+TELEMETRY_SPOOL_MAX_SIZE = 128 * 1024
+TELEMETRY_SPOOL_MAX_FILES = 100
 
 TELEMETRY_CACHE_DIR = 'telemetry'
 TELEMETRY_NOTE_NAME = 'telemetry.txt'
@@ -7,6 +7,7 @@ import datetime
 import os
 import shutil
 import tempfile
+import time
 import unittest
 
 from azure.cli.telemetry.const import TELEMETRY_CACHE_DIR
@@ -49,6 +50,14 @@ class TestRecordsCollection(unittest.TestCase):
         self.assert_cache_files_count(1)
         self.assertEqual(453, len([r for r in collection]))
 
+    def test_create_records_collection_past_deadline(self):
+        collection = RecordsCollection(datetime.datetime.min, self.work_dir)
+        collection.snapshot_and_read(deadline=time.time() - 1)
+
+        # the cache files are left for the next upload
+        self.assert_cache_files_count(self.TEST_CACHE_FILE_COUNT)
+        self.assertEqual(0, len([r for r in collection]))
+
     def test_create_records_collection_against_missing_config_folder(self):
         collection = RecordsCollection(datetime.datetime.min, tempfile.mktemp())
         self.assertEqual(0, len([r for r in collection]))
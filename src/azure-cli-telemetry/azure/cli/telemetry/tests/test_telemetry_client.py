@@ -6,6 +6,7 @@
 import json
 import mock
 import os
+import time
 import unittest
 
 from applicationinsights.channel import SynchronousSender
@@ -116,6 +117,23 @@ class TestNoRetrySender(unittest.TestCase):
         self.assertEqual('UserTask', data['data']['baseData']['properties']['Reserved.DataModel.EntityType'])
         self.assertEqual('azurecli', data['data']['baseData']['properties']['Reserved.DataModel.ProductName'])
 
+    def test_limited_retry_sender_deadline(self):
+        mock_url_open = mock.Mock()
+
+        with mock.patch.object(http_client_t, 'urlopen', mock_url_open):
+            sender = _NoRetrySender(deadline=time.time() + 2)
+            sender.send(self.sample_data[0])
+
+            _, kwargs = mock_url_open.call_args
+            self.assertGreater(kwargs['timeout'], 0)
+            self.assertLessEqual(kwargs['timeout'], 2)
+
+            # nothing is sent once the upload time budget is exhausted
+            sender = _NoRetrySender(deadline=time.time() - 1)
+            sender.send(self.sample_data[0])
+
+        mock_url_open.assert_called_once()
+
     def test_limited_retry_sender_http_error(self):
         mock_url_open = mock.Mock()
         mock_url_open.side_effect = HTTPError('', 500, 'expected', [], None)
@@ -0,0 +1,100 @@
+# --------------------------------------------------------------------------------------------
+# Copyright (c) Microsoft Corporation. All rights reserved.
+# Licensed under the MIT License. See License.txt in the project root for license information.
+# --------------------------------------------------------------------------------------------
+
+import datetime
+import os
+import shutil
+import tempfile
+import time
+import unittest
+
+import mock
+
+from azure.cli.telemetry import save
+from azure.cli.telemetry.const import TELEMETRY_CACHE_DIR, TELEMETRY_NOTE_NAME, TELEMETRY_SPOOL_NAME
+from azure.cli.telemetry.components.records_collection import RecordsCollection
+from azure.cli.telemetry.util import save_payload, should_upload
+
+SAMPLE_PAYLOAD = '{"c4395b75-49cc-422c-bc95-c7d51aef5d46":[{"name":"azurecli/command","properties":{}}]}'
+
+
+class TestTelemetryUtil(unittest.TestCase):
+    def setUp(self):
+        self.work_dir = tempfile.mkdtemp()
+        self.cache_dir = os.path.join(self.work_dir, TELEMETRY_CACHE_DIR)
+        self.note_path = os.path.join(self.work_dir, TELEMETRY_NOTE_NAME)
+
+    def tearDown(self):
+        shutil.rmtree(self.work_dir, ignore_errors=True)
+
+    def test_save_payload_appends_records_to_spool(self):
+        self.assertFalse(save_payload(self.work_dir, None))
+        for _ in range(3):
+            self.assertTrue(save_payload(self.work_dir, SAMPLE_PAYLOAD))
+
+        self.assertEqual([TELEMETRY_SPOOL_NAME], os.listdir(self.cache_dir))
+        with open(os.path.join(self.cache_dir, TELEMETRY_SPOOL_NAME)) as fh:
+            lines = fh.read().splitlines()
+        self.assertEqual(3, len(lines))
+        self.assertTrue(all(line.endswith(',' + SAMPLE_PAYLOAD) for line in lines))
+
+    @mock.patch('azure.cli.telemetry.util.TELEMETRY_SPOOL_MAX_FILES', 2)
+    @mock.patch('azure.cli.telemetry.util.TELEMETRY_SPOOL_MAX_SIZE', len(SAMPLE_PAYLOAD) * 2)
+    def test_save_payload_rotates_full_spool(self):
+        for _ in range(7):
+            save_payload(self.work_dir, SAMPLE_PAYLOAD)
+
+        # every two records fill a spool file; only the latest full spool files are kept
+        files = os.listdir(self.cache_dir)
+        self.assertEqual(3, len(files))
+        self.assertIn(TELEMETRY_SPOOL_NAME, files)
+
+        collection = RecordsCollection(datetime.datetime.min, self.work_dir)
+        collection.snapshot_and_read()
+        self.assertEqual(4, len(list(collection)))
+        self.assertEqual([TELEMETRY_SPOOL_NAME], os.listdir(self.cache_dir))
+
+    def test_should_upload_waits_for_full_batch(self):
+        self.assertTrue(should_upload(self.work_dir))
+
+        save_payload(self.work_dir, SAMPLE_PAYLOAD)
+        with open(self.note_path, 'w'):
+            pass
+        self.assertFalse(should_upload(self.work_dir))
+
+        # out of the mandatory wait period, but the spool is not full
+        self._set_note_age(datetime.timedelta(hours=1))
+        self.assertFalse(should_upload(self.work_dir))
+
+        self._set_note_age(datetime.timedelta(days=2))
+        self.assertTrue(should_upload(self.work_dir))
+
+        self._set_note_age(datetime.timedelta(hours=1))
+        with open(os.path.join(self.cache_dir, TELEMETRY_SPOOL_NAME + '.1'), 'w'):
+            pass
+        self.assertTrue(should_upload(self.work_dir))
+
+    @mock.patch('azure.cli.telemetry._start')
+    @mock.patch('azure.cli.telemetry.upload')
+    def test_save_starts_upload_process_for_full_batch(self, upload, start):
+        with open(self.note_path, 'w'):
+            pass
+        save(self.work_dir, SAMPLE_PAYLOAD)
+        start.assert_not_called()
+
+        with open(os.path.join(self.cache_dir, TELEMETRY_SPOOL_NAME + '.1'), 'w'):
+            pass
+        self._set_note_age(datetime.timedelta(minutes=20))
+        save(self.work_dir, SAMPLE_PAYLOAD)
+        start.assert_called_once_with(self.work_dir)
+        upload.assert_not_called()
+
+    def _set_note_age(self, age):
+        mtime = time.time() - age.total_seconds()
+        os.utime(self.note_path, (mtime, mtime))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -5,19 +5,22 @@
 
 import os
 import stat
+import uuid
 import logging
-import logging.handlers
 from datetime import datetime
 
-from azure.cli.telemetry.const import TELEMETRY_NOTE_NAME, MANDATORY_WAIT_PERIOD
+from azure.cli.telemetry.const import (TELEMETRY_NOTE_NAME, TELEMETRY_CACHE_DIR, TELEMETRY_SPOOL_NAME,
+                                       TELEMETRY_SPOOL_MAX_SIZE, TELEMETRY_SPOOL_MAX_FILES, MANDATORY_WAIT_PERIOD,
+                                       MAX_UPLOAD_PERIOD)
 
 
 def should_upload(config_dir):
-    """Returns True if it is the right moment to add telemetry.
-    Before the client request a telemetry add process, it can invoke this method to test if it is the right moment.
-    The conditions are:
+    """Returns True if it is the right moment to upload telemetry.
+    Before the client request a telemetry upload, it can invoke this method to test if it is the right moment.
+    The records are uploaded in batches so that most of the commands only append to the spool. The conditions are:
         1. The telemetry.txt file doesn't exist; OR
-        2. The telemetry.txt file is a regular file AND there have been enough time passed since last add.
+        2. The telemetry.txt file is a regular file AND there have been enough time passed since last upload AND
+           either a full spool file is waiting to be uploaded or the last upload is older than a day.
     """
     logger = logging.getLogger('telemetry.check')
 
@@ -37,42 +40,77 @@ def should_upload(config_dir):
                        telemetry_note_path, modify_time, MANDATORY_WAIT_PERIOD.total_seconds())
         return False
 
-    logger.info('Returns Positive.')
-    return True
+    if _get_full_spool_files(os.path.join(config_dir, TELEMETRY_CACHE_DIR)):
+        logger.info('Positive: Full spool files are waiting to be uploaded.')
+        return True
+
+    if datetime.now() - modify_time >= MAX_UPLOAD_PERIOD:
+        logger.info('Positive: The last upload was at %s.', modify_time)
+        return True
+
+    logger.info('Negative: The spool is not full yet.')
+    return False
 
 
 def save_payload(config_dir, payload):
     """
-    Save a telemetry payload to the telemetry cache directory under the given configuration directory
+    Append a telemetry payload to the spool file in the telemetry cache directory under the given configuration
+    directory. Each record is a line of '<timestamp>,<payload>' written with a single append so that concurrent
+    commands don't interleave their records. Once the spool file is full it is set aside for the next upload.
     """
     logger = logging.getLogger('telemetry.save')
 
-    if payload:
-        cache_saver = _create_rotate_file_logger(config_dir)
-        if cache_saver:
-            cache_saver.info(payload)
-            logger.info('Save telemetry record of length %d in cache', len(payload))
+    if not payload:
+        return False
 
-            return True
-    return False
+    spool_path = os.path.join(config_dir, TELEMETRY_CACHE_DIR, TELEMETRY_SPOOL_NAME)
+    record = '{},{}\n'.format(datetime.now().strftime('%Y-%m-%dT%H:%M:%S'), payload).encode('utf-8')
+    try:
+        if not os.path.exists(os.path.dirname(spool_path)):
+            os.makedirs(os.path.dirname(spool_path))
+
+        fd = os.open(spool_path, os.O_WRONLY | os.O_APPEND | os.O_CREAT, 0o600)
+        try:
+            os.write(fd, record)
+            size = os.fstat(fd).st_size
+        finally:
+            os.close(fd)
+    except (IOError, OSError) as err:
+        logger.warning('Fail to save telemetry record to %s. Reason %s.', spool_path, err)
+        return False
+
+    logger.info('Save telemetry record of length %d in cache', len(payload))
+    if size >= TELEMETRY_SPOOL_MAX_SIZE:
+        _rotate_spool_file(spool_path)
+    return True
 
 
-def _create_rotate_file_logger(log_dir):
-    cache_name = os.path.join(log_dir, 'telemetry', 'cache')
+def _get_full_spool_files(folder):
     try:
-        if not os.path.exists(os.path.dirname(cache_name)):
-            os.makedirs(os.path.dirname(cache_name))
+        return [fn for fn in os.listdir(folder) if fn != TELEMETRY_SPOOL_NAME]
+    except OSError:
+        return []
 
-        handler = logging.handlers.RotatingFileHandler(cache_name, maxBytes=128 * 1024, backupCount=100)
-        handler.setLevel(logging.INFO)
-        handler.setFormatter(logging.Formatter(fmt='%(asctime)s,%(message)s',
-                                               datefmt='%Y-%m-%dT%H:%M:%S'))
 
-        logger = logging.Logger(name='telemetry_cache', level=logging.INFO)
-        logger.addHandler(handler)
-        return logger
+def _rotate_spool_file(spool_path):
+    """ Set the full spool file aside under a unique name. The oldest spool files are discarded when there are more
+    than TELEMETRY_SPOOL_MAX_FILES of them, in case the records can't be uploaded. """
+    logger = logging.getLogger('telemetry.save')
+
+    folder = os.path.dirname(spool_path)
+    try:
+        os.rename(spool_path, '{}.{}'.format(spool_path, uuid.uuid4().hex))
     except OSError as err:
-        logging.getLogger('telemetry.save').warning('Fail to create telemetry cache directory for %s. Reason %s.',
-                                                    cache_name,
-                                                    err)
-        return None
+        # another command has rotated the spool file already
+        logger.info('Fail to rotate the spool file %s. Reason %s.', spool_path, err)
+        return
+
+    full_spool_files = [os.path.join(folder, fn) for fn in _get_full_spool_files(folder)]
+    if len(full_spool_files) > TELEMETRY_SPOOL_MAX_FILES:
+        try:
+            full_spool_files.sort(key=os.path.getmtime)
+            for each in full_spool_files[:-TELEMETRY_SPOOL_MAX_FILES]:
+                os.remove(each)
+        except OSError as err:
+            # the spool files are being uploaded
+            logger.info('Fail to discard the oldest spool files. Reason %s.', err)
@@ -87,3 +87,30 @@ def patch_long_run_operation_delay(unit_test):
     mock_in_unit_test(unit_test,
                       'azure.cli.core.commands.LongRunningOperation._delay',
                       _shortcut_long_run_operation)
+
+
+def patch_provider_metadata_cache(unit_test):
+    def _disable_provider_cache(*args, **kwargs):  # pylint: disable=unused-argument
+        return 0
+
+    # recordings must contain every provider lookup, and playback must not depend on lookups cached by other tests
+    mock_in_unit_test(unit_test,
+                      'azure.cli.core._provider_cache._get_cache_ttl',
+                      _disable_provider_cache)
+
+
+def patch_command_lookup_caches(unit_test):
+    try:
+        import unittest.mock as mock
+    except ImportError:
+        import mock
+
+    # the lookups and arguments command modules cache in the config directory must be in the recordings, and playback
+    # must not depend on what other tests cached
+    mp = mock.patch.dict('os.environ', {'AZURE_BATCH_ARGUMENT_CACHE': 'false',
+                                        'AZURE_COSMOSDB_ACCOUNT_CACHE_TTL': '0',
+                                        'AZURE_KEYVAULT_VAULT_CACHE_TTL': '0',
+                                        'AZURE_ROLE_LOOKUP_CACHE_TTL': '0',
+                                        'AZURE_SQL_CAPABILITIES_CACHE_TTL': '0'})
+    mp.start()
+    unit_test.addCleanup(mp.stop)
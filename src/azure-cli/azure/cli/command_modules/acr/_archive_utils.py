@@ -7,7 +7,13 @@ import tarfile
 import os
 import re
 import codecs
-from io import open
+import hashlib
+import json
+import multiprocessing
+import zlib
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from io import open, BytesIO
 import requests
 from knack.log import get_logger
 from knack.util import CLIError
@@ -18,6 +24,13 @@ from ._constants import TASK_VALID_VSTS_URLS
 
 logger = get_logger(__name__)
 
+_PACK_BLOCK_SIZE = 1024 * 1024
+_PACK_COMPRESS_LEVEL = 9
+_PACK_MAX_WORKERS = 8
+_SOURCE_CACHE_VERSION = 1
+# characters in a .dockerignore rule which don't stand for themselves in its pattern
+_WILDCARD_REGEX = re.compile(r'[*?\[\]\\(){}+|^$]')
+
 
 def upload_source_code(client,
                        registry_name,
@@ -25,11 +38,13 @@ def upload_source_code(client,
                        source_location,
                        tar_file_path,
                        docker_file_path,
-                       docker_file_in_tar):
+                       docker_file_in_tar,
+                       cache_dir=None):
     _pack_source_code(source_location,
                       tar_file_path,
                       docker_file_path,
-                      docker_file_in_tar)
+                      docker_file_in_tar,
+                      cache_dir=cache_dir)
 
     size = os.path.getsize(tar_file_path)
     unit = 'GiB'
@@ -65,54 +80,337 @@ def upload_source_code(client,
     return relative_path
 
 
-def _pack_source_code(source_location, tar_file_path, docker_file_path, docker_file_in_tar):
-    logger.warning("Packing source code into tar to upload...")
+def get_source_cache_dir(cli_ctx):
+    """ Returns the directory caching packed source contexts, or None when `acr.source_cache` is not enabled. """
+    if not cli_ctx.config.getboolean('acr', 'source_cache', False):
+        return None
+    return os.path.join(cli_ctx.config.config_dir, 'acr', 'sourcecache')
 
-    ignore_list, ignore_list_size = _load_dockerignore_file(source_location)
-    common_vcs_ignore_list = {'.git', '.gitignore', '.bzr', 'bzrignore', '.hg', '.hgignore', '.svn'}
 
-    def _ignore_check(tarinfo, parent_ignored, parent_matching_rule_index):
+def _pack_source_code(source_location, tar_file_path, docker_file_path, docker_file_in_tar, cache_dir=None):
+    logger.warning("Packing source code into tar to upload...")
+
+    ignore_list, _ = _load_dockerignore_file(source_location)
+    matcher = IgnoreMatcher(ignore_list)
+    cache = _SourceCache(cache_dir, source_location) if cache_dir else None
+
+    with open(tar_file_path, "wb") as output:
+        with _ParallelGzipWriter(output) as writer:
+            tar = tarfile.open(fileobj=writer, mode="w")
+            # need to set arcname to empty string as the archive root path
+            entries = list(_iter_source_entries(tar, source_location, "", matcher))
+
+            fingerprint = cache.fingerprint(entries) if cache else None
+            if cache and cache.restore(fingerprint, writer):
+                logger.info("Source code in '%s' is unchanged, reusing the cached archive.", source_location)
+                tar.offset = writer.tell()
+                cache = None
+            else:
+                for name, tarinfo in entries:
+                    if tarinfo.isreg():
+                        with open(name, "rb") as f:
+                            tar.addfile(tarinfo, f)
+                    else:
+                        tar.addfile(tarinfo)
+                # end the gzip member here, so the packed context can be reused without the Dockerfile
+                writer.flush()
+                context_size = writer.tell(), writer.compressed_size
+
+            # Add the Dockerfile if it's specified.
+            # In the case of run, there will be no Dockerfile.
+            if docker_file_path:
+                docker_file_tarinfo = tar.gettarinfo(
+                    docker_file_path, docker_file_in_tar)
+                with open(docker_file_path, "rb") as f:
+                    tar.addfile(docker_file_tarinfo, f)
+            tar.close()
+
+    if cache:
+        cache.save(fingerprint, tar_file_path, *context_size)
+
+
+def _iter_source_entries(tar, name, arcname, matcher):
+    """
+    Walks the source directory and yields (path, tarinfo) for every item which is not ignored. Directories whose
+    items are all ignored are not walked.
+    """
+    stack = [(name, arcname, False, matcher.rule_count)]
+    while stack:
+        name, arcname, parent_ignored, parent_matching_rule_index = stack.pop()
+
+        # create a TarInfo object from the file
+        tarinfo = tar.gettarinfo(name, arcname)
+        if tarinfo is None:
+            raise CLIError("tarfile: unsupported type {}".format(name))
+
+        # check if the file/dir is ignored
+        ignored, matching_rule_index = matcher.check(
+            tarinfo.name, parent_ignored, parent_matching_rule_index)
+        if not ignored:
+            yield name, tarinfo
+
+        # even the dir is ignored, its child items can still be included by exception rules
+        if tarinfo.isdir() and not matcher.is_pruned(tarinfo.name, ignored, matching_rule_index):
+            # push in reverse, so the items are archived in name order
+            for f in sorted(os.listdir(name), reverse=True):
+                stack.append((os.path.join(name, f), os.path.join(arcname, f), ignored, matching_rule_index))
+
+
+class IgnoreMatcher(object):
+    """
+    Matches archive names against the .dockerignore rules with a single compiled expression.
+
+    Rules are ordered from the highest priority. An item inherits the decision of its parent directory, unless
+    it matches a rule with a higher priority than the rule which decided for the parent.
+    """
+    COMMON_VCS_IGNORE_LIST = {'.git', '.gitignore', '.bzr', 'bzrignore', '.hg', '.hgignore', '.svn'}
+
+    def __init__(self, ignore_list):
+        self.rules = ignore_list or []
+        self.rule_count = len(self.rules)
+        # the names matched by an exception rule all start with the text before its first wildcard
+        self._exceptions = [(index, _WILDCARD_REGEX.split(item.rule[1:], 1)[0])
+                            for index, item in enumerate(self.rules) if not item.ignore]
+        self._regex = None
+        if self.rules:
+            try:
+                self._regex = re.compile('|'.join(
+                    '(?P<r{}>{})'.format(index, item.pattern) for index, item in enumerate(self.rules)))
+            except (re.error, AssertionError, OverflowError):
+                # too many groups for this version of Python, match the rules one by one
+                logger.debug(".dockerignore: unable to combine the rules, matching them separately.")
+
+    def _find_matching_rule_index(self, name, parent_matching_rule_index):
+        if self._regex:
+            match = self._regex.match(name)
+            # the first alternative which matches is the rule with the highest priority
+            return int(match.lastgroup[1:]) if match else None
+        for index, item in enumerate(self.rules[:parent_matching_rule_index]):
+            if re.match(item.pattern, name):
+                return index
+        return None
+
+    def check(self, name, parent_ignored, parent_matching_rule_index):
         # ignore common vcs dir or file
-        if tarinfo.name in common_vcs_ignore_list:
-            logger.warning("Excluding '%s' based on default ignore rules", tarinfo.name)
+        if name in self.COMMON_VCS_IGNORE_LIST:
+            logger.warning("Excluding '%s' based on default ignore rules", name)
             return True, parent_matching_rule_index
 
-        if ignore_list is None:
-            # if .dockerignore doesn't exists, inherit from parent
-            # eg, it will ignore the files under .git folder.
-            return parent_ignored, parent_matching_rule_index
+        index = self._find_matching_rule_index(name, parent_matching_rule_index)
+        # rules whose priorities are lower than the parent matching rule don't apply,
+        # at this point, current item should just inherit from parent
+        if index is not None and index < parent_matching_rule_index:
+            item = self.rules[index]
+            logger.debug(".dockerignore: rule '%s' matches '%s'.", item.rule, name)
+            return item.ignore, index
 
-        for index, item in enumerate(ignore_list):
-            # stop checking the remaining rules whose priorities are lower than the parent matching rule
-            # at this point, current item should just inherit from parent
-            if index >= parent_matching_rule_index:
-                break
-            if re.match(item.pattern, tarinfo.name):
-                logger.debug(".dockerignore: rule '%s' matches '%s'.",
-                             item.rule, tarinfo.name)
-                return item.ignore, index
-
-        logger.debug(".dockerignore: no rule for '%s'. parent ignore '%s'",
-                     tarinfo.name, parent_ignored)
+        logger.debug(".dockerignore: no rule for '%s'. parent ignore '%s'", name, parent_ignored)
         # inherit from parent
         return parent_ignored, parent_matching_rule_index
 
-    with tarfile.open(tar_file_path, "w:gz") as tar:
-        # need to set arcname to empty string as the archive root path
-        _archive_file_recursively(tar,
-                                  source_location,
-                                  arcname="",
-                                  parent_ignored=False,
-                                  parent_matching_rule_index=ignore_list_size,
-                                  ignore_check=_ignore_check)
+    def is_pruned(self, name, ignored, matching_rule_index):
+        """
+        Whether every item under an ignored directory is ignored as well, so it doesn't need to be walked. Items
+        can only be re-included by exception rules with a higher priority than the directory's rule, which could
+        match names under the directory.
+        """
+        if not ignored:
+            return False
+        dir_prefix = name + '/' if name else ''
+        return not any(index < matching_rule_index and (prefix.startswith(dir_prefix) or
+                                                        dir_prefix.startswith(prefix))
+                       for index, prefix in self._exceptions)
+
+
+def _compress_block(block, level):
+    # wbits of 31 writes a gzip header and trailer around the deflate stream
+    compressor = zlib.compressobj(level, zlib.DEFLATED, 31)
+    return compressor.compress(block) + compressor.flush()
+
+
+class _BlockCompressor(object):
+    """
+    Gzips blocks on a thread pool. zlib releases the GIL while compressing, so blocks are compressed in parallel.
+    The compressed blocks are handed out in the order they were submitted.
+    """
+
+    def __init__(self, level, max_workers):
+        self._level = level
+        self._executor = ThreadPoolExecutor(max_workers=max_workers)
+        self._pending = deque()
+        # bound the memory held by blocks waiting to be written
+        self._max_pending = max_workers * 2
+
+    def submit(self, block):
+        """ Queues a block. Returns the compressed blocks which must be written before more are queued. """
+        self._pending.append(self._executor.submit(_compress_block, block, self._level))
+        done = []
+        while len(self._pending) > self._max_pending:
+            done.append(self._pending.popleft().result())
+        return done
+
+    def drain(self):
+        """ Yields the compressed blocks of everything submitted so far. """
+        while self._pending:
+            yield self._pending.popleft().result()
+
+    def shutdown(self):
+        self._executor.shutdown()
+
+
+class _ParallelGzipWriter(object):
+    """
+    A write-only file object which gzips data in blocks on a thread pool.
+
+    Each block is written as a separate gzip member, in order. A sequence of members is a valid gzip file, so
+    blocks are compressed in parallel while the next ones are read.
+    """
+
+    def __init__(self, fileobj, block_size=_PACK_BLOCK_SIZE, level=_PACK_COMPRESS_LEVEL, max_workers=None):
+        self._fileobj = fileobj
+        self._block_size = block_size
+        self._compressor = _BlockCompressor(level, max_workers or min(_PACK_MAX_WORKERS, multiprocessing.cpu_count()))
+        self._buffer = BytesIO()
+        self._position = 0
+        self.compressed_size = 0
+
+    def tell(self):
+        """ The number of uncompressed bytes written """
+        return self._position
+
+    def write(self, data):
+        self._buffer.write(data)
+        self._position += len(data)
+        if self._buffer.tell() >= self._block_size:
+            self._submit()
+
+    def _submit(self):
+        if not self._buffer.tell():
+            return
+        block = self._buffer.getvalue()
+        self._buffer = BytesIO()
+        for data in self._compressor.submit(block):
+            self._write_compressed(data)
+
+    def _write_compressed(self, data):
+        self._fileobj.write(data)
+        self.compressed_size += len(data)
+
+    def flush(self):
+        """ Ends the current gzip member and writes out all data compressed so far. """
+        self._submit()
+        for data in self._compressor.drain():
+            self._write_compressed(data)
+        self._fileobj.flush()
+
+    def write_members(self, fileobj, size):
+        """ Copies gzip members from `fileobj`, which hold `size` bytes of uncompressed data. """
+        self.flush()
+        while True:
+            data = fileobj.read(self._block_size)
+            if not data:
+                break
+            self._write_compressed(data)
+        self._position += size
 
-        # Add the Dockerfile if it's specified.
-        # In the case of run, there will be no Dockerfile.
-        if docker_file_path:
-            docker_file_tarinfo = tar.gettarinfo(
-                docker_file_path, docker_file_in_tar)
-            with open(docker_file_path, "rb") as f:
-                tar.addfile(docker_file_tarinfo, f)
+    def close(self):
+        try:
+            self.flush()
+        finally:
+            self._compressor.shutdown()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        if exc_type:
+            self._compressor.shutdown()
+        else:
+            self.close()
+
+
+class _SourceCache(object):
+    """
+    Keeps the compressed archive of a source directory, next to a fingerprint of the names, sizes, modes and
+    modification times of the items it contains. If the fingerprint is unchanged on the next pack, the
+    archive is reused and none of the files are read. Only the archives of the MAX_ARCHIVES most recently packed
+    source directories are kept.
+    """
+    MAX_ARCHIVES = 3
+
+    def __init__(self, cache_dir, source_location):
+        key = hashlib.sha256(os.path.abspath(source_location).encode('utf-8')).hexdigest()
+        self.cache_dir = cache_dir
+        self.archive_path = os.path.join(cache_dir, '{}.tar.gz'.format(key))
+        self.metadata_path = os.path.join(cache_dir, '{}.json'.format(key))
+
+    @staticmethod
+    def fingerprint(entries):
+        digest = hashlib.sha256()
+        for name, tarinfo in entries:
+            mtime = os.lstat(name).st_mtime if tarinfo.isreg() else tarinfo.mtime
+            digest.update(repr((tarinfo.name, tarinfo.type, tarinfo.mode, tarinfo.size, mtime, tarinfo.linkname,
+                                tarinfo.uid, tarinfo.gid, tarinfo.uname, tarinfo.gname)).encode('utf-8'))
+        return '{}:{}'.format(_SOURCE_CACHE_VERSION, digest.hexdigest())
+
+    def restore(self, fingerprint, writer):
+        try:
+            with open(self.metadata_path, 'rb') as f:
+                metadata = json.loads(f.read().decode('utf-8'))
+            if metadata.get('fingerprint') != fingerprint or \
+                    os.path.getsize(self.archive_path) != metadata['compressedSize']:
+                return False
+            archive = open(self.archive_path, 'rb')
+        except (OSError, IOError, ValueError, KeyError) as ex:
+            logger.debug("Unable to use the cached source archive: %s", ex)
+            return False
+        with archive:
+            writer.write_members(archive, metadata['size'])
+        try:
+            # the modification time of the metadata tells the most recently used archives apart
+            os.utime(self.metadata_path, None)
+        except OSError as ex:
+            logger.debug("Unable to update the cached source archive: %s", ex)
+        return True
+
+    def save(self, fingerprint, tar_file_path, size, compressed_size):
+        try:
+            if not os.path.isdir(self.cache_dir):
+                os.makedirs(self.cache_dir)
+            with open(tar_file_path, 'rb') as source, open(self.archive_path, 'wb') as target:
+                remaining = compressed_size
+                while remaining:
+                    data = source.read(min(remaining, _PACK_BLOCK_SIZE))
+                    if not data:
+                        break
+                    target.write(data)
+                    remaining -= len(data)
+            # the metadata is written last, so a partially written archive is never used
+            with open(self.metadata_path, 'wb') as f:
+                f.write(json.dumps({'fingerprint': fingerprint, 'size': size,
+                                    'compressedSize': compressed_size}).encode('utf-8'))
+        except (OSError, IOError) as ex:
+            logger.debug("Unable to cache the source archive: %s", ex)
+        self._evict()
+
+    def _evict(self):
+        """ Removes the archives which are not among the MAX_ARCHIVES most recently used ones. """
+        current = os.path.basename(self.metadata_path)
+        try:
+            # the archive just saved is kept even if others have the same modification time
+            entries = sorted(((name == current, os.path.getmtime(os.path.join(self.cache_dir, name)),
+                               name[:-len('.json')])
+                              for name in os.listdir(self.cache_dir) if name.endswith('.json')), reverse=True)
+        except OSError as ex:
+            logger.debug("Unable to list the cached source archives: %s", ex)
+            return
+        for _, _, key in entries[self.MAX_ARCHIVES:]:
+            # the metadata is removed first, so a partially removed entry is never used
+            for name in ['{}.json'.format(key), '{}.tar.gz'.format(key)]:
+                try:
+                    os.remove(os.path.join(self.cache_dir, name))
+                except OSError as ex:
+                    logger.debug("Unable to remove '%s' from the source cache: %s", name, ex)
 
 
 class IgnoreRule(object):  # pylint: disable=too-few-public-methods
@@ -169,33 +467,6 @@ def _load_dockerignore_file(source_location):
     return ignore_list, len(ignore_list)
 
 
-def _archive_file_recursively(tar, name, arcname, parent_ignored, parent_matching_rule_index, ignore_check):
-    # create a TarInfo object from the file
-    tarinfo = tar.gettarinfo(name, arcname)
-
-    if tarinfo is None:
-        raise CLIError("tarfile: unsupported type {}".format(name))
-
-    # check if the file/dir is ignored
-    ignored, matching_rule_index = ignore_check(
-        tarinfo, parent_ignored, parent_matching_rule_index)
-
-    if not ignored:
-        # append the tar header and data to the archive
-        if tarinfo.isreg():
-            with open(name, "rb") as f:
-                tar.addfile(tarinfo, f)
-        else:
-            tar.addfile(tarinfo)
-
-    # even the dir is ignored, its child items can still be included, so continue to scan
-    if tarinfo.isdir():
-        for f in os.listdir(name):
-            _archive_file_recursively(tar, os.path.join(name, f), os.path.join(arcname, f),
-                                      parent_ignored=ignored, parent_matching_rule_index=matching_rule_index,
-                                      ignore_check=ignore_check)
-
-
 def check_remote_source_code(source_location):
     lower_source_location = source_location.lower()
 
@@ -9,6 +9,7 @@ except ImportError:
     from urllib import urlencode
     from urlparse import urlparse, urlunparse
 
+import threading
 import time
 from json import loads
 from base64 import b64encode
@@ -36,10 +37,14 @@ logger = get_logger(__name__)
 EMPTY_GUID = '00000000-0000-0000-0000-000000000000'
 ALLOWED_HTTP_METHOD = ['get', 'patch', 'put', 'delete']
 ACCESS_TOKEN_PERMISSION = ['pull', 'push', 'delete', 'push,pull', 'delete,pull']
+REGISTRY_MAX_WORKERS = 10
 
 AAD_TOKEN_BASE_ERROR_MESSAGE = "Unable to get AAD authorization tokens with message"
 ADMIN_USER_BASE_ERROR_MESSAGE = "Unable to get admin user credentials with message"
 
+_registry_session = None
+_registry_session_lock = threading.Lock()
+
 
 def _get_aad_token_after_challenge(cli_ctx,
                                    token_params,
@@ -353,96 +358,204 @@ def get_authorization_header(username, password):
     return {'Authorization': auth}
 
 
-def request_data_from_registry(http_method,
-                               login_server,
-                               path,
-                               username,
-                               password,
-                               result_index=None,
-                               json_payload=None,
-                               file_payload=None,
-                               params=None,
-                               retry_times=3,
-                               retry_interval=5):
-    if http_method not in ALLOWED_HTTP_METHOD:
-        raise ValueError("Allowed http method: {}".format(ALLOWED_HTTP_METHOD))
-
-    if json_payload and file_payload:
-        raise ValueError("One of json_payload and file_payload can be specified.")
-
-    if http_method in ['get', 'delete'] and (json_payload or file_payload):
-        raise ValueError("Empty payload is required for http method: {}".format(http_method))
+def _get_registry_session():
+    """Get the session shared by registry data plane requests, so that connections are kept alive between
+    requests and pooled across the threads working on the same registry.
+    """
+    global _registry_session  # pylint: disable=global-statement
+    with _registry_session_lock:
+        if _registry_session is None:
+            from requests.adapters import HTTPAdapter
+            session = requests.Session()
+            session.mount('https://', HTTPAdapter(pool_connections=1, pool_maxsize=REGISTRY_MAX_WORKERS))
+            _registry_session = session
+    return _registry_session
+
+
+def _get_retry_delay(retry_after, attempt, retry_interval):
+    """Get the seconds to wait before retrying a registry request. A throttled request waits as long as the
+    registry asks for in its Retry-After header; otherwise the delay doubles on every attempt up to retry_interval.
+    """
+    try:
+        return max(0, int(retry_after))
+    except (TypeError, ValueError):
+        return min(retry_interval, 2 ** attempt)
 
-    if http_method in ['patch', 'put'] and not (json_payload or file_payload):
-        raise ValueError("Non-empty payload is required for http method: {}".format(http_method))
 
-    url = 'https://{}{}'.format(login_server, path)
-    headers = get_authorization_header(username, password)
+class RegistryClient(object):  # pylint: disable=too-few-public-methods
+    """A registry data plane client. Requests share a pooled keep-alive session and, if the client is created with
+    a refresh token, an access token is obtained once for each scope and reused by all requests on that scope.
+    :param str login_server: The registry login server
+    :param str username: The username used to log into the container registry
+    :param str password: The password used to log into the container registry
+    :param str refresh_token: The AAD refresh token of the registry, used instead of username and password
+    """
 
-    for i in range(0, retry_times):
-        errorMessage = None
-        try:
-            if file_payload:
-                with open(file_payload, 'rb') as data_payload:
-                    response = requests.request(
+    def __init__(self, login_server, username=None, password=None, refresh_token=None):
+        self.login_server = login_server
+        self._username = username
+        self._password = password
+        self._refresh_token = refresh_token
+        self._access_tokens = {}
+        self._scope_locks = {}
+        self._lock = threading.Lock()
+
+    def _get_access_token(self, scope):
+        # requests on the same scope wait for the first of them to exchange the refresh token
+        with self._lock:
+            scope_lock = self._scope_locks.setdefault(scope, threading.Lock())
+        with scope_lock:
+            if scope not in self._access_tokens:
+                self._access_tokens[scope] = self._exchange_refresh_token(scope)
+            return self._access_tokens[scope]
+
+    def _exchange_refresh_token(self, scope):
+        content = {
+            'grant_type': 'refresh_token',
+            'service': self.login_server,
+            'scope': scope,
+            'refresh_token': self._refresh_token
+        }
+        authhost = 'https://{}/oauth2/token'.format(self.login_server)
+        headers = {'Content-Type': 'application/x-www-form-urlencoded'}
+        response = _get_registry_session().post(authhost, urlencode(content), headers=headers,
+                                                verify=(not should_disable_connection_verify()))
+        if response.status_code not in [200]:
+            from ._errors import CONNECTIVITY_ACCESS_TOKEN_ERROR
+            raise CLIError(CONNECTIVITY_ACCESS_TOKEN_ERROR.format_error_message(self.login_server, response.status_code)
+                           .get_error_message())
+
+        return loads(response.content.decode("utf-8"))["access_token"]
+
+    def _get_authorization_header(self, scope):
+        if self._refresh_token:
+            if not scope:
+                raise ValueError("A scope is required to request data with a refresh token.")
+            return get_authorization_header(EMPTY_GUID, self._get_access_token(scope))
+        return get_authorization_header(self._username, self._password)
+
+    def request(self,  # pylint: disable=too-many-statements
+                http_method,
+                path,
+                scope=None,
+                result_index=None,
+                json_payload=None,
+                file_payload=None,
+                params=None,
+                retry_times=3,
+                retry_interval=5):
+        """Send a request to the registry and return the result and the link to its next page, if any.
+        :param str http_method: The HTTP method of the request
+        :param str path: The path of the request
+        :param str scope: The scope of the access token for the request, e.g. 'repository:hello-world:pull'
+        :param str result_index: The key of the result in the response json
+        """
+        if http_method not in ALLOWED_HTTP_METHOD:
+            raise ValueError("Allowed http method: {}".format(ALLOWED_HTTP_METHOD))
+
+        if json_payload and file_payload:
+            raise ValueError("One of json_payload and file_payload can be specified.")
+
+        if http_method in ['get', 'delete'] and (json_payload or file_payload):
+            raise ValueError("Empty payload is required for http method: {}".format(http_method))
+
+        if http_method in ['patch', 'put'] and not (json_payload or file_payload):
+            raise ValueError("Non-empty payload is required for http method: {}".format(http_method))
+
+        url = 'https://{}{}'.format(self.login_server, path)
+        headers = self._get_authorization_header(scope)
+        session = _get_registry_session()
+
+        for i in range(0, retry_times):
+            errorMessage = None
+            retry_after = None
+            try:
+                if file_payload:
+                    with open(file_payload, 'rb') as data_payload:
+                        response = session.request(
+                            method=http_method,
+                            url=url,
+                            headers=headers,
+                            params=params,
+                            data=data_payload,
+                            verify=(not should_disable_connection_verify())
+                        )
+                else:
+                    response = session.request(
                         method=http_method,
                         url=url,
                         headers=headers,
                         params=params,
-                        data=data_payload,
+                        json=json_payload,
                         verify=(not should_disable_connection_verify())
                     )
-            else:
-                response = requests.request(
-                    method=http_method,
-                    url=url,
-                    headers=headers,
-                    params=params,
-                    json=json_payload,
-                    verify=(not should_disable_connection_verify())
-                )
-
-            log_registry_response(response)
-
-            if response.status_code == 200:
-                result = response.json()[result_index] if result_index else response.json()
-                next_link = response.headers['link'] if 'link' in response.headers else None
-                return result, next_link
-            elif response.status_code == 201 or response.status_code == 202:
-                result = None
-                try:
+
+                log_registry_response(response)
+
+                if response.status_code == 200:
                     result = response.json()[result_index] if result_index else response.json()
-                except ValueError as e:
-                    logger.debug('Response is empty or is not a valid json. Exception: %s', str(e))
-                return result, None
-            elif response.status_code == 204:
-                return None, None
-            elif response.status_code == 401:
-                raise RegistryException(
-                    parse_error_message('Authentication required.', response),
-                    response.status_code)
-            elif response.status_code == 404:
-                raise RegistryException(
-                    parse_error_message('The requested data does not exist.', response),
-                    response.status_code)
-            elif response.status_code == 405:
-                raise RegistryException(
-                    parse_error_message('This operation is not supported.', response),
-                    response.status_code)
-            elif response.status_code == 409:
-                raise RegistryException(
-                    parse_error_message('Failed to request data due to a conflict.', response),
-                    response.status_code)
-            else:
-                raise Exception(parse_error_message('Could not {} the requested data.'.format(http_method), response))
-        except CLIError:
-            raise
-        except Exception as e:  # pylint: disable=broad-except
-            errorMessage = str(e)
-            logger.debug('Retrying %s with exception %s', i + 1, errorMessage)
-            time.sleep(retry_interval)
+                    next_link = response.headers['link'] if 'link' in response.headers else None
+                    return result, next_link
+                elif response.status_code == 201 or response.status_code == 202:
+                    result = None
+                    try:
+                        result = response.json()[result_index] if result_index else response.json()
+                    except ValueError as e:
+                        logger.debug('Response is empty or is not a valid json. Exception: %s', str(e))
+                    return result, None
+                elif response.status_code == 204:
+                    return None, None
+                elif response.status_code == 401:
+                    raise RegistryException(
+                        parse_error_message('Authentication required.', response),
+                        response.status_code)
+                elif response.status_code == 404:
+                    raise RegistryException(
+                        parse_error_message('The requested data does not exist.', response),
+                        response.status_code)
+                elif response.status_code == 405:
+                    raise RegistryException(
+                        parse_error_message('This operation is not supported.', response),
+                        response.status_code)
+                elif response.status_code == 409:
+                    raise RegistryException(
+                        parse_error_message('Failed to request data due to a conflict.', response),
+                        response.status_code)
+                else:
+                    retry_after = response.headers.get('Retry-After')
+                    raise Exception(parse_error_message('Could not {} the requested data.'.format(http_method),
+                                                        response))
+            except CLIError:
+                raise
+            except Exception as e:  # pylint: disable=broad-except
+                errorMessage = str(e)
+                if i + 1 < retry_times:
+                    logger.debug('Retrying %s with exception %s', i + 1, errorMessage)
+                    time.sleep(_get_retry_delay(retry_after, i, retry_interval))
+
+        raise CLIError(errorMessage)
+
 
-    raise CLIError(errorMessage)
+def request_data_from_registry(http_method,
+                               login_server,
+                               path,
+                               username,
+                               password,
+                               result_index=None,
+                               json_payload=None,
+                               file_payload=None,
+                               params=None,
+                               retry_times=3,
+                               retry_interval=5):
+    return RegistryClient(login_server, username, password).request(
+        http_method=http_method,
+        path=path,
+        result_index=result_index,
+        json_payload=json_payload,
+        file_payload=file_payload,
+        params=params,
+        retry_times=retry_times,
+        retry_interval=retry_interval)
 
 
 def parse_error_message(error_message, response):
@@ -371,6 +371,8 @@ examples:
     text: az acr repository delete -n MyRegistry --image hello-world@sha256:abc123
   - name: Delete a repository from an Azure Container Registry. This deletes all manifests and tags under 'hello-world'.
     text: az acr repository delete -n MyRegistry --repository hello-world
+  - name: Delete several image manifests by tag, after a single confirmation.
+    text: az acr repository delete -n MyRegistry --image hello-world:v1 hello-world:v2 busybox:v1
 """
 
 helps['acr repository list'] = """
@@ -403,6 +405,8 @@ examples:
     text: az acr repository show-manifests -n MyRegistry --repository MyRepository --top 10 --orderby time_desc
   - name: Show the detailed information of the latest 10 manifests ordered by timestamp of a repository in an Azure Container Registry.
     text: az acr repository show-manifests -n MyRegistry --repository MyRepository --top 10 --orderby time_desc --detail
+  - name: Show manifests of several repositories in an Azure Container Registry.
+    text: az acr repository show-manifests -n MyRegistry --repository MyRepository1 MyRepository2
 """
 
 helps['acr repository show-tags'] = """
@@ -415,6 +419,8 @@ examples:
     text: az acr repository show-tags -n MyRegistry --repository MyRepository --detail
   - name: Show the detailed information of the latest 10 tags ordered by timestamp of a repository in an Azure Container Registry.
     text: az acr repository show-tags -n MyRegistry --repository MyRepository --top 10 --orderby time_desc --detail
+  - name: Show tags of all repositories in an Azure Container Registry.
+    text: az acr repository show-tags -n MyRegistry --repository $(az acr repository list -n MyRegistry -o tsv)
 """
 
 helps['acr repository untag'] = """
@@ -424,6 +430,8 @@ long-summary: This command does not delete the manifest referenced by the tag or
 examples:
   - name: Untag an image from a repository.
     text: az acr repository untag -n MyRegistry --image hello-world:latest
+  - name: Untag several images.
+    text: az acr repository untag -n MyRegistry --image hello-world:v1 hello-world:v2 busybox:v1
 """
 
 helps['acr repository update'] = """
@@ -96,8 +96,16 @@ def load_arguments(self, _):  # pylint: disable=too-many-statements
         c.argument('read_enabled', help='Indicates whether read operation is allowed.', arg_type=get_three_state_flag())
         c.argument('write_enabled', help='Indicates whether write or delete operation is allowed.', arg_type=get_three_state_flag())
 
+    for scope in ['acr repository show-tags', 'acr repository show-manifests']:
+        with self.argument_context(scope) as c:
+            c.argument('repository', nargs='+', help="Space-separated names of repositories. Each repository is listed concurrently, with results grouped by repository if more than one is specified.")
+
+    with self.argument_context('acr repository delete') as c:
+        c.argument('repository', nargs='+', help="Space-separated names of repositories. Several repositories are deleted concurrently.")
+        c.argument('image', options_list=['--image', '-t'], nargs='+', help="Space-separated names of images. May include a tag in the format 'name:tag' or digest in the format 'name@digest'. Several images are deleted concurrently.")
+
     with self.argument_context('acr repository untag') as c:
-        c.argument('image', options_list=['--image', '-t'], help="The name of the image. May include a tag in the format 'name:tag'.")
+        c.argument('image', options_list=['--image', '-t'], nargs='+', help="Space-separated names of images. May include a tag in the format 'name:tag'.")
 
     with self.argument_context('acr create') as c:
         c.argument('registry_name', completer=None)
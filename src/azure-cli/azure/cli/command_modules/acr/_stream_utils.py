@@ -2,7 +2,6 @@
 # Copyright (c) Microsoft Corporation. All rights reserved.
 # Licensed under the MIT License. See License.txt in the project root for license information.
 # --------------------------------------------------------------------------------------------
-from io import BytesIO
 import time
 from random import uniform
 import colorama
@@ -15,8 +14,11 @@ from ._azure_utils import get_blob_info
 
 logger = get_logger(__name__)
 
-DEFAULT_CHUNK_SIZE = 1024 * 4
+DEFAULT_CHUNK_SIZE = 1024 * 1024
 DEFAULT_LOG_TIMEOUT_IN_SEC = 60 * 30  # 30 minutes
+MIN_POLL_SLEEP_IN_SEC = 0.5
+MAX_POLL_SLEEP_IN_SEC = 15
+POLLS_PER_BACKOFF = 3
 
 
 def stream_logs(client,
@@ -67,17 +69,19 @@ def _stream_logs(no_format,  # pylint: disable=too-many-locals, too-many-stateme
     if not no_format:
         colorama.init()
 
-    stream = BytesIO()
+    # bytes read after the last complete line, which are printed once the rest of the line arrives
+    pending = bytearray()
     metadata = {}
     start = 0
-    end = byte_size - 1
     available = 0
-    sleep_time = 1
-    max_sleep_time = 15
-    num_fails = 0
-    num_fails_for_backoff = 3
+    idle_polls = 0
     consecutive_sleep_in_sec = 0
 
+    def _flush_pending():
+        if pending:
+            print(pending.decode('utf-8', errors='ignore'))
+            del pending[:]
+
     # Try to get the initial properties so there's no waiting.
     # If the storage call fails, we'll just sleep and try again after.
     try:
@@ -91,43 +95,36 @@ def _stream_logs(no_format,  # pylint: disable=too-many-locals, too-many-stateme
     while (_blob_is_not_complete(metadata) or start < available):
         while start < available:
             # Success! Reset our polling backoff.
-            sleep_time = 1
-            num_fails = 0
+            idle_polls = 0
             consecutive_sleep_in_sec = 0
 
             try:
-                old_byte_size = len(stream.getvalue())
-                blob_service.get_blob_to_stream(
+                content = blob_service.get_blob_to_bytes(
                     container_name=container_name,
                     blob_name=blob_name,
                     start_range=start,
-                    end_range=end,
-                    stream=stream)
-
-                curr_bytes = stream.getvalue()
-                new_byte_size = len(curr_bytes)
-                amount_read = new_byte_size - old_byte_size
-                start += amount_read
-                end = start + byte_size - 1
-
-                # Only scan what's newly read. If nothing is read, default to 0.
-                min_scan_range = max(new_byte_size - amount_read - 1, 0)
-                for i in range(new_byte_size - 1, min_scan_range, -1):
-                    if curr_bytes[i - 1:i + 1] == b'\r\n':
-                        flush = curr_bytes[:i]  # won't print \n
-                        stream = BytesIO()
-                        stream.write(curr_bytes[i + 1:])
-                        print(flush.decode('utf-8', errors='ignore'))
-                        break
+                    end_range=min(available, start + byte_size) - 1,
+                    max_connections=1).content
             except AzureHttpError as ae:
                 if ae.status_code != 404:
                     raise CLIError(ae)
+                break
             except KeyboardInterrupt:
-                curr_bytes = stream.getvalue()
-                if curr_bytes:
-                    print(curr_bytes.decode('utf-8', errors='ignore'))
+                _flush_pending()
                 return
 
+            if not content:
+                break
+            start += len(content)
+
+            # Only scan what's newly read, plus the last pending byte in case a \r\n was split between reads.
+            scan_from = len(pending) - 1 if pending else 0
+            pending.extend(content)
+            index = pending.rfind(b'\r\n', scan_from)
+            if index != -1:
+                print(pending[:index + 1].decode('utf-8', errors='ignore'))  # won't print \n
+                del pending[:index + 2]
+
         try:
             props = blob_service.get_blob_properties(
                 container_name=container_name, blob_name=blob_name)
@@ -137,8 +134,7 @@ def _stream_logs(no_format,  # pylint: disable=too-many-locals, too-many-stateme
             if ae.status_code != 404:
                 raise CLIError(ae)
         except KeyboardInterrupt:
-            if curr_bytes:
-                print(curr_bytes.decode('utf-8', errors='ignore'))
+            _flush_pending()
             return
         except Exception as err:
             raise CLIError(err)
@@ -146,9 +142,7 @@ def _stream_logs(no_format,  # pylint: disable=too-many-locals, too-many-stateme
         if consecutive_sleep_in_sec > timeout_in_seconds:
             # Flush anything remaining in the buffer - this would be the case
             # if the file has expired and we weren't able to detect any \r\n
-            curr_bytes = stream.getvalue()
-            if curr_bytes:
-                print(curr_bytes.decode('utf-8', errors='ignore'))
+            _flush_pending()
 
             logger.warning("Failed to find any new logs in %d seconds. Client will stop polling for additional logs.",
                            consecutive_sleep_in_sec)
@@ -156,28 +150,18 @@ def _stream_logs(no_format,  # pylint: disable=too-many-locals, too-many-stateme
 
         # If no new data available but not complete, sleep before trying to process additional data.
         if (_blob_is_not_complete(metadata) and start >= available):
-            num_fails += 1
-
-            logger.debug(
-                "Failed to find new content %d times in a row", num_fails)
-            if num_fails >= num_fails_for_backoff:
-                num_fails = 0
-                sleep_time = min(sleep_time * 2, max_sleep_time)
-                logger.debug("Resetting failure count to %d", num_fails)
-
-            rnd = uniform(1, 2)  # 1.0 <= x < 2.0
-            total_sleep_time = sleep_time + rnd
-            consecutive_sleep_in_sec += total_sleep_time
-            logger.debug("Base sleep time: %d, random delay: %d, total: %d, consecutive: %d",
-                         sleep_time, rnd, total_sleep_time, consecutive_sleep_in_sec)
-            time.sleep(total_sleep_time)
+            idle_polls += 1
+            logger.debug("Failed to find new content %d times in a row", idle_polls)
+
+            sleep_time = _get_poll_sleep_time(idle_polls)
+            consecutive_sleep_in_sec += sleep_time
+            logger.debug("Sleep time: %.1f, consecutive: %.1f", sleep_time, consecutive_sleep_in_sec)
+            time.sleep(sleep_time)
 
     # One final check to see if there's anything in the buffer to flush
     # E.g., metadata has been set and start == available, but the log file
     # didn't end in \r\n, so we were unable to flush out the final contents.
-    curr_bytes = stream.getvalue()
-    if curr_bytes:
-        print(curr_bytes.decode('utf-8', errors='ignore'))
+    _flush_pending()
 
     build_status = _get_run_status(metadata).lower()
     logger.debug("status was: '%s'", build_status)
@@ -191,6 +175,16 @@ def _stream_logs(no_format,  # pylint: disable=too-many-locals, too-many-stateme
             raise CLIError("Run was canceled")
 
 
+def _get_poll_sleep_time(idle_polls):
+    """
+    Returns how long to wait before polling a log blob that has had no new content for `idle_polls` polls in a
+    row. A run which is writing logs is polled again quickly; the wait doubles every few idle polls up to a
+    maximum, with jitter so that many clients don't poll in lockstep.
+    """
+    sleep_time = min(MIN_POLL_SLEEP_IN_SEC * 2 ** ((idle_polls - 1) // POLLS_PER_BACKOFF), MAX_POLL_SLEEP_IN_SEC)
+    return sleep_time * uniform(1, 1.5)  # 1.0 <= x < 1.5
+
+
 def _blob_is_not_complete(metadata):
     if not metadata:
         return True
@@ -15,7 +15,7 @@ from azure.cli.core.commands import LongRunningOperation
 
 from ._utils import validate_managed_registry, get_validate_platform, get_custom_registry_credentials
 from ._stream_utils import stream_logs
-from ._archive_utils import upload_source_code, check_remote_source_code
+from ._archive_utils import upload_source_code, check_remote_source_code, get_source_cache_dir
 
 logger = get_logger(__name__)
 
@@ -71,7 +71,8 @@ def acr_build(cmd,  # pylint: disable=too-many-locals
             source_location = upload_source_code(
                 client_registries, registry_name, resource_group_name,
                 source_location, tar_file_path,
-                docker_file_path, docker_file_in_tar)
+                docker_file_path, docker_file_in_tar,
+                cache_dir=get_source_cache_dir(cmd.cli_ctx))
             # For local source, the docker file is added separately into tar as the new file name (docker_file_in_tar)
             # So we need to update the docker_file_path
             docker_file_path = docker_file_in_tar
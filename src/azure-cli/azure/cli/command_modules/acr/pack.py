@@ -17,6 +17,7 @@ from ._utils import (
 )
 from ._client_factory import cf_acr_registries
 from .run import prepare_source_location
+from ._archive_utils import get_source_cache_dir
 
 PACK_TASK_YAML_FMT = '''version: v1.0.0
 steps:
@@ -47,7 +48,8 @@ def acr_pack_build(cmd,  # pylint: disable=too-many-locals
 
     client_registries = cf_acr_registries(cmd.cli_ctx)
     source_location = prepare_source_location(
-        source_location, client_registries, registry_name, resource_group_name)
+        source_location, client_registries, registry_name, resource_group_name,
+        cache_dir=get_source_cache_dir(cmd.cli_ctx))
     if not source_location:
         raise CLIError('Building with Buildpacks requires a valid source location.')
 
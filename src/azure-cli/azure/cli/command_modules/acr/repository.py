@@ -8,11 +8,25 @@ try:
 except ImportError:
     from urllib import unquote
 
+from collections import OrderedDict
+
+from six import string_types
+
 from knack.util import CLIError
 from knack.log import get_logger
 
+from azure.cli.core.util import get_max_concurrent_workers
+
 from ._utils import user_confirmation
-from ._docker_utils import request_data_from_registry, get_access_credentials, RegistryException
+from ._docker_utils import (
+    request_data_from_registry,
+    get_access_credentials,
+    get_login_credentials,
+    RegistryClient,
+    RegistryException,
+    EMPTY_GUID,
+    REGISTRY_MAX_WORKERS
+)
 
 logger = get_logger(__name__)
 
@@ -63,13 +77,71 @@ def _get_manifest_digest(login_server, repository, tag, username, password):
     raise CLIError("Could not get the manifest digest for image '{}:{}'.".format(repository, tag))
 
 
+def _get_repository_scope(repository, permission):
+    return 'repository:{}:{}'.format(repository, permission)
+
+
+def _get_registry_client(cmd, registry_name, repositories, permission, tenant_suffix=None, username=None,
+                         password=None):
+    """Return a registry client for the given repositories. A single repository is accessed with a token for its
+    scope, as before; for many repositories the client exchanges the registry refresh token once per repository.
+    """
+    if len(repositories) == 1:
+        login_server, username, password = get_access_credentials(
+            cmd=cmd,
+            registry_name=registry_name,
+            tenant_suffix=tenant_suffix,
+            username=username,
+            password=password,
+            repository=repositories[0],
+            permission=permission)
+        return RegistryClient(login_server, username, password)
+
+    login_server, username, password = get_login_credentials(
+        cmd=cmd,
+        registry_name=registry_name,
+        tenant_suffix=tenant_suffix,
+        username=username,
+        password=password)
+    if username == EMPTY_GUID:
+        return RegistryClient(login_server, refresh_token=password)
+    return RegistryClient(login_server, username, password)
+
+
+def _for_each(cli_ctx, items, func, item_type):
+    """Call func for each of the items, concurrently if there are many, and return the results in the order of the
+    items. Every item is attempted even if some of them fail.
+    """
+    max_workers = get_max_concurrent_workers(cli_ctx, len(items), REGISTRY_MAX_WORKERS)
+    if max_workers == 1:
+        return [func(item) for item in items]
+
+    from concurrent.futures import ThreadPoolExecutor
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        futures = [executor.submit(func, item) for item in items]
+
+    results, failed = [], []
+    for item, future in zip(items, futures):
+        try:
+            results.append(future.result())
+        except Exception as e:  # pylint: disable=broad-except
+            logger.error("%s '%s': %s", item_type.capitalize(), item, e)
+            failed.append(item)
+    if failed:
+        raise CLIError("{} of {} requests failed: {}".format(len(failed), len(items), ', '.join(failed)))
+    return results
+
+
 def _obtain_data_from_registry(login_server,
                                path,
                                username,
                                password,
                                result_index,
                                top=None,
-                               orderby=None):
+                               orderby=None,
+                               client=None,
+                               scope=None):
+    client = client or RegistryClient(login_server, username, password)
     result_list = []
     execute_next_http_call = True
 
@@ -86,12 +158,10 @@ def _obtain_data_from_registry(login_server,
             params['n'] = DEFAULT_PAGINATION if top > DEFAULT_PAGINATION else top
             top -= params['n']
 
-        result, next_link = request_data_from_registry(
+        result, next_link = client.request(
             http_method='get',
-            login_server=login_server,
             path=path,
-            username=username,
-            password=password,
+            scope=scope,
             result_index=result_index,
             params=params)
 
@@ -147,46 +217,53 @@ def acr_repository_show_tags(cmd,
                              username=None,
                              password=None,
                              detail=False):
-    login_server, username, password = get_access_credentials(
-        cmd=cmd,
-        registry_name=registry_name,
-        tenant_suffix=tenant_suffix,
-        username=username,
-        password=password,
-        repository=repository,
-        permission='pull')
-
-    try:
-        raw_result = _obtain_data_from_registry(
-            login_server=login_server,
-            path=_get_tag_path(repository),
-            username=username,
-            password=password,
-            result_index='tags',
-            top=top,
-            orderby=orderby)
-    except RegistryException as e:
-        # Check for Classic registry
-        if e.status_code == 405:
-            if detail:
-                logger.warning("The specified --detail is ignored as it is only supported for managed registries.")
-            if top:
-                logger.warning("The specified --top is ignored as it is only supported for managed registries.")
-            if orderby:
-                logger.warning("The specified --orderby is ignored as it is only supported for managed registries.")
-            return _obtain_data_from_registry(
-                login_server=login_server,
-                path='/v2/{}/tags/list'.format(repository),
+    repositories = _get_name_list(repository)
+    client = _get_registry_client(cmd, registry_name, repositories, 'pull', tenant_suffix, username, password)
+
+    def _show_tags(repository):
+        scope = _get_repository_scope(repository, 'pull')
+        try:
+            raw_result = _obtain_data_from_registry(
+                login_server=client.login_server,
+                path=_get_tag_path(repository),
                 username=username,
                 password=password,
-                result_index='tags')
-        raise
-
-    # For backward compatibility, convert the results to the old schema
-    if not detail:
-        return [item['name'] for item in raw_result]
-
-    return raw_result
+                result_index='tags',
+                top=top,
+                orderby=orderby,
+                client=client,
+                scope=scope)
+        except RegistryException as e:
+            # Check for Classic registry
+            if e.status_code == 405:
+                if detail:
+                    logger.warning("The specified --detail is ignored as it is only supported for managed registries.")
+                if top:
+                    logger.warning("The specified --top is ignored as it is only supported for managed registries.")
+                if orderby:
+                    logger.warning(
+                        "The specified --orderby is ignored as it is only supported for managed registries.")
+                return _obtain_data_from_registry(
+                    login_server=client.login_server,
+                    path='/v2/{}/tags/list'.format(repository),
+                    username=username,
+                    password=password,
+                    result_index='tags',
+                    client=client,
+                    scope=scope)
+            raise
+
+        # For backward compatibility, convert the results to the old schema
+        if not detail:
+            return [item['name'] for item in raw_result]
+
+        return raw_result
+
+    if len(repositories) == 1:
+        return _show_tags(repositories[0])
+
+    results = _for_each(cmd.cli_ctx, repositories, _show_tags, 'repository')
+    return [{'repository': r, 'tags': tags} for r, tags in zip(repositories, results)]
 
 
 def acr_repository_show_manifests(cmd,
@@ -199,33 +276,36 @@ def acr_repository_show_manifests(cmd,
                                   username=None,
                                   password=None,
                                   detail=False):
-    login_server, username, password = get_access_credentials(
-        cmd=cmd,
-        registry_name=registry_name,
-        tenant_suffix=tenant_suffix,
-        username=username,
-        password=password,
-        repository=repository,
-        permission='pull')
+    repositories = _get_name_list(repository)
+    client = _get_registry_client(cmd, registry_name, repositories, 'pull', tenant_suffix, username, password)
 
-    raw_result = _obtain_data_from_registry(
-        login_server=login_server,
-        path=_get_manifest_path(repository),
-        username=username,
-        password=password,
-        result_index='manifests',
-        top=top,
-        orderby=orderby)
+    def _show_manifests(repository):
+        raw_result = _obtain_data_from_registry(
+            login_server=client.login_server,
+            path=_get_manifest_path(repository),
+            username=username,
+            password=password,
+            result_index='manifests',
+            top=top,
+            orderby=orderby,
+            client=client,
+            scope=_get_repository_scope(repository, 'pull'))
+
+        # For backward compatibility, convert the results to the old schema
+        if not detail:
+            return [{
+                'digest': item['digest'] if 'digest' in item else '',
+                'tags': item['tags'] if 'tags' in item else [],
+                'timestamp': item['lastUpdateTime'] if 'lastUpdateTime' in item else ''
+            } for item in raw_result]
+
+        return raw_result
 
-    # For backward compatibility, convert the results to the old schema
-    if not detail:
-        return [{
-            'digest': item['digest'] if 'digest' in item else '',
-            'tags': item['tags'] if 'tags' in item else [],
-            'timestamp': item['lastUpdateTime'] if 'lastUpdateTime' in item else ''
-        } for item in raw_result]
+    if len(repositories) == 1:
+        return _show_manifests(repositories[0])
 
-    return raw_result
+    results = _for_each(cmd.cli_ctx, repositories, _show_manifests, 'repository')
+    return [{'repository': r, 'manifests': manifests} for r, manifests in zip(repositories, results)]
 
 
 def acr_repository_show(cmd,
@@ -348,23 +428,22 @@ def acr_repository_untag(cmd,
                          tenant_suffix=None,
                          username=None,
                          password=None):
-    repository, tag, _ = _parse_image_name(image)
+    images = _get_name_list(image)
+    repositories = list(OrderedDict.fromkeys(_parse_image_name(i)[0] for i in images))
+    client = _get_registry_client(cmd, registry_name, repositories, 'delete', tenant_suffix, username, password)
 
-    login_server, username, password = get_access_credentials(
-        cmd=cmd,
-        registry_name=registry_name,
-        tenant_suffix=tenant_suffix,
-        username=username,
-        password=password,
-        repository=repository,
-        permission='delete')
+    def _untag(image):
+        repository, tag, _ = _parse_image_name(image)
+        return client.request(
+            http_method='delete',
+            path=_get_tag_path(repository, tag),
+            scope=_get_repository_scope(repository, 'delete'))[0]
 
-    return request_data_from_registry(
-        http_method='delete',
-        login_server=login_server,
-        path=_get_tag_path(repository, tag),
-        username=username,
-        password=password)[0]
+    if len(images) == 1:
+        return _untag(images[0])
+
+    _for_each(cmd.cli_ctx, images, _untag, 'image')
+    return None
 
 
 def acr_repository_delete(cmd,
@@ -378,6 +457,15 @@ def acr_repository_delete(cmd,
                           yes=False):
     _validate_parameters(repository, image)
 
+    names = _get_name_list(image or repository)
+    if len(names) > 1:
+        return _acr_repository_delete_many(cmd, registry_name, names, bool(image), tenant_suffix, username,
+                                           password, yes)
+    if image:
+        image = names[0]
+    else:
+        repository = names[0]
+
     if image:
         # If --image is specified, repository must be empty.
         repository, tag, manifest = _parse_image_name(image, allow_digest=True)
@@ -417,6 +505,55 @@ def acr_repository_delete(cmd,
         password=password)[0]
 
 
+def _acr_repository_delete_many(cmd, registry_name, names, is_image, tenant_suffix, username, password, yes):
+    if is_image:
+        repositories = list(OrderedDict.fromkeys(_parse_image_name(i, allow_digest=True)[0] for i in names))
+        message = "This operation will delete the manifests of the images {} and all the other images " \
+                  "referencing them".format(', '.join("'{}'".format(i) for i in names))
+        if yes:
+            logger.warning(message)
+        else:
+            user_confirmation("{}.\nAre you sure you want to continue?".format(message))
+    else:
+        repositories = names
+        user_confirmation("Are you sure you want to delete the repositories {} and all images under them?".format(
+            ', '.join("'{}'".format(r) for r in repositories)), yes)
+
+    client = _get_registry_client(cmd, registry_name, repositories, 'delete,pull', tenant_suffix, username, password)
+
+    def _delete_repository(repository):
+        return client.request(
+            http_method='delete',
+            path=_get_repository_path(repository),
+            scope=_get_repository_scope(repository, 'delete,pull'))[0]
+
+    def _delete_image(image):
+        repository, tag, manifest = _parse_image_name(image, allow_digest=True)
+        scope = _get_repository_scope(repository, 'delete,pull')
+        if not manifest:
+            response = client.request(
+                http_method='get',
+                path=_get_tag_path(repository, tag),
+                scope=scope,
+                result_index='tag')[0]
+            manifest = response.get('digest') if response else None
+            if not manifest:
+                raise CLIError("Could not get the manifest digest for image '{}:{}'.".format(repository, tag))
+        return client.request(
+            http_method='delete',
+            path='/v2/{}/manifests/{}'.format(repository, manifest),
+            scope=scope)[0]
+
+    if is_image:
+        _for_each(cmd.cli_ctx, names, _delete_image, 'image')
+    else:
+        _for_each(cmd.cli_ctx, names, _delete_repository, 'repository')
+
+
+def _get_name_list(names):
+    return [names] if isinstance(names, string_types) else list(names)
+
+
 def _validate_parameters(repository, image):
     if bool(repository) == bool(image):
         raise CLIError('Usage error: --image IMAGE | --repository REPOSITORY')
@@ -19,7 +19,7 @@ from ._utils import (
     get_yaml_and_values
 )
 from ._client_factory import cf_acr_registries_tasks
-from ._archive_utils import upload_source_code, check_remote_source_code
+from ._archive_utils import upload_source_code, check_remote_source_code, get_source_cache_dir
 
 RUN_NOT_SUPPORTED = 'Run is only available for managed registries.'
 NULL_SOURCE_LOCATION = "/dev/null"
@@ -55,7 +55,8 @@ def acr_run(cmd,  # pylint: disable=too-many-locals
 
     client_registries = cf_acr_registries_tasks(cmd.cli_ctx)
     source_location = prepare_source_location(
-        source_location, client_registries, registry_name, resource_group_name)
+        source_location, client_registries, registry_name, resource_group_name,
+        cache_dir=get_source_cache_dir(cmd.cli_ctx))
 
     platform_os, platform_arch, platform_variant = get_validate_platform(cmd, platform)
 
@@ -119,7 +120,7 @@ def acr_run(cmd,  # pylint: disable=too-many-locals
     return stream_logs(client, run_id, registry_name, resource_group_name, no_format, True)
 
 
-def prepare_source_location(source_location, client_registries, registry_name, resource_group_name):
+def prepare_source_location(source_location, client_registries, registry_name, resource_group_name, cache_dir=None):
     if source_location.lower() == NULL_SOURCE_LOCATION:
         source_location = None
     elif os.path.exists(source_location):
@@ -133,7 +134,7 @@ def prepare_source_location(source_location, client_registries, registry_name, r
         try:
             source_location = upload_source_code(
                 client_registries, registry_name, resource_group_name,
-                source_location, tar_file_path, "", "")
+                source_location, tar_file_path, "", "", cache_dir=cache_dir)
         except Exception as err:
             raise CLIError(err)
         finally:
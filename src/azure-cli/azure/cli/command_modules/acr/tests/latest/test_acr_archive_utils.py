@@ -0,0 +1,122 @@
+# --------------------------------------------------------------------------------------------
+# Copyright (c) Microsoft Corporation. All rights reserved.
+# Licensed under the MIT License. See License.txt in the project root for license information.
+# --------------------------------------------------------------------------------------------
+
+import os
+import shutil
+import tarfile
+import tempfile
+import unittest
+
+try:
+    import unittest.mock as mock
+except ImportError:
+    import mock
+
+from azure.cli.command_modules.acr._archive_utils import (
+    _pack_source_code, _load_dockerignore_file, IgnoreMatcher, _ParallelGzipWriter, _SourceCache)
+
+
+class AcrArchiveUtilsTests(unittest.TestCase):
+
+    def setUp(self):
+        self.source_dir = tempfile.mkdtemp()
+        self.work_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.source_dir)
+        self.addCleanup(shutil.rmtree, self.work_dir)
+
+        self._write('Dockerfile', 'FROM scratch')
+        self._write('app/main.py', 'print(1)')
+        self._write('app/debug.log', 'log')
+        self._write('node_modules/lib/index.js', 'module')
+        self._write('node_modules/keep/README.md', 'keep')
+        self._write('.git/HEAD', 'ref')
+        self._write('.dockerignore', 'node_modules\n!node_modules/keep\n**/*.log\n')
+
+    def _write(self, name, content):
+        path = os.path.join(self.source_dir, name)
+        if not os.path.isdir(os.path.dirname(path)):
+            os.makedirs(os.path.dirname(path))
+        with open(path, 'w') as f:
+            f.write(content)
+
+    def _pack(self, docker_file_in_tar, cache_dir=None):
+        tar_file_path = os.path.join(self.work_dir, '{}.tar.gz'.format(docker_file_in_tar))
+        _pack_source_code(self.source_dir, tar_file_path, os.path.join(self.source_dir, 'Dockerfile'),
+                          docker_file_in_tar, cache_dir=cache_dir)
+        with tarfile.open(tar_file_path) as tar:
+            return {m.name: tar.extractfile(m).read() for m in tar.getmembers() if m.isreg()}
+
+    def test_acr_pack_source_code_applies_dockerignore(self):
+        files = self._pack('Dockerfile_1')
+        self.assertEqual(sorted(files), ['.dockerignore', 'Dockerfile', 'Dockerfile_1', 'app/main.py',
+                                         'node_modules/keep/README.md'])
+        self.assertEqual(files['app/main.py'], b'print(1)')
+
+    def test_acr_ignore_matcher_prunes_ignored_directories(self):
+        ignore_list, _ = _load_dockerignore_file(self.source_dir)
+        matcher = IgnoreMatcher(ignore_list)
+
+        ignored, index = matcher.check('node_modules', False, matcher.rule_count)
+        self.assertTrue(ignored)
+        # node_modules/keep can still be re-included, so node_modules has to be walked
+        self.assertFalse(matcher.is_pruned('node_modules', ignored, index))
+        ignored, index = matcher.check('node_modules/lib', ignored, index)
+        self.assertTrue(ignored)
+        self.assertTrue(matcher.is_pruned('node_modules/lib', ignored, index))
+        self.assertFalse(matcher.is_pruned('app', *matcher.check('app', False, matcher.rule_count)))
+
+        # without exception rules, nothing under an ignored directory is walked
+        matcher = IgnoreMatcher(None)
+        self.assertTrue(matcher.is_pruned('.git', *matcher.check('.git', False, matcher.rule_count)))
+
+    def test_acr_pack_source_code_reuses_cached_context(self):
+        cache_dir = os.path.join(self.work_dir, 'cache')
+        first = self._pack('Dockerfile_1', cache_dir=cache_dir)
+
+        with mock.patch('azure.cli.command_modules.acr._archive_utils.open', side_effect=open) as open_mock:
+            second = self._pack('Dockerfile_2', cache_dir=cache_dir)
+        opened = [os.path.basename(c[0][0]) for c in open_mock.call_args_list]
+        self.assertNotIn('main.py', opened)
+        first['Dockerfile_2'] = first.pop('Dockerfile_1')
+        self.assertEqual(first, second)
+
+        self._write('app/main.py', 'print(2)')
+        self.assertEqual(self._pack('Dockerfile_3', cache_dir=cache_dir)['app/main.py'], b'print(2)')
+
+    def test_acr_source_cache_keeps_most_recently_used_archives(self):
+        cache_dir = os.path.join(self.work_dir, 'cache')
+        self._pack('Dockerfile_1', cache_dir=cache_dir)
+        source_cache = _SourceCache(cache_dir, self.source_dir)
+        os.utime(source_cache.metadata_path, (0, 0))
+
+        source_dirs = []
+        for index in range(_SourceCache.MAX_ARCHIVES):
+            source_dirs.append(tempfile.mkdtemp())
+            self.addCleanup(shutil.rmtree, source_dirs[-1])
+            _pack_source_code(source_dirs[-1], os.path.join(self.work_dir, '{}.tar.gz'.format(index)), None, None,
+                              cache_dir=cache_dir)
+
+        # the least recently used archive was removed
+        self.assertFalse(os.path.exists(source_cache.metadata_path))
+        self.assertFalse(os.path.exists(source_cache.archive_path))
+        self.assertEqual(len(os.listdir(cache_dir)), _SourceCache.MAX_ARCHIVES * 2)
+        for source_dir in source_dirs:
+            self.assertTrue(os.path.exists(_SourceCache(cache_dir, source_dir).archive_path))
+
+    def test_acr_parallel_gzip_writer_writes_gzip_members_in_order(self):
+        import gzip
+        import io
+        output = io.BytesIO()
+        blocks = [str(index).encode('utf-8') * 100 for index in range(20)]
+        with _ParallelGzipWriter(output, block_size=150, max_workers=2) as writer:
+            for block in blocks:
+                writer.write(block)
+            self.assertEqual(writer.tell(), sum(len(block) for block in blocks))
+        self.assertEqual(writer.compressed_size, len(output.getvalue()))
+        self.assertEqual(gzip.GzipFile(fileobj=io.BytesIO(output.getvalue())).read(), b''.join(blocks))
+
+
+if __name__ == '__main__':
+    unittest.main()
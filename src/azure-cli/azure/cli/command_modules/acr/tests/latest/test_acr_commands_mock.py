@@ -4,14 +4,16 @@
 # --------------------------------------------------------------------------------------------
 
 try:
-    from urllib.parse import urlencode
+    from urllib.parse import urlencode, parse_qs
 except ImportError:
     from urllib import urlencode
+    from urlparse import parse_qs
 import json
 import unittest
 import mock
 import sys
 
+from knack.util import CLIError
 from azure.mgmt.containerregistry.v2018_09_01.models import Registry, Sku
 
 from azure.cli.command_modules.acr.repository import (
@@ -33,6 +35,7 @@ from azure.cli.command_modules.acr._docker_utils import (
     get_login_credentials,
     get_access_credentials,
     get_authorization_header,
+    RegistryClient,
     EMPTY_GUID
 )
 from azure.cli.command_modules.acr._docker_utils import ResourceNotFound
@@ -50,7 +53,7 @@ TEST_REPOSITORY = 'testrepository'
 class AcrMockCommandsTests(unittest.TestCase):
 
     @mock.patch('azure.cli.command_modules.acr.repository.get_access_credentials', autospec=True)
-    @mock.patch('requests.request', autospec=True)
+    @mock.patch('requests.Session.request')
     def test_repository_list(self, mock_requests_get, mock_get_access_credentials):
         cmd = self._setup_cmd()
 
@@ -89,7 +92,7 @@ class AcrMockCommandsTests(unittest.TestCase):
             verify=mock.ANY)
 
     @mock.patch('azure.cli.command_modules.acr.repository.get_access_credentials', autospec=True)
-    @mock.patch('requests.request', autospec=True)
+    @mock.patch('requests.Session.request')
     def test_repository_show_tags(self, mock_requests_get, mock_get_access_credentials):
         cmd = self._setup_cmd()
 
@@ -143,7 +146,7 @@ class AcrMockCommandsTests(unittest.TestCase):
             verify=mock.ANY)
 
     @mock.patch('azure.cli.command_modules.acr.repository.get_access_credentials', autospec=True)
-    @mock.patch('requests.request', autospec=True)
+    @mock.patch('requests.Session.request')
     def test_repository_show_manifests(self, mock_requests_get, mock_get_access_credentials):
         cmd = self._setup_cmd()
 
@@ -192,7 +195,7 @@ class AcrMockCommandsTests(unittest.TestCase):
             verify=mock.ANY)
 
     @mock.patch('azure.cli.command_modules.acr.repository.get_access_credentials', autospec=True)
-    @mock.patch('requests.request', autospec=True)
+    @mock.patch('requests.Session.request')
     def test_repository_show(self, mock_requests_get, mock_get_access_credentials):
         cmd = self._setup_cmd()
 
@@ -244,7 +247,7 @@ class AcrMockCommandsTests(unittest.TestCase):
             verify=mock.ANY)
 
     @mock.patch('azure.cli.command_modules.acr.repository.get_access_credentials', autospec=True)
-    @mock.patch('requests.request', autospec=True)
+    @mock.patch('requests.Session.request')
     def test_repository_show(self, mock_requests_get, mock_get_access_credentials):
         cmd = self._setup_cmd()
 
@@ -306,7 +309,7 @@ class AcrMockCommandsTests(unittest.TestCase):
 
     @mock.patch('azure.cli.command_modules.acr.repository.get_access_credentials', autospec=True)
     @mock.patch('azure.cli.command_modules.acr.repository._get_manifest_digest', autospec=True)
-    @mock.patch('requests.request', autospec=True)
+    @mock.patch('requests.Session.request')
     def test_repository_delete(self, mock_requests_delete, mock_get_manifest_digest, mock_get_access_credentials):
         cmd = self._setup_cmd()
 
@@ -369,6 +372,141 @@ class AcrMockCommandsTests(unittest.TestCase):
             json=None,
             verify=mock.ANY)
 
+    @mock.patch('azure.cli.command_modules.acr.repository.get_login_credentials', autospec=True)
+    @mock.patch('requests.Session.post')
+    @mock.patch('requests.Session.request')
+    def test_repository_show_tags_for_many_repositories(self, mock_requests_get, mock_requests_post,
+                                                        mock_get_login_credentials):
+        cmd = self._setup_cmd()
+        mock_get_login_credentials.return_value = 'testregistry.azurecr.io', EMPTY_GUID, TEST_ACR_REFRESH_TOKEN
+        repositories = ['testrepo{}'.format(i) for i in range(20)]
+
+        def _get_token(url, data, **kwargs):  # pylint: disable=unused-argument
+            response = mock.MagicMock()
+            response.status_code = 200
+            # the access token issued for a scope is the scope itself
+            response.content = json.dumps({'access_token': parse_qs(data)['scope'][0]}).encode()
+            return response
+
+        def _get_tags(method, url, headers, **kwargs):  # pylint: disable=unused-argument
+            repository = url.split('/')[-2]
+            self.assertEqual(headers, get_authorization_header(EMPTY_GUID, 'repository:{}:pull'.format(repository)))
+            response = mock.MagicMock()
+            response.headers = {}
+            response.status_code = 200
+            response.json.return_value = {'tags': [{'name': repository + '-tag'}]}
+            return response
+
+        mock_requests_post.side_effect = _get_token
+        mock_requests_get.side_effect = _get_tags
+
+        result = acr_repository_show_tags(cmd, 'testregistry', repositories)
+        self.assertEqual(result, [{'repository': r, 'tags': [r + '-tag']} for r in repositories])
+        # the refresh token is exchanged exactly once for each repository
+        self.assertEqual(mock_requests_post.call_count, len(repositories))
+
+    @mock.patch('azure.cli.command_modules.acr.repository.get_login_credentials', autospec=True)
+    @mock.patch('requests.Session.post')
+    @mock.patch('requests.Session.request')
+    def test_repository_delete_many(self, mock_requests_delete, mock_requests_post, mock_get_login_credentials):
+        cmd = self._setup_cmd()
+        mock_get_login_credentials.return_value = 'testregistry.azurecr.io', EMPTY_GUID, TEST_ACR_REFRESH_TOKEN
+        digest = 'sha256:c5515758d4c5e1e838e9cd307f6c6a0d620b5e07e6f927b07d05f6d12a1ac8d7'
+
+        def _get_token(url, data, **kwargs):  # pylint: disable=unused-argument
+            response = mock.MagicMock()
+            response.status_code = 200
+            response.content = json.dumps({'access_token': parse_qs(data)['scope'][0]}).encode()
+            return response
+
+        def _request(method, url, headers, **kwargs):  # pylint: disable=unused-argument
+            response = mock.MagicMock()
+            response.headers = {}
+            response.status_code = 200
+            response.json.return_value = {'tag': {'digest': digest}}
+            return response
+
+        mock_requests_post.side_effect = _get_token
+        mock_requests_delete.side_effect = _request
+
+        # Delete repositories
+        self.assertIsNone(acr_repository_delete(cmd, 'testregistry', repository=['testrepo1', 'testrepo2'],
+                                                yes=True))
+        self.assertEqual(sorted((c[1]['method'], c[1]['url']) for c in mock_requests_delete.call_args_list), [
+            ('delete', 'https://testregistry.azurecr.io/acr/v1/testrepo1'),
+            ('delete', 'https://testregistry.azurecr.io/acr/v1/testrepo2')
+        ])
+
+        # Delete images by tag and by manifest digest; the digest of a tag is looked up first
+        mock_requests_delete.reset_mock()
+        self.assertIsNone(acr_repository_delete(cmd, 'testregistry',
+                                                image=['testrepo1:testtag', 'testrepo2@' + digest], yes=True))
+        self.assertEqual(sorted((c[1]['method'], c[1]['url']) for c in mock_requests_delete.call_args_list), [
+            ('delete', 'https://testregistry.azurecr.io/v2/testrepo1/manifests/' + digest),
+            ('delete', 'https://testregistry.azurecr.io/v2/testrepo2/manifests/' + digest),
+            ('get', 'https://testregistry.azurecr.io/acr/v1/testrepo1/_tags/testtag')
+        ])
+        for c in mock_requests_delete.call_args_list:
+            repository = c[1]['url'].split('/')[-3]
+            self.assertEqual(c[1]['headers'],
+                             get_authorization_header(EMPTY_GUID, 'repository:{}:delete,pull'.format(repository)))
+
+        # Every image is attempted even if some of them fail
+        mock_requests_delete.reset_mock()
+        mock_requests_delete.side_effect = lambda method, url, **kwargs: mock.MagicMock(
+            headers={}, status_code=404 if 'testrepo1' in url else 200)
+        with self.assertRaisesRegexp(CLIError, '1 of 2 requests failed'):
+            acr_repository_delete(cmd, 'testregistry', image=['testrepo1@' + digest, 'testrepo2@' + digest],
+                                  yes=True)
+        self.assertEqual(mock_requests_delete.call_count, 2)
+
+    @mock.patch('azure.cli.command_modules.acr._docker_utils.time.sleep')
+    @mock.patch('requests.Session.request')
+    def test_registry_request_retries_after_throttling(self, mock_requests_get, mock_sleep):
+        throttled = mock.MagicMock()
+        throttled.headers = {'Retry-After': '7'}
+        throttled.status_code = 429
+        failed = mock.MagicMock()
+        failed.headers = {}
+        failed.status_code = 500
+        ok = mock.MagicMock()
+        ok.headers = {}
+        ok.status_code = 200
+        ok.json.return_value = {'tags': ['testtag']}
+        mock_requests_get.side_effect = [throttled, failed, ok]
+
+        client = RegistryClient('testregistry.azurecr.io', 'username', 'password')
+        self.assertEqual(client.request('get', '/acr/v1/testrepository/_tags', result_index='tags'),
+                         (['testtag'], None))
+        self.assertEqual([c[0][0] for c in mock_sleep.call_args_list], [7, 2])
+
+        # no wait after the last attempt
+        mock_sleep.reset_mock()
+        mock_requests_get.side_effect = [failed] * 3
+        with self.assertRaises(CLIError):
+            client.request('get', '/acr/v1/testrepository/_tags')
+        self.assertEqual(mock_sleep.call_count, 2)
+
+    @mock.patch('requests.Session.post')
+    def test_registry_client_exchanges_refresh_token_once_per_scope(self, mock_requests_post):
+        from concurrent.futures import ThreadPoolExecutor
+        import time
+
+        def _post(url, data, **kwargs):
+            time.sleep(0.05)
+            response = mock.MagicMock()
+            response.status_code = 200
+            response.content = json.dumps({'access_token': parse_qs(data)['scope'][0]}).encode()
+            return response
+
+        mock_requests_post.side_effect = _post
+        client = RegistryClient('testregistry.azurecr.io', refresh_token=TEST_ACR_REFRESH_TOKEN)
+        scopes = ['repository:testrepo1:pull', 'repository:testrepo2:pull'] * 4
+        with ThreadPoolExecutor(max_workers=len(scopes)) as executor:
+            tokens = list(executor.map(client._get_access_token, scopes))  # pylint: disable=protected-access
+        self.assertEqual(tokens, scopes)
+        self.assertEqual(mock_requests_post.call_count, 2)
+
     @mock.patch('azure.cli.command_modules.acr._docker_utils.get_registry_by_name', autospec=True)
     @mock.patch('requests.post', autospec=True)
     @mock.patch('requests.get', autospec=True)
@@ -491,7 +629,7 @@ class AcrMockCommandsTests(unittest.TestCase):
             verify=mock.ANY)
 
     @mock.patch('azure.cli.command_modules.acr.helm.get_access_credentials', autospec=True)
-    @mock.patch('requests.request', autospec=True)
+    @mock.patch('requests.Session.request')
     def test_helm_list(self, mock_requests_get, mock_get_access_credentials):
         cmd = self._setup_cmd()
 
@@ -528,7 +666,7 @@ class AcrMockCommandsTests(unittest.TestCase):
             verify=mock.ANY)
 
     @mock.patch('azure.cli.command_modules.acr.helm.get_access_credentials', autospec=True)
-    @mock.patch('requests.request', autospec=True)
+    @mock.patch('requests.Session.request')
     def test_helm_show(self, mock_requests_get, mock_get_access_credentials):
         cmd = self._setup_cmd()
 
@@ -571,7 +709,7 @@ class AcrMockCommandsTests(unittest.TestCase):
             verify=mock.ANY)
 
     @mock.patch('azure.cli.command_modules.acr.helm.get_access_credentials', autospec=True)
-    @mock.patch('requests.request', autospec=True)
+    @mock.patch('requests.Session.request')
     def test_helm_delete(self, mock_requests_get, mock_get_access_credentials):
         cmd = self._setup_cmd()
 
@@ -603,7 +741,7 @@ class AcrMockCommandsTests(unittest.TestCase):
             verify=mock.ANY)
 
     @mock.patch('azure.cli.command_modules.acr.helm.get_access_credentials', autospec=True)
-    @mock.patch('requests.request', autospec=True)
+    @mock.patch('requests.Session.request')
     def test_helm_push(self, mock_requests_get, mock_get_access_credentials):
         cmd = self._setup_cmd()
 
@@ -0,0 +1,77 @@
+# --------------------------------------------------------------------------------------------
+# Copyright (c) Microsoft Corporation. All rights reserved.
+# Licensed under the MIT License. See License.txt in the project root for license information.
+# --------------------------------------------------------------------------------------------
+
+import unittest
+
+try:
+    import unittest.mock as mock
+except ImportError:
+    import mock
+
+from six import StringIO
+
+from azure.cli.command_modules.acr._stream_utils import _stream_logs, _get_poll_sleep_time, MAX_POLL_SLEEP_IN_SEC
+
+
+class _FakeAppendBlobService(object):
+    """ A log blob which grows by one of `appends` every time its properties are read. """
+
+    def __init__(self, appends, status='Succeeded'):
+        self.content = b''
+        self.appends = list(appends)
+        self.status = status
+        self.ranges = []
+
+    def get_blob_properties(self, container_name, blob_name):  # pylint: disable=unused-argument
+        if self.appends:
+            self.content += self.appends.pop(0)
+        props = mock.MagicMock()
+        props.metadata = {} if self.appends else {'Complete': self.status}
+        props.properties.content_length = len(self.content)
+        return props
+
+    def get_blob_to_bytes(self, container_name, blob_name, start_range, end_range,  # pylint: disable=unused-argument
+                          **kwargs):
+        self.ranges.append((start_range, end_range))
+        blob = mock.MagicMock()
+        blob.content = self.content[start_range:end_range + 1]
+        return blob
+
+
+class AcrStreamUtilsTests(unittest.TestCase):
+
+    def _stream(self, blob_service, byte_size=1024):
+        with mock.patch('sys.stdout', new_callable=StringIO) as stdout, \
+                mock.patch('azure.cli.command_modules.acr._stream_utils.time.sleep') as sleep:
+            _stream_logs(True, byte_size, 60, blob_service, 'logs', 'run.log', False)
+        return stdout.getvalue(), sleep
+
+    def test_acr_stream_logs_prints_complete_lines(self):
+        blob_service = _FakeAppendBlobService([b'Step 1/2\r', b'\nStep 2/2 ', b'', b'', b'done\r\nPush', b''])
+        output, sleep = self._stream(blob_service)
+
+        self.assertEqual(output.replace('\r', ''), 'Step 1/2\nStep 2/2 done\nPush\n')
+        # each byte is read only once
+        read = sum(end - start + 1 for start, end in blob_service.ranges)
+        self.assertEqual(read, len(blob_service.content))
+        self.assertEqual(sleep.call_count, 2)
+
+    def test_acr_stream_logs_reads_large_logs_in_chunks(self):
+        lines = b''.join(b'line %d\r\n' % i for i in range(2000))
+        blob_service = _FakeAppendBlobService([lines])
+        output, _ = self._stream(blob_service, byte_size=4096)
+
+        self.assertEqual(output.count('\n'), 2000)
+        self.assertEqual(len(blob_service.ranges), (len(lines) + 4095) // 4096)
+
+    def test_acr_stream_logs_backs_off_when_idle(self):
+        sleep_times = [_get_poll_sleep_time(polls) for polls in range(1, 30)]
+        self.assertLess(sleep_times[0], 1)
+        self.assertTrue(all(a <= b * 1.5 for a, b in zip(sleep_times, sleep_times[1:])))
+        self.assertGreaterEqual(sleep_times[-1], MAX_POLL_SLEEP_IN_SEC)
+
+
+if __name__ == '__main__':
+    unittest.main()
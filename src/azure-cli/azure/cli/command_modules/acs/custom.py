@@ -7,12 +7,14 @@ from __future__ import print_function
 import binascii
 import datetime
 import errno
+import hashlib
 import json
 import os
 import os.path
 import platform
 import random
 import re
+import shutil
 import ssl
 import stat
 import string
@@ -38,6 +40,7 @@ from azure.cli.command_modules.acs import acs_client, proxy
 from azure.cli.command_modules.acs._params import regions_in_preview, regions_in_prod
 from azure.cli.core.api import get_config_dir
 from azure.cli.core._profile import Profile
+from azure.cli.core._session import SessionCache
 from azure.cli.core.commands.client_factory import get_mgmt_service_client
 from azure.cli.core.keys import is_valid_ssh_rsa_public_key
 from azure.cli.core.util import in_cloud_console, shell_safe_json_parse, truncate_text, sdk_no_wait
@@ -238,9 +241,9 @@ def acs_install_cli(cmd, client, resource_group_name, name, install_location=Non
     if client_version:
         kwargs['client_version'] = client_version
     if orchestrator_type == 'kubernetes':
-        return k8s_install_cli(**kwargs)
+        return k8s_install_cli(cmd, **kwargs)
     elif orchestrator_type == 'dcos':
-        return dcos_install_cli(**kwargs)
+        return dcos_install_cli(cmd, **kwargs)
     else:
         raise CLIError('Unsupported orchestrator type {} for install-cli'.format(orchestrator_type))
 
@@ -258,7 +261,147 @@ def _ssl_context():
 def _urlretrieve(url, filename):
     req = urlopen(url, context=_ssl_context())
     with open(filename, "wb") as f:
-        f.write(req.read())
+        shutil.copyfileobj(req, f, 1024 * 1024)
+
+
+def _get_sha256(filename):
+    digest = hashlib.sha256()
+    with open(filename, 'rb') as f:
+        for chunk in iter(lambda: f.read(1024 * 1024), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def _get_published_sha256(checksum_url):
+    """ Returns the SHA-256 published at the URL, or None if it cannot be read. """
+    try:
+        content = urlopen(checksum_url, context=_ssl_context()).read().decode('utf-8').split()
+    except (IOError, UnicodeDecodeError) as ex:
+        logger.debug('Failed to read the checksum at %s: %s', checksum_url, ex)
+        return None
+    return content[0].lower() if content else None
+
+
+def _verify_download(url, digest, checksum_url):
+    """ Checks the SHA-256 of the download against the one published at `checksum_url`, if any. """
+    if not checksum_url:
+        return
+    expected = _get_published_sha256(checksum_url)
+    if not expected:
+        logger.warning('Unable to read the checksum published at "%s", the download is not verified.', checksum_url)
+    elif expected != digest:
+        raise CLIError('The download of "{}" does not match the checksum published at "{}". '
+                       'Please try again.'.format(url, checksum_url))
+
+
+class _DownloadCache(SessionCache):
+    """
+    Caches the client binaries downloaded by install-cli in the config directory, named by the SHA-256 of their
+    content. An index maps each download URL, which includes the client version, to the digest of its binary, which
+    is verified before the binary is installed. Only the MAX_ARTIFACTS most recently used binaries are kept. The
+    version 'latest' resolves to is cached for `acs.download_cache_ttl` minutes; 0 disables the cache.
+    """
+    DIR_NAME = 'downloads'
+    FILE_NAME = 'index.json'
+    TTL_CONFIG = ('acs', 'download_cache_ttl')
+    MAX_ARTIFACTS = 3
+
+    def __init__(self, cli_ctx):
+        self.directory = os.path.join(cli_ctx.config.config_dir, self.DIR_NAME)
+        super(_DownloadCache, self).__init__(cli_ctx)
+
+    def _get_filename(self, cli_ctx):
+        if not os.path.isdir(self.directory):
+            os.makedirs(self.directory)
+        return os.path.join(self.directory, self.FILE_NAME)
+
+    def _evict(self):
+        """ Removes the binaries which are not among the MAX_ARTIFACTS most recently used ones. """
+        artifacts = self._session.data.setdefault('artifacts', {})
+        kept = set()
+        for url, entry in sorted(artifacts.items(), key=lambda item: item[1][1], reverse=True):
+            if entry[0] in kept or len(kept) < self.MAX_ARTIFACTS:
+                kept.add(entry[0])
+            else:
+                del artifacts[url]
+        for name in os.listdir(self.directory):
+            if name != self.FILE_NAME and name not in kept and not name.endswith('.download'):
+                try:
+                    os.remove(os.path.join(self.directory, name))
+                except OSError as ex:
+                    logger.debug("Failed to remove '%s' from the download cache: %s", name, ex)
+
+    def get_version(self, source_url):
+        """ Returns the cached version 'latest' resolves to at the source, or None if it has expired. """
+        if self.ttl <= 0:
+            return None
+        entry = self._session.get('versions', {}).get(source_url)
+        return entry[0] if entry and self.is_fresh(entry[1]) else None
+
+    def set_version(self, source_url, version):
+        if self.ttl > 0:
+            self._session.data.setdefault('versions', {})[source_url] = [version, time.time()]
+            self.save()
+
+    def get(self, url):
+        """ Returns the path of the cached binary downloaded from the URL, or None if it is missing or corrupt. """
+        if self.ttl <= 0:
+            return None
+        entry = self._session.get('artifacts', {}).get(url)
+        if not entry:
+            return None
+        filename = os.path.join(self.directory, entry[0])
+        try:
+            if _get_sha256(filename) == entry[0]:
+                entry[1] = time.time()
+                self.save()
+                return filename
+            logger.warning('The cached download of %s is corrupt, downloading it again.', url)
+        except (OSError, IOError):
+            pass
+        return None
+
+    def download(self, url, checksum_url=None):
+        """ Downloads the URL into the cache and returns the path of the binary. """
+        fd, download_path = tempfile.mkstemp(dir=self.directory, suffix='.download')
+        os.close(fd)
+        try:
+            _urlretrieve(url, download_path)
+            digest = _get_sha256(download_path)
+            _verify_download(url, digest, checksum_url)
+            filename = os.path.join(self.directory, digest)
+            if os.path.exists(filename):
+                os.remove(filename)
+            os.rename(download_path, filename)
+        finally:
+            if os.path.exists(download_path):
+                os.remove(download_path)
+        self._session.data.setdefault('artifacts', {})[url] = [digest, time.time()]
+        self._evict()
+        self.save()
+        return filename
+
+
+def _install_download(cli_ctx, url, install_location, checksum_url=None):
+    """
+    Installs the binary at the URL, from the download cache when it has it. Downloads are verified against the
+    SHA-256 published at `checksum_url`.
+    """
+    cache = _DownloadCache(cli_ctx)
+    if cache.ttl <= 0:
+        _urlretrieve(url, install_location)
+        try:
+            _verify_download(url, _get_sha256(install_location), checksum_url)
+        except CLIError:
+            os.remove(install_location)
+            raise
+        return
+    filename = cache.get(url)
+    if filename:
+        logger.info('Installing the cached download of %s', url)
+    else:
+        filename = cache.download(url, checksum_url)
+    shutil.copyfile(filename, install_location)
 
 
 def dcos_install_cli(cmd, install_location=None, client_version='1.8'):
@@ -284,7 +427,7 @@ def dcos_install_cli(cmd, install_location=None, client_version='1.8'):
 
     logger.warning('Downloading client to %s', install_location)
     try:
-        _urlretrieve(file_url, install_location)
+        _install_download(cmd.cli_ctx, file_url, install_location)
         os.chmod(install_location,
                  os.stat(install_location).st_mode | stat.S_IXUSR | stat.S_IXGRP | stat.S_IXOTH)
     except IOError as err:
@@ -300,9 +443,13 @@ def k8s_install_cli(cmd, client_version='latest', install_location=None):
         source_url = 'https://mirror.azure.cn/kubernetes/kubectl'
 
     if client_version == 'latest':
-        context = _ssl_context()
-        version = urlopen(source_url + '/stable.txt', context=context).read()
-        client_version = version.decode('UTF-8').strip()
+        cache = _DownloadCache(cmd.cli_ctx)
+        client_version = cache.get_version(source_url)
+        if not client_version:
+            context = _ssl_context()
+            version = urlopen(source_url + '/stable.txt', context=context).read()
+            client_version = version.decode('UTF-8').strip()
+            cache.set_version(source_url, client_version)
     else:
         client_version = "v%s" % client_version
 
@@ -327,7 +474,7 @@ def k8s_install_cli(cmd, client_version='latest', install_location=None):
 
     logger.warning('Downloading client to "%s" from "%s"', install_location, file_url)
     try:
-        _urlretrieve(file_url, install_location)
+        _install_download(cmd.cli_ctx, file_url, install_location, checksum_url=file_url + '.sha256')
         os.chmod(install_location,
                  os.stat(install_location).st_mode | stat.S_IXUSR | stat.S_IXGRP | stat.S_IXOTH)
     except IOError as ex:
@@ -513,6 +660,58 @@ def _undeploy_connector(graceful, node_name, helm_release_name):
                        ' --connector-name, --location and --os-type options: {}'.format(err))
 
 
+# messages of errors which go away once AAD has propagated recently created applications and service principals
+AAD_PROPAGATION_ERRORS = [
+    'does not reference a valid application object',
+    'does not exist in the directory',
+    'No matches in graph database',
+    'not found in Active Directory tenant',
+    'is not valid according to the validation procedure',
+    'The credentials in ServicePrincipalProfile were invalid'
+]
+
+
+def _is_aad_propagation_error(ex):
+    """Whether an error may go away by retrying while AAD propagates data, other errors are fatal."""
+    if isinstance(ex, (requests.exceptions.ConnectionError, requests.exceptions.Timeout)):
+        return True
+    status_code = getattr(getattr(ex, 'response', None), 'status_code', None)
+    if status_code is not None and (status_code >= 500 or status_code == 429):
+        return True
+    message = getattr(ex, 'message', None) or str(ex)
+    return any(error in message for error in AAD_PROPAGATION_ERRORS)
+
+
+def _wait_for_aad_propagation(operation, hook=None, message=None, max_attempts=10, timeout=120, delay=2,
+                              max_delay=30):
+    """
+    Calls `operation` until it succeeds, retrying errors caused by AAD propagation delays with jittered exponential
+    backoff, and returns its result. Fatal errors are raised at once, the last error when `max_attempts` attempts or
+    `timeout` seconds are exhausted.
+    """
+    start = time.time()
+    attempt = 0
+    while True:
+        if hook and message:
+            hook.add(message=message, value=min((time.time() - start) / timeout, 1.0), total_val=1.0)
+        attempt += 1
+        try:
+            result = operation()
+            if attempt > 1:
+                logger.info('Waited %.1f seconds for AAD propagation, %d attempts', time.time() - start, attempt)
+            return result
+        except Exception as ex:  # pylint: disable=broad-except
+            remaining = timeout - (time.time() - start)
+            if not _is_aad_propagation_error(ex) or attempt >= max_attempts or remaining <= 0:
+                logger.info('Gave up on AAD propagation after %.1f seconds, %d attempts: %s',
+                            time.time() - start, attempt, ex)
+                raise
+            backoff = min(max_delay, delay * 2 ** (attempt - 1))
+            sleep = min(remaining, backoff / 2.0 + random.uniform(0, backoff / 2.0))
+            logger.info('Retrying in %.1f seconds, AAD may still be propagating: %s', sleep, ex)
+            time.sleep(sleep)
+
+
 def _build_service_principal(rbac_client, cli_ctx, name, url, client_secret):
     # use get_progress_controller
     hook = cli_ctx.get_progress_controller(True)
@@ -524,16 +723,12 @@ def _build_service_principal(rbac_client, cli_ctx, name, url, client_secret):
     result = create_application(rbac_client.applications, name, url, [url], password=client_secret,
                                 start_date=start_date, end_date=end_date)
     service_principal = result.app_id  # pylint: disable=no-member
-    for x in range(0, 10):
-        hook.add(message='Creating service principal', value=0.1 * x, total_val=1.0)
-        try:
-            create_service_principal(cli_ctx, service_principal, rbac_client=rbac_client)
-            break
-        # TODO figure out what exception AAD throws here sometimes.
-        except Exception as ex:  # pylint: disable=broad-except
-            logger.info(ex)
-            time.sleep(2 + 2 * x)
-    else:
+    try:
+        _wait_for_aad_propagation(
+            lambda: create_service_principal(cli_ctx, service_principal, rbac_client=rbac_client),
+            hook=hook, message='Creating service principal')
+    except Exception as ex:  # pylint: disable=broad-except
+        logger.warning('Could not create the service principal: %s', ex)
         return False
     hook.add(message='Finished service principal creation', value=1.0, total_val=1.0)
     logger.info('Finished service principal creation')
@@ -545,20 +740,20 @@ def _add_role_assignment(cli_ctx, role, service_principal, delay=2, scope=None):
     hook = cli_ctx.get_progress_controller(True)
     hook.add(message='Waiting for AAD role to propagate', value=0, total_val=1.0)
     logger.info('Waiting for AAD role to propagate')
-    for x in range(0, 10):
-        hook.add(message='Waiting for AAD role to propagate', value=0.1 * x, total_val=1.0)
+
+    def _create_role_assignment_once():
         try:
             # TODO: break this out into a shared utility library
             create_role_assignment(cli_ctx, role, service_principal, scope=scope)
-            break
         except CloudError as ex:
-            if ex.message == 'The role assignment already exists.':
-                break
-            logger.info(ex.message)
-        except:  # pylint: disable=bare-except
-            pass
-        time.sleep(delay + delay * x)
-    else:
+            if ex.message != 'The role assignment already exists.':
+                raise
+
+    try:
+        _wait_for_aad_propagation(_create_role_assignment_once, hook=hook,
+                                  message='Waiting for AAD role to propagate', delay=delay)
+    except Exception as ex:  # pylint: disable=broad-except
+        logger.info(getattr(ex, 'message', None) or ex)
         return False
     hook.add(message='AAD role propagation done', value=1.0, total_val=1.0)
     logger.info('AAD role propagation done')
@@ -887,21 +1082,10 @@ def acs_create(cmd, client, resource_group_name, deployment_name, name, ssh_key_
         }
 
     # Due to SPN replication latency, we do a few retries here
-    max_retry = 30
-    retry_exception = Exception(None)
-    for _ in range(0, max_retry):
-        try:
-            return _invoke_deployment(cmd.cli_ctx, resource_group_name, deployment_name,
-                                      template, params, validate, no_wait)
-        except CloudError as ex:
-            retry_exception = ex
-            if 'is not valid according to the validation procedure' in ex.message or \
-               'The credentials in ServicePrincipalProfile were invalid' in ex.message or \
-               'not found in Active Directory tenant' in ex.message:
-                time.sleep(3)
-            else:
-                raise ex
-    raise retry_exception
+    return _wait_for_aad_propagation(
+        lambda: _invoke_deployment(cmd.cli_ctx, resource_group_name, deployment_name, template, params, validate,
+                                   no_wait),
+        max_attempts=30, timeout=90)
 
 
 def store_acs_service_principal(subscription_id, client_secret, service_principal,
@@ -1011,25 +1195,86 @@ def _handle_merge(existing, addition, key, replace):
         existing[key] = addition[key]
         return
 
+    # index the existing objects by name, so merging into large kubeconfig files doesn't scan them for each addition
+    by_name = {}
+    for j in existing[key]:
+        by_name.setdefault(j['name'], []).append(j)
+
+    removed = set()
     for i in addition[key]:
-        for j in existing[key]:
-            if i['name'] == j['name']:
-                if replace or i == j:
-                    existing[key].remove(j)
+        for j in by_name.get(i['name'], []):
+            if id(j) in removed:
+                continue
+            if replace or i == j:
+                removed.add(id(j))
+            else:
+                from knack.prompting import prompt_y_n, NoTTYException
+                msg = 'A different object named {} already exists in your kubeconfig file.\nOverwrite?'
+                overwrite = False
+                try:
+                    overwrite = prompt_y_n(msg.format(i['name']))
+                except NoTTYException:
+                    pass
+                if overwrite:
+                    removed.add(id(j))
                 else:
-                    from knack.prompting import prompt_y_n, NoTTYException
-                    msg = 'A different object named {} already exists in your kubeconfig file.\nOverwrite?'
-                    overwrite = False
-                    try:
-                        overwrite = prompt_y_n(msg.format(i['name']))
-                    except NoTTYException:
-                        pass
-                    if overwrite:
-                        existing[key].remove(j)
-                    else:
-                        msg = 'A different object named {} already exists in {} in your kubeconfig file.'
-                        raise CLIError(msg.format(i['name'], key))
-        existing[key].append(i)
+                    msg = 'A different object named {} already exists in {} in your kubeconfig file.'
+                    raise CLIError(msg.format(i['name'], key))
+        by_name.setdefault(i['name'], []).append(i)
+    existing[key] = [j for j in existing[key] if id(j) not in removed] + addition[key]
+
+
+class _KubernetesConfigurationLock(object):
+    """
+    Locks a kubeconfig file with an exclusively created '<file>.lock' file, as kubectl does, so concurrent merges
+    don't overwrite each other.
+    """
+    TIMEOUT = 30  # seconds
+
+    def __init__(self, filename):
+        self.lock_file = filename + '.lock'
+
+    def __enter__(self):
+        deadline = time.time() + self.TIMEOUT
+        while True:
+            try:
+                os.close(os.open(self.lock_file, os.O_CREAT | os.O_EXCL | os.O_WRONLY, 0o600))
+                return self
+            except OSError as ex:
+                if ex.errno != errno.EEXIST:
+                    raise
+                if time.time() > deadline:
+                    raise CLIError('Timed out waiting for the lock {0} on your kubeconfig file. If no other '
+                                   'command is updating it, delete {0} and try again.'.format(self.lock_file))
+                time.sleep(0.1)
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        try:
+            os.remove(self.lock_file)
+        except OSError:
+            pass
+
+
+def _write_kubernetes_configuration(filename, config):
+    # write a temporary file next to the kubeconfig file and move it over it, so the file is never partially written
+    filename = os.path.realpath(filename)
+    fd, temp_path = tempfile.mkstemp(dir=os.path.dirname(filename), prefix=os.path.basename(filename))
+    try:
+        with os.fdopen(fd, 'w') as stream:
+            yaml.safe_dump(config, stream, default_flow_style=False)
+            stream.flush()
+            os.fsync(stream.fileno())
+        if os.path.exists(filename):
+            os.chmod(temp_path, stat.S_IMODE(os.stat(filename).st_mode))
+        try:
+            os.replace(temp_path, filename)
+        except AttributeError:  # in Python 2.7
+            if platform.system() == 'Windows' and os.path.exists(filename):
+                os.remove(filename)
+            os.rename(temp_path, filename)
+    finally:
+        if os.path.exists(temp_path):
+            os.remove(temp_path)
 
 
 def load_kubernetes_configuration(filename):
@@ -1046,6 +1291,13 @@ def load_kubernetes_configuration(filename):
 
 
 def merge_kubernetes_configurations(existing_file, addition_file, replace):
+    if not os.path.exists(existing_file):
+        raise CLIError('{} does not exist'.format(existing_file))
+    with _KubernetesConfigurationLock(existing_file):
+        _merge_kubernetes_configurations(existing_file, addition_file, replace)
+
+
+def _merge_kubernetes_configurations(existing_file, addition_file, replace):
     existing = load_kubernetes_configuration(existing_file)
     addition = load_kubernetes_configuration(addition_file)
 
@@ -1077,8 +1329,7 @@ def merge_kubernetes_configurations(existing_file, addition_file, replace):
             logger.warning('%s has permissions "%s".\nIt should be readable and writable only by its owner.',
                            existing_file, existing_file_perms)
 
-    with open(existing_file, 'w+') as stream:
-        yaml.safe_dump(existing, stream, default_flow_style=False)
+    _write_kubernetes_configuration(existing_file, existing)
 
     current_context = addition.get('current-context', 'UNKNOWN')
     msg = 'Merged "{}" as current context in {}'.format(current_context, existing_file)
@@ -1597,38 +1848,30 @@ def aks_create(cmd, client, resource_group_name, name, ssh_key_value,  # pylint:
         addon_profiles=addon_profiles,
         aad_profile=aad_profile)
 
+    def _create_managed_cluster():
+        result = sdk_no_wait(no_wait,
+                             client.create_or_update,
+                             resource_group_name=resource_group_name,
+                             resource_name=name, parameters=mc)
+        # add cluster spn with Monitoring Metrics Publisher role assignment to the cluster resource
+        # mdm metrics supported only in azure public cloud so add the  role assignment only in this cloud
+        cloud_name = cmd.cli_ctx.cloud.name
+        if cloud_name.lower() == 'azurecloud' and monitoring:
+            from msrestazure.tools import resource_id
+            cluster_resource_id = resource_id(
+                subscription=subscription_id,
+                resource_group=resource_group_name,
+                namespace='Microsoft.ContainerService', type='managedClusters',
+                name=name
+            )
+            if not _add_role_assignment(cmd.cli_ctx, 'Monitoring Metrics Publisher',
+                                        service_principal_profile.client_id, scope=cluster_resource_id):
+                logger.warning('Could not create a role assignment for monitoring addon. '
+                               'Are you an Owner on this subscription?')
+        return result
+
     # Due to SPN replication latency, we do a few retries here
-    max_retry = 30
-    retry_exception = Exception(None)
-    for _ in range(0, max_retry):
-        try:
-            result = sdk_no_wait(no_wait,
-                                 client.create_or_update,
-                                 resource_group_name=resource_group_name,
-                                 resource_name=name, parameters=mc)
-            # add cluster spn with Monitoring Metrics Publisher role assignment to the cluster resource
-            # mdm metrics supported only in azure public cloud so add the  role assignment only in this cloud
-            cloud_name = cmd.cli_ctx.cloud.name
-            if cloud_name.lower() == 'azurecloud' and monitoring:
-                from msrestazure.tools import resource_id
-                cluster_resource_id = resource_id(
-                    subscription=subscription_id,
-                    resource_group=resource_group_name,
-                    namespace='Microsoft.ContainerService', type='managedClusters',
-                    name=name
-                )
-                if not _add_role_assignment(cmd.cli_ctx, 'Monitoring Metrics Publisher',
-                                            service_principal_profile.client_id, scope=cluster_resource_id):
-                    logger.warning('Could not create a role assignment for monitoring addon. '
-                                   'Are you an Owner on this subscription?')
-            return result
-        except CloudError as ex:
-            retry_exception = ex
-            if 'not found in Active Directory tenant' in ex.message:
-                time.sleep(3)
-            else:
-                raise ex
-    raise retry_exception
+    return _wait_for_aad_propagation(_create_managed_cluster, max_attempts=30, timeout=90)
 
 
 def aks_disable_addons(cmd, client, resource_group_name, name, addons, no_wait=False):
@@ -4,15 +4,21 @@
 # --------------------------------------------------------------------------------------------
 
 # pylint: skip-file
+import hashlib
+import itertools
 import mock
 import os
 import platform
 import requests
+import stat
 import tempfile
+import threading
 import shutil
 import unittest
 import yaml
 
+from six.moves import BaseHTTPServer
+
 from msrestazure.azure_exceptions import CloudError
 from azure.graphrbac.models import GraphErrorException
 from azure.cli.command_modules.acs._params import (regions_in_preview,
@@ -20,13 +26,21 @@ from azure.cli.command_modules.acs._params import (regions_in_preview,
 from azure.cli.command_modules.acs.custom import (merge_kubernetes_configurations, list_acs_locations,
                                                   _acs_browse_internal, _add_role_assignment, _get_default_dns_prefix,
                                                   create_application, _update_addons,
-                                                  _ensure_container_insights_for_monitoring, k8s_install_cli)
+                                                  _ensure_container_insights_for_monitoring, k8s_install_cli,
+                                                  _install_download, _build_service_principal)
 from azure.mgmt.containerservice.models import (ContainerServiceOrchestratorTypes,
                                                 ContainerService,
                                                 ContainerServiceOrchestratorProfile)
 from azure.cli.core.util import CLIError
 
 
+def _get_install_cli_cmd(config_dir, download_cache_ttl=60):
+    cmd = mock.MagicMock()
+    cmd.cli_ctx.config.config_dir = config_dir
+    cmd.cli_ctx.config.getint.return_value = download_cache_ttl
+    return cmd
+
+
 class AcsCustomCommandTest(unittest.TestCase):
     def test_list_acs_locations(self):
         client, cmd = mock.MagicMock(), mock.MagicMock()
@@ -95,6 +109,72 @@ class AcsCustomCommandTest(unittest.TestCase):
             create_role_assignment.assert_called_with(cli_ctx, role, sp, scope=None)
             self.assertFalse(ok, 'Expected _add_role_assignment to fail')
 
+    def _get_graph_error(self, status_code, message):
+        resp = requests.Response()
+        resp.status_code = status_code
+        resp._content = message.encode('utf-8')
+        err = CloudError(resp)
+        err.message = message
+        return err
+
+    @mock.patch('azure.cli.command_modules.acs.custom.random.uniform', side_effect=lambda a, b: b)
+    @mock.patch('azure.cli.command_modules.acs.custom.time.sleep')
+    def test_build_service_principal_waits_for_aad_propagation(self, sleep, _):
+        app_id = '00000000-0000-0000-0000-000000000001'
+        rbac_client = mock.MagicMock()
+        rbac_client.applications.create.return_value = mock.MagicMock(app_id=app_id)
+        rbac_client.applications.list.return_value = [mock.MagicMock(app_id=app_id)]
+        propagating = self._get_graph_error(
+            400, 'The appId of the service principal does not reference a valid application object.')
+        rbac_client.service_principals.create.side_effect = [propagating, propagating, mock.MagicMock()]
+
+        self.assertEqual(_build_service_principal(rbac_client, mock.MagicMock(), 'name', 'https://url', 'secret'),
+                         app_id)
+        self.assertEqual(rbac_client.service_principals.create.call_count, 3)
+        self.assertEqual([c[0][0] for c in sleep.call_args_list], [2, 4])
+
+        # fatal errors are not retried
+        sleep.reset_mock()
+        rbac_client.service_principals.create.side_effect = self._get_graph_error(403, 'Insufficient privileges')
+        self.assertFalse(_build_service_principal(rbac_client, mock.MagicMock(), 'name', 'https://url', 'secret'))
+        sleep.assert_not_called()
+
+    @mock.patch('azure.cli.command_modules.acs.custom.random.uniform', side_effect=lambda a, b: b)
+    @mock.patch('azure.cli.command_modules.acs.custom.time.sleep')
+    def test_add_role_assignment_waits_for_aad_propagation(self, sleep, _):
+        from azure.cli.core.mock import DummyCli
+        graph_client, auth_client = mock.MagicMock(), mock.MagicMock()
+        # the service principal shows up in the graph on the 4th lookup
+        graph_client.service_principals.list.side_effect = [[], [], [], [mock.MagicMock(object_id='object-id')]]
+        graph_client.objects.get_objects_by_object_ids.return_value = []
+        auth_client.role_assignments.config.subscription_id = 'sub'
+        auth_client.role_definitions.list.return_value = [mock.MagicMock(id='role-id')]
+
+        with mock.patch('azure.cli.command_modules.acs.custom.get_graph_rbac_management_client',
+                        return_value=graph_client), \
+                mock.patch('azure.cli.command_modules.acs.custom.get_auth_management_client',
+                           return_value=auth_client):
+            cli_ctx = DummyCli()
+            cli_ctx.get_progress_controller = mock.MagicMock()
+            self.assertTrue(_add_role_assignment(cli_ctx, 'Contributor', 'sp'))
+            self.assertEqual(auth_client.role_assignments.create.call_count, 1)
+            self.assertEqual(auth_client.role_assignments.create.call_args[0][2].principal_id, 'object-id')
+            self.assertEqual([c[0][0] for c in sleep.call_args_list], [2, 4, 8])
+
+            # the backoff is capped, and the attempts are limited
+            sleep.reset_mock()
+            graph_client.service_principals.list.side_effect = None
+            graph_client.service_principals.list.return_value = []
+            self.assertFalse(_add_role_assignment(cli_ctx, 'Contributor', 'sp'))
+            self.assertEqual([c[0][0] for c in sleep.call_args_list], [2, 4, 8, 16, 30, 30, 30, 30, 30])
+
+            # missing permissions are fatal
+            sleep.reset_mock()
+            graph_client.service_principals.list.return_value = [mock.MagicMock(object_id='object-id')]
+            auth_client.role_assignments.create.side_effect = self._get_graph_error(403, 'AuthorizationFailed')
+            self.assertFalse(_add_role_assignment(cli_ctx, 'Contributor', 'sp'))
+            sleep.assert_not_called()
+
     @mock.patch('azure.cli.command_modules.acs.custom._get_subscription_id')
     def test_browse_k8s(self, get_subscription_id):
         acs_info = ContainerService(location="location", orchestrator_profile={}, master_profile={}, linux_profile={})
@@ -344,6 +424,40 @@ class AcsCustomCommandTest(unittest.TestCase):
                          ['clusterUser_aztest_aztest', 'clusterAdmin_aztest_aztest'])
         self.assertEqual(merged['current-context'], 'aztest-admin')
 
+    def test_merge_credentials_concurrently(self):
+        temp_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, temp_dir)
+        existing = os.path.join(temp_dir, 'config')
+        with os.fdopen(os.open(existing, os.O_CREAT | os.O_WRONLY, 0o600), 'w') as stream:
+            yaml.safe_dump({'clusters': [], 'contexts': [], 'users': [], 'current-context': ''}, stream)
+
+        def _merge(index):
+            addition = os.path.join(temp_dir, 'addition{}'.format(index))
+            with open(addition, 'w') as stream:
+                yaml.safe_dump({
+                    'clusters': [{'cluster': {'server': 'https://{}'.format(index)}, 'name': 'cluster{}'.format(index)}],
+                    'contexts': [{'context': {'cluster': 'cluster{}'.format(index), 'user': 'user{}'.format(index)},
+                                  'name': 'context{}'.format(index)}],
+                    'users': [{'name': 'user{}'.format(index), 'user': {'token': 'token{}'.format(index)}}],
+                    'current-context': 'context{}'.format(index)
+                }, stream)
+            merge_kubernetes_configurations(existing, addition, False)
+
+        threads = [threading.Thread(target=_merge, args=(i,)) for i in range(10)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        with open(existing, 'r') as stream:
+            merged = yaml.safe_load(stream)
+        for key, prefix in [('clusters', 'cluster'), ('contexts', 'context'), ('users', 'user')]:
+            self.assertEqual(sorted(x['name'] for x in merged[key]), sorted(prefix + str(i) for i in range(10)))
+        self.assertFalse(os.path.exists(existing + '.lock'))
+        self.assertEqual(sorted(os.listdir(temp_dir)), sorted(['config'] + ['addition' + str(i) for i in range(10)]))
+        if platform.system() != 'Windows':
+            self.assertEqual(stat.S_IMODE(os.stat(existing).st_mode), 0o600)
+
     def test_merge_credentials_missing(self):
         existing = tempfile.NamedTemporaryFile(delete=False)
         existing.close()
@@ -627,14 +741,17 @@ class AcsCustomCommandTest(unittest.TestCase):
         self.assertEqual(args[3]['resources'][0]['type'], "Microsoft.Resources/deployments")
         self.assertEqual(args[4]['workspaceResourceId']['value'], wsID)
 
+    @mock.patch('azure.cli.command_modules.acs.custom._get_published_sha256',
+                return_value=hashlib.sha256(b'').hexdigest())
     @mock.patch('azure.cli.command_modules.acs.custom._urlretrieve')
     @mock.patch('azure.cli.command_modules.acs.custom.logger')
-    def test_k8s_install_cli_emit_warnings(self, logger_mock, mock_url_retrieve):
+    def test_k8s_install_cli_emit_warnings(self, logger_mock, mock_url_retrieve, _):
         mock_url_retrieve.side_effect = lambda _, install_location: open(install_location, 'a').close()
         try:
             temp_dir = tempfile.mkdtemp()  # tempfile.TemporaryDirectory() is no available on 2.7
             test_location = os.path.join(temp_dir, 'kubectl.exe')
-            k8s_install_cli(mock.MagicMock(), client_version='1.2.3', install_location=test_location)
+            k8s_install_cli(_get_install_cli_cmd(temp_dir), client_version='1.2.3',
+                            install_location=test_location)
             self.assertEqual(mock_url_retrieve.call_count, 1)
             # 2 warnings, 1st for download result; 2nd for updating PATH
             self.assertEqual(logger_mock.warning.call_count, 2)  # 2 warnings, one for download result
@@ -642,19 +759,123 @@ class AcsCustomCommandTest(unittest.TestCase):
             if platform.system() == 'Windows':
                 # try again with install location in PATH, we should only get one more warning
                 os.environ['PATH'] += ';' + temp_dir
-                k8s_install_cli(mock.MagicMock(), client_version='1.2.3', install_location=test_location)
+                k8s_install_cli(_get_install_cli_cmd(temp_dir), client_version='1.2.3',
+                                install_location=test_location)
                 self.assertEqual(logger_mock.warning.call_count, 3)
         finally:
             shutil.rmtree(temp_dir)
 
+    @mock.patch('azure.cli.command_modules.acs.custom._get_published_sha256',
+                return_value=hashlib.sha256(b'').hexdigest())
     @mock.patch('azure.cli.command_modules.acs.custom._urlretrieve')
     @mock.patch('azure.cli.command_modules.acs.custom.logger')
-    def test_k8s_install_cli_create_installation_dir(self, logger_mock, mock_url_retrieve):
+    def test_k8s_install_cli_create_installation_dir(self, logger_mock, mock_url_retrieve, _):
         mock_url_retrieve.side_effect = lambda _, install_location: open(install_location, 'a').close()
         try:
             temp_dir = tempfile.mkdtemp()  # tempfile.TemporaryDirectory() is no available on 2.7
             test_location = os.path.join(temp_dir, 'foo', 'kubectl.exe')
-            k8s_install_cli(mock.MagicMock(), client_version='1.2.3', install_location=test_location)
+            k8s_install_cli(_get_install_cli_cmd(temp_dir), client_version='1.2.3',
+                            install_location=test_location)
             self.assertTrue(os.path.exists(test_location))
         finally:
             shutil.rmtree(temp_dir)
+
+
+class _DownloadStandIn(BaseHTTPServer.BaseHTTPRequestHandler):
+    requests = []
+    corrupt = False
+
+    def log_message(self, *args):
+        pass
+
+    def do_GET(self):
+        _DownloadStandIn.requests.append(self.path)
+        path = self.path[:-len('.sha256')] if self.path.endswith('.sha256') else self.path
+        body = 'kubectl {}'.format(path).encode('utf-8') * 100000
+        if path != self.path:
+            body = hashlib.sha256(body + (b'corrupt' if _DownloadStandIn.corrupt else b'')).hexdigest().encode('utf-8')
+        self.send_response(200)
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+
+class AcsDownloadCacheTest(unittest.TestCase):
+    def setUp(self):
+        _DownloadStandIn.requests = []
+        _DownloadStandIn.corrupt = False
+        self.server = BaseHTTPServer.HTTPServer(('127.0.0.1', 0), _DownloadStandIn)
+        thread = threading.Thread(target=self.server.serve_forever)
+        thread.daemon = True
+        thread.start()
+        self.addCleanup(self.server.server_close)
+        self.addCleanup(self.server.shutdown)
+        self.url = 'http://{}:{}'.format(*self.server.server_address) + '/v{}/kubectl'
+
+        self.temp_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.temp_dir)
+        self.install_location = os.path.join(self.temp_dir, 'kubectl')
+        self.downloads = os.path.join(self.temp_dir, 'downloads')
+
+    def _install(self, cmd, version='1.2.3'):
+        url = self.url.format(version)
+        _install_download(cmd.cli_ctx, url, self.install_location, checksum_url=url + '.sha256')
+        with open(self.install_location, 'rb') as f:
+            self.assertEqual(f.read(), 'kubectl /v{}/kubectl'.format(version).encode('utf-8') * 100000)
+        os.remove(self.install_location)
+
+    def _get_downloads(self):
+        return [f for f in os.listdir(self.downloads) if f != 'index.json']
+
+    def test_install_cli_download_is_cached(self):
+        cmd = _get_install_cli_cmd(self.temp_dir)
+        for _ in range(3):
+            self._install(cmd)
+        self.assertEqual(_DownloadStandIn.requests, ['/v1.2.3/kubectl', '/v1.2.3/kubectl.sha256'])
+
+        # a corrupt binary is downloaded again
+        with open(os.path.join(self.downloads, self._get_downloads()[0]), 'ab') as f:
+            f.write(b'corrupt')
+        self._install(cmd)
+        self._install(cmd)
+        self.assertEqual(len(_DownloadStandIn.requests), 4)
+
+        # a 0 TTL disables the cache
+        self._install(_get_install_cli_cmd(self.temp_dir, download_cache_ttl=0))
+        self.assertEqual(len(_DownloadStandIn.requests), 6)
+
+    def test_install_cli_download_is_verified(self):
+        _DownloadStandIn.corrupt = True
+        for download_cache_ttl in [60, 0]:
+            with self.assertRaisesRegexp(CLIError, 'does not match the checksum'):
+                self._install(_get_install_cli_cmd(self.temp_dir, download_cache_ttl=download_cache_ttl))
+            self.assertFalse(os.path.exists(self.install_location))
+            self.assertEqual(self._get_downloads(), [])
+
+    @mock.patch('time.time', side_effect=itertools.count())
+    def test_install_cli_downloads_are_evicted(self, _):
+        cmd = _get_install_cli_cmd(self.temp_dir)
+        for version in ['1.0.0', '1.1.0', '1.2.0', '1.0.0', '1.3.0']:
+            self._install(cmd, version)
+        self.assertEqual(len(self._get_downloads()), 3)
+
+        # the least recently used version was evicted, 1.0.0 is still cached
+        del _DownloadStandIn.requests[:]
+        for version in ['1.0.0', '1.2.0', '1.3.0', '1.1.0']:
+            self._install(cmd, version)
+        self.assertEqual(_DownloadStandIn.requests, ['/v1.1.0/kubectl', '/v1.1.0/kubectl.sha256'])
+
+    @mock.patch('azure.cli.command_modules.acs.custom._get_published_sha256',
+                return_value=hashlib.sha256(b'').hexdigest())
+    @mock.patch('azure.cli.command_modules.acs.custom._urlretrieve')
+    @mock.patch('azure.cli.command_modules.acs.custom.urlopen')
+    def test_k8s_install_cli_latest_version_is_cached(self, urlopen_mock, urlretrieve_mock, _):
+        urlopen_mock.return_value.read.return_value = b'v1.15.0\n'
+        urlretrieve_mock.side_effect = lambda url, filename: open(filename, 'w').close()
+        cmd = _get_install_cli_cmd(self.temp_dir)
+        cmd.cli_ctx.cloud.name = 'AzureCloud'
+        for _ in range(2):
+            k8s_install_cli(cmd, install_location=self.install_location)
+        self.assertEqual(urlopen_mock.call_count, 1)
+        self.assertEqual(urlretrieve_mock.call_count, 1)
+        self.assertIn('/v1.15.0/bin/', urlretrieve_mock.call_args[0][0])
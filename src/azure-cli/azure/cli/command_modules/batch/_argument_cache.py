@@ -0,0 +1,134 @@
+# --------------------------------------------------------------------------------------------
+# Copyright (c) Microsoft Corporation. All rights reserved.
+# Licensed under the MIT License. See License.txt in the project root for license information.
+# --------------------------------------------------------------------------------------------
+
+import os
+import re
+from six import string_types
+
+from knack.log import get_logger
+
+from azure.cli.command_modules.batch import _validators as validators
+
+logger = get_logger(__name__)
+
+_SDK_VERSION = re.compile(r"^VERSION = ['\"](.*)['\"]", re.MULTILINE)
+
+# The modules of this package that build the arguments of data plane commands
+_SOURCE_MODULES = ['_argument_cache', '_command_type', '_parameter_format', '_validators']
+
+
+def _get_sdk_version():
+    """Read the version of the Batch SDK from its version module, without importing
+    azure.batch as that loads the client, operations and every model.
+    :returns: str or None if the SDK cannot be found.
+    """
+    import azure
+    for path in azure.__path__:
+        try:
+            with open(os.path.join(path, 'batch', 'version.py')) as version_file:
+                match = _SDK_VERSION.search(version_file.read())
+        except (IOError, OSError):
+            continue
+        if match:
+            return match.group(1)
+    return None
+
+
+def _get_source_stamp():
+    """Get the modification time and size of the modules that build the arguments,
+    so that the cache is discarded when they change without a new CLI version.
+    :returns: str
+    """
+    package_dir = os.path.dirname(os.path.abspath(__file__))
+    stamp = []
+    for name in _SOURCE_MODULES:
+        try:
+            stat = os.stat(os.path.join(package_dir, name + '.py'))
+        except (IOError, OSError):
+            continue
+        stamp.append('{}:{}'.format(int(stat.st_mtime), stat.st_size))
+    return ','.join(stamp)
+
+
+class ArgumentCache(object):
+    """On-disk cache of the arguments of Batch data plane commands, as built by
+    introspecting the SDK operations and models. The cache is discarded whenever
+    the SDK, the CLI or the modules of this package change. Set
+    `batch.argument_cache` to false to disable it.
+    """
+    FILE_NAME = 'batchArgumentCache.json'
+    FORMAT_VERSION = 1
+
+    def __init__(self, cli_ctx, sdk_version):
+        from azure.cli.core import __version__ as cli_version
+        from azure.cli.core._session import Session
+        self._version = '{}/{}/{}/{}'.format(self.FORMAT_VERSION, sdk_version, cli_version, _get_source_stamp())
+        self._session = Session()
+        self._session.load(os.path.join(cli_ctx.config.config_dir, self.FILE_NAME))
+        if self._session.get('version') != self._version:
+            self._session.data = {'version': self._version, 'operations': {}}
+
+    def get(self, key):
+        return self._session.data['operations'].get(key)
+
+    def set(self, key, value):
+        self._session.data['operations'][key] = value
+        try:
+            self._session.save_with_retry()
+        except (OSError, IOError) as ex:
+            logger.debug("Failed to save the Batch argument cache: %s", ex)
+
+
+def get_argument_cache(cli_ctx):
+    """Get the argument cache, loaded once per CLI context.
+    :returns: ArgumentCache or None if caching is disabled.
+    """
+    if 'batch_argument_cache' not in cli_ctx.data:
+        cache = None
+        if cli_ctx.config.getboolean('batch', 'argument_cache', True):
+            sdk_version = _get_sdk_version()
+            if sdk_version:
+                cache = ArgumentCache(cli_ctx, sdk_version)
+        cli_ctx.data['batch_argument_cache'] = cache
+    return cli_ctx.data['batch_argument_cache']
+
+
+def encode_setting(value, references):
+    """Convert an argument setting to JSON. Functions and classes are stored as
+    references to the known objects they are.
+    :param value: The setting value.
+    :param dict references: Known objects by name.
+    :raises: TypeError if the value cannot be converted.
+    """
+    if value is None or isinstance(value, (bool, int, float) + string_types):
+        return value
+    if isinstance(value, (list, tuple)):
+        return [encode_setting(v, references) for v in value]
+    if getattr(value, '__module__', None) == validators.__name__ and \
+            getattr(validators, getattr(value, '__name__', ''), None) is value:
+        return {'$ref': 'validators.' + value.__name__}
+    for name, reference in references.items():
+        if value is reference or value == reference:
+            return {'$ref': name}
+        if isinstance(reference, type) and type(value) is reference:  # pylint: disable=unidiomatic-typecheck
+            return {'$ref': name, 'instance': True}
+    raise TypeError("Cannot serialize argument setting {!r}".format(value))
+
+
+def decode_setting(value, references):
+    """Restore an argument setting converted by `encode_setting`.
+    :param value: The JSON setting value.
+    :param dict references: Known objects by name.
+    """
+    if isinstance(value, list):
+        return [decode_setting(v, references) for v in value]
+    if not isinstance(value, dict):
+        return value
+    name = value['$ref']
+    if name.startswith('validators.'):
+        return getattr(validators, name[11:])
+    if value.get('instance'):
+        return references[name]()
+    return references[name]
@@ -8,16 +8,19 @@ from six import string_types
 
 from knack.arguments import CLICommandArgument, IgnoreAction
 from knack.introspection import extract_full_summary_from_signature, extract_args_from_signature
+from knack.log import get_logger
 
 from azure.cli.command_modules.batch import _validators as validators
 from azure.cli.command_modules.batch import _format as transformers
 from azure.cli.command_modules.batch import _parameter_format as pformat
+from azure.cli.command_modules.batch._argument_cache import get_argument_cache, encode_setting, decode_setting
 
 from azure.cli.core import EXCLUDED_PARAMS
 from azure.cli.core.commands import CONFIRM_PARAM_NAME
 from azure.cli.core.commands import AzCommandGroup
 from azure.cli.core.util import get_file_json
 
+logger = get_logger(__name__)
 
 _CLASS_NAME = re.compile(r"~(.*)")  # Strip model name from class docstring
 _UNDERSCORE_CASE = re.compile('(?!^)([A-Z]+)')  # Convert from CamelCase to underscore_case
@@ -325,6 +328,22 @@ class BatchArgumentTree(object):
         """
         return self._arg_tree.pop(name, {})
 
+    def dump(self):
+        """Get the state of the tree to be restored by `load`. The argument
+        options are left out as they are only used while compiling arguments.
+        :returns: dict
+        """
+        arg_tree = {name: {k: v for k, v in details.items() if k != 'options'}
+                    for name, details in self._arg_tree.items()}
+        return {'arg_tree': arg_tree, 'request_param': dict(self._request_param)}
+
+    def load(self, state):
+        """Restore the state of the tree saved by `dump`.
+        :param dict state: The saved state.
+        """
+        self._arg_tree = {name: dict(details, options={}) for name, details in state['arg_tree'].items()}
+        self._request_param = dict(state['request_param'])
+
     def compile_args(self):
         """Generator to convert pending arguments into CLICommandArgument
         objects.
@@ -449,6 +468,7 @@ class AzureBatchDataPlaneCommand(object):
         self._options_attrs = []
         # The loaded options model to populate for the request
         self._options_model = None
+        self._options_model_name = None
 
         def _get_operation():
             if not self._operation_func:
@@ -457,7 +477,21 @@ class AzureBatchDataPlaneCommand(object):
             return self._operation_func
 
         def _load_arguments():
-            return self._load_transformed_arguments(_get_operation())
+            cli_ctx = getattr(command_loader, 'cli_ctx', None)
+            cache = get_argument_cache(cli_ctx) if cli_ctx else None
+            cache_key = '{}:{}'.format(operation, self._flatten)
+            cached = cache.get(cache_key) if cache else None
+            if cached:
+                try:
+                    return self._restore_arguments(cached)
+                except (KeyError, TypeError, ValueError, AttributeError) as ex:
+                    logger.debug("Ignoring invalid cached arguments of '%s': %s", operation, ex)
+            args = self._load_transformed_arguments(_get_operation())
+            if cache:
+                cached = self._dump_arguments(args)
+                if cached:
+                    cache.set(cache_key, cached)
+            return args
 
         def _load_descriptions():
             return extract_full_summary_from_signature(_get_operation())
@@ -576,6 +610,8 @@ class AzureBatchDataPlaneCommand(object):
         """Build request options model from command line arguments.
         :param dict kwargs: The request arguments being built.
         """
+        if self._options_model is None and self._options_model_name:
+            self._options_model = _load_model(self._options_model_name)()
         kwargs[self._options_param] = self._options_model
         for param in self._options_attrs:
             if param in pformat.IGNORE_OPTIONS:
@@ -590,10 +626,65 @@ class AzureBatchDataPlaneCommand(object):
         :param func func_obj: The request function.
         """
         option_type = find_param_type(func_obj, self._options_param)
-        option_type = class_name(option_type)
-        self._options_model = _load_model(option_type)()
+        self._options_model_name = class_name(option_type)
+        self._options_model = _load_model(self._options_model_name)()
         self._options_attrs = list(self._options_model.__dict__.keys())
 
+    def _validate_required_parameter(self, namespace):
+        validators.validate_required_parameter(namespace, self.parser)
+
+    def _get_argument_references(self):
+        """Get the objects that argument settings may refer to, by name, in order
+        to cache the arguments.
+        """
+        from azure.cli.core.commands.parameters import file_type
+        from argcomplete.completers import FilesCompleter, DirectoriesCompleter
+        return {
+            'file_type': file_type,
+            'IgnoreAction': IgnoreAction,
+            'FilesCompleter': FilesCompleter,
+            'DirectoriesCompleter': DirectoriesCompleter,
+            'validate_required_parameter': self._validate_required_parameter
+        }
+
+    def _dump_arguments(self, args):
+        """Serialize loaded arguments, along with the state needed to run the
+        command, for the argument cache.
+        :param list args: The loaded arguments.
+        :returns: dict or None if an argument cannot be serialized.
+        """
+        references = self._get_argument_references()
+        try:
+            arguments = [[name, {k: encode_setting(v, references) for k, v in arg.type.settings.items()}]
+                         for name, arg in args]
+        except TypeError as ex:
+            logger.debug("Arguments will not be cached: %s", ex)
+            return None
+        return {
+            'arguments': arguments,
+            'parser': self.parser.dump(),
+            'options_model': self._options_model_name,
+            'options_attrs': self._options_attrs,
+            'head_cmd': self._head_cmd
+        }
+
+    def _restore_arguments(self, cached):
+        """Restore arguments serialized by `_dump_arguments` without loading the
+        SDK operation and models.
+        :param dict cached: The serialized arguments.
+        :returns: list of arguments.
+        """
+        references = self._get_argument_references()
+        args = [(name, CLICommandArgument(**{k: decode_setting(v, references) for k, v in settings.items()}))
+                for name, settings in cached['arguments']]
+        self.parser = BatchArgumentTree(self.validator)
+        self.parser.load(cached['parser'])
+        self._options_model_name = cached['options_model']
+        self._options_model = None
+        self._options_attrs = cached['options_attrs']
+        self._head_cmd = cached['head_cmd']
+        return args
+
     def _should_flatten(self, param):
         """Check whether the current parameter object should be flattened.
         :param str param: The parameter name with complete namespace.
@@ -689,8 +780,7 @@ class AzureBatchDataPlaneCommand(object):
                 options['required'] = False
                 options['arg_group'] = group_title(path)
                 options['help'] = find_param_help(param_model, param_attr)
-                options['validator'] = \
-                    lambda ns: validators.validate_required_parameter(ns, self.parser)
+                options['validator'] = self._validate_required_parameter
                 options['default'] = None  # Extract details from signature
 
                 if details['type'] in pformat.BASIC_TYPES:
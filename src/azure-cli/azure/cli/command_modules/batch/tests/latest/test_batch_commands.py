@@ -3,6 +3,7 @@
 # Licensed under the MIT License. See License.txt in the project root for license information.
 # --------------------------------------------------------------------------------------------
 
+import json
 import os
 import unittest
 import datetime
@@ -618,3 +619,73 @@ class TestBatchLoader(unittest.TestCase):  # pylint: disable=protected-access
         option = [arg for (name, arg) in args if name == 'node_reboot_option'][0]
         self.assertIsNotNone(option.choices)
         self.assertFalse([a for a in option.choices if "'" in a])
+
+    def test_batch_cached_arguments(self):
+        def _settings(args):
+            return [(name, {k: list(v) if isinstance(v, tuple) else v for k, v in arg.type.settings.items()
+                            if k not in ['completer', 'validator']})
+                    for name, arg in args]
+
+        handler = operations.pool_operations.PoolOperations.add
+        args = list(self.command_pool._load_transformed_arguments(handler))
+        cached = json.loads(json.dumps(self.command_pool._dump_arguments(args)))
+
+        command = _command_type.AzureBatchDataPlaneCommand(
+            'azure.batch.operations.pool_operations#PoolOperations.add', None)
+        restored = command._restore_arguments(cached)
+        self.assertEqual(_settings(restored), _settings(args))
+        validator = [a for n, a in restored if n == 'vm_size'][0].validator
+        self.assertEqual(validator, command._validate_required_parameter)
+        self.assertEqual([a for n, a in restored if n == 'json_file'][0].completer.__class__.__name__,
+                         'FilesCompleter')
+
+        # the restored parser still validates the request body
+        namespace = TestObj()
+        for name, _ in restored:
+            setattr(namespace, name, None)
+        namespace.id = 'pool_id'
+        with self.assertRaises(ValueError):
+            validator(namespace)
+        namespace.vm_size = 'small'
+        validator(namespace)
+
+        # the options model is only loaded when the request is built
+        self.assertIsNone(command._options_model)
+        kwargs = {attr: None for attr in command._options_attrs}
+        command._build_options(kwargs)
+        self.assertIsInstance(kwargs['pool_add_options'], models.PoolAddOptions)
+
+    def test_batch_cached_arguments_skips_unknown_settings(self):
+        handler = operations.job_operations.JobOperations.list
+        args = list(self.command_list._load_transformed_arguments(handler))
+        args.append(('custom', _command_type.CLICommandArgument('custom', type=lambda x: x)))
+        self.assertIsNone(self.command_list._dump_arguments(args))
+
+    def test_batch_argument_cache_is_discarded_when_sources_change(self):
+        import shutil
+        import tempfile
+        from azure.cli.command_modules.batch import _argument_cache
+
+        config_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, config_dir)
+        cli_ctx = mock.MagicMock()
+        cli_ctx.config.config_dir = config_dir
+
+        _argument_cache.ArgumentCache(cli_ctx, '1.0').set('key', {'arguments': []})
+        self.assertEqual(_argument_cache.ArgumentCache(cli_ctx, '1.0').get('key'), {'arguments': []})
+        self.assertIsNone(_argument_cache.ArgumentCache(cli_ctx, '2.0').get('key'))
+
+        _argument_cache.ArgumentCache(cli_ctx, '1.0').set('key', {'arguments': []})
+        with mock.patch.object(_argument_cache, '_get_source_stamp', return_value='0:0'):
+            self.assertIsNone(_argument_cache.ArgumentCache(cli_ctx, '1.0').get('key'))
+
+    def test_batch_argument_cache_disabled(self):
+        from azure.cli.command_modules.batch import _argument_cache
+
+        cli_ctx = mock.MagicMock()
+        cli_ctx.data = {}
+        cli_ctx.config.getboolean.return_value = False
+        self.assertIsNone(_argument_cache.get_argument_cache(cli_ctx))
+        cli_ctx.config.getboolean.assert_called_once_with('batch', 'argument_cache', True)
+        self.assertIsNone(_argument_cache.get_argument_cache(cli_ctx))
+        self.assertEqual(cli_ctx.config.getboolean.call_count, 1)
@@ -4,11 +4,13 @@
 # --------------------------------------------------------------------------------------------
 
 import os
+import time
 
 from knack.log import get_logger
 from knack.util import CLIError
 
 from azure.cli.core import __version__ as core_version
+from azure.cli.core._session import SessionCache
 
 
 logger = get_logger(__name__)
@@ -25,6 +27,65 @@ UA_AGENT = "AZURECLI/{}".format(core_version)
 ENV_ADDITIONAL_USER_AGENT = 'AZURE_HTTP_USER_AGENT'
 
 
+# master keys of the accounts by account id, kept in memory only so that commands run in the same process, as by
+# `az interactive`, don't list the keys every time. They are evicted when a request is unauthorized.
+_account_keys = {}
+
+
+def evict_account_keys():
+    _account_keys.clear()
+
+
+class _AccountCache(SessionCache):
+    """
+    Caches the document endpoint of Cosmos DB accounts in the config directory, so data plane commands given a
+    resource group and an account name do not get the account from the management plane every time. Keys are never
+    saved. Entries expire after `cosmosdb.account_cache_ttl` minutes; 0 disables the cache.
+    """
+    FILE_NAME = 'cosmosdbAccountCache.json'
+    TTL_CONFIG = ('cosmosdb', 'account_cache_ttl')
+
+    def __init__(self, cli_ctx):
+        super(_AccountCache, self).__init__(cli_ctx)
+        if self.ttl > 0 and self._remove_expired():
+            self._save()
+
+    def _remove_expired(self):
+        expired = [k for k, v in self._session.data.items() if not isinstance(v, list) or not self.is_fresh(v[1])]
+        for account_id in expired:
+            del self._session.data[account_id]
+        return expired
+
+    def _save(self):
+        self._remove_expired()
+        self.save()
+        try:
+            # an existing file keeps its mode when it is written
+            os.chmod(self._session.filename, 0o600)
+        except (OSError, IOError) as ex:
+            logger.debug("Failed to restrict the access to the Cosmos DB account cache: %s", ex)
+
+    def get(self, account_id):
+        """ Returns the cached document endpoint of the account, or None if it is not cached or has expired. """
+        if self.ttl <= 0:
+            return None
+        entry = self._session.get(account_id.lower())
+        return entry[0] if entry and self.is_fresh(entry[1]) else None
+
+    def update(self, account_id, endpoint):
+        if self.ttl <= 0:
+            return
+        self._session.data[account_id.lower()] = [endpoint, time.time()]
+        self._save()
+
+
+def _get_account_id(cli_ctx, resource_group, name):
+    from azure.cli.core.commands.client_factory import get_subscription_id
+    from msrestazure.tools import resource_id
+    return resource_id(subscription=get_subscription_id(cli_ctx), resource_group=resource_group,
+                       namespace='Microsoft.DocumentDB', type='databaseAccounts', name=name)
+
+
 def _add_headers(client):
     agents = [client.default_headers['User-Agent'], UA_AGENT]
     try:
@@ -45,14 +106,21 @@ def cf_cosmosdb_document(cli_ctx, kwargs):
         url_connection = kwargs.pop('db_url_connection', None)
         resource_group = kwargs.pop('db_resource_group_name', None)
 
-        if name and resource_group and not key:
+        account_id = _get_account_id(cli_ctx, resource_group, name).lower() if name and resource_group else None
+        if account_id and not key:
             # if resource group name is provided find key
-            keys = cf_cosmosdb(cli_ctx).database_accounts.list_keys(resource_group, name)
-            key = keys.primary_master_key
-
-        if name and resource_group and not url_connection:
-            database_account = cf_cosmosdb(cli_ctx).database_accounts.get(resource_group, name)
-            url_connection = database_account.document_endpoint
+            key = _account_keys.get(account_id)
+            if not key:
+                keys = cf_cosmosdb(cli_ctx).database_accounts.list_keys(resource_group, name)
+                key = _account_keys[account_id] = keys.primary_master_key
+
+        if account_id and not url_connection:
+            cache = _AccountCache(cli_ctx)
+            url_connection = cache.get(account_id)
+            if not url_connection:
+                database_account = cf_cosmosdb(cli_ctx).database_accounts.get(resource_group, name)
+                url_connection = database_account.document_endpoint
+                cache.update(account_id, url_connection)
 
         if name and not url_connection:
             url_connection = 'https://{}.documents.azure.com:443'.format(name)
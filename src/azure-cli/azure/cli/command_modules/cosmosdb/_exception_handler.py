@@ -12,6 +12,15 @@ from knack.util import CLIError
 logger = get_logger(__name__)
 
 
+def unauthorized_exception_handler(ex):
+    # the account keys kept in memory might have been regenerated
+    from azure.cosmos.errors import HTTPFailure
+    if isinstance(ex, HTTPFailure) and ex.status_code in (401, 403):
+        from ._client_factory import evict_account_keys
+        evict_account_keys()
+    raise ex
+
+
 def duplicate_resource_exception_handler(ex):
     # wraps DocumentDB 409 error in CLIError
     from azure.cosmos.errors import HTTPFailure
@@ -88,7 +97,8 @@ def network_exception_handler(ex):
 
 def generic_exception_handler(ex):
     logger.debug(ex)
-    chained_handler = exception_handler_chain_builder([duplicate_resource_exception_handler,
+    chained_handler = exception_handler_chain_builder([unauthorized_exception_handler,
+                                                       duplicate_resource_exception_handler,
                                                        resource_not_found_exception_handler,
                                                        invalid_arg_found_exception_handler,
                                                        unknown_server_failure_exception_handler,
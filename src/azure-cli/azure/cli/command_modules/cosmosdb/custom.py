@@ -468,11 +468,10 @@ def cli_cosmosdb_collection_create(client,
 
 def _find_offer(client, collection_self_link):
     logger.debug('finding offer')
-    offers = client.ReadOffers()
-    for o in offers:
-        if o['resource'] == collection_self_link:
-            return o
-    return None
+    offers = client.QueryOffers(
+        {'query': 'SELECT * FROM root r WHERE r.resource=@link',
+         'parameters': [{'name': '@link', 'value': collection_self_link}]})
+    return next(iter(offers), None)
 
 
 def cli_cosmosdb_collection_update(client,
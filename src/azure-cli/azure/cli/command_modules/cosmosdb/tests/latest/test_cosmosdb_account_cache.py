@@ -0,0 +1,98 @@
+# --------------------------------------------------------------------------------------------
+# Copyright (c) Microsoft Corporation. All rights reserved.
+# Licensed under the MIT License. See License.txt in the project root for license information.
+# --------------------------------------------------------------------------------------------
+
+import io
+import json
+import os
+import shutil
+import stat
+import tempfile
+import time
+import unittest
+
+try:
+    import unittest.mock as mock
+except ImportError:
+    import mock
+
+from knack.util import CLIError
+
+from azure.cli.command_modules.cosmosdb import _client_factory
+
+
+class CosmosDBAccountCacheTest(unittest.TestCase):
+
+    def setUp(self):
+        self.config_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.config_dir)
+        self.filename = os.path.join(self.config_dir, _client_factory._AccountCache.FILE_NAME)  # pylint: disable=protected-access
+        self.cli_ctx = mock.MagicMock()
+        self.cli_ctx.config.config_dir = self.config_dir
+        self.cli_ctx.config.getint.return_value = 5
+        self.cli_ctx.data = {'subscription_id': 'sub'}
+
+        self.accounts = mock.MagicMock()
+        self.accounts.list_keys.return_value.primary_master_key = 'a2V5'
+        self.accounts.get.return_value.document_endpoint = 'https://acc.documents.azure.com:443/'
+        patcher = mock.patch('azure.cli.command_modules.cosmosdb._client_factory.cf_cosmosdb')
+        patcher.start().return_value.database_accounts = self.accounts
+        self.addCleanup(patcher.stop)
+        patcher = mock.patch('azure.cosmos.cosmos_client.CosmosClient', __name__='CosmosClient')
+        self.client_type = patcher.start()
+        self.client_type.return_value.default_headers = {'User-Agent': 'azure-cosmos'}
+        self.addCleanup(patcher.stop)
+        _client_factory.evict_account_keys()
+
+    def _get_client(self, **kwargs):
+        kwargs = dict({'db_account_name': 'acc', 'db_resource_group_name': 'rg'}, **kwargs)
+        _client_factory.cf_cosmosdb_document(self.cli_ctx, kwargs)
+
+    def test_cosmosdb_account_endpoint_is_cached(self):
+        for _ in range(3):
+            self._get_client()
+        self.client_type.assert_called_with(url_connection='https://acc.documents.azure.com:443/',
+                                            auth={'masterKey': 'a2V5'})
+        self.assertEqual(self.accounts.get.call_count, 1)
+        # the key is only kept in memory
+        self.assertEqual(self.accounts.list_keys.call_count, 1)
+        with io.open(self.filename, encoding='utf-8-sig') as f:
+            self.assertNotIn('a2V5', f.read())
+
+        # a 0 TTL disables the cache
+        self.cli_ctx.config.getint.return_value = 0
+        self._get_client()
+        self.assertEqual(self.accounts.get.call_count, 2)
+
+    def test_cosmosdb_account_key_is_evicted_when_unauthorized(self):
+        from azure.cosmos.errors import HTTPFailure
+        from azure.cli.command_modules.cosmosdb._exception_handler import generic_exception_handler
+
+        self._get_client()
+        self._get_client()
+        self.assertEqual(self.accounts.list_keys.call_count, 1)
+
+        with self.assertRaises(CLIError):
+            generic_exception_handler(HTTPFailure(401, 'The input authorization token can\'t serve the request.'))
+        self._get_client()
+        self.assertEqual(self.accounts.list_keys.call_count, 2)
+
+    def test_cosmosdb_account_cache_removes_expired_entries(self):
+        with open(self.filename, 'w') as f:
+            json.dump({'expired': ['https://expired.documents.azure.com:443/', time.time() - 600],
+                       'legacy': {'key': ['a2V5', time.time()]}}, f)
+        if os.name != 'nt':
+            os.chmod(self.filename, 0o644)
+
+        self._get_client()
+        with io.open(self.filename, encoding='utf-8-sig') as f:
+            self.assertEqual(list(json.load(f)),
+                             ['/subscriptions/sub/resourcegroups/rg/providers/microsoft.documentdb/'
+                              'databaseaccounts/acc'])
+        if os.name != 'nt':
+            self.assertEqual(stat.S_IMODE(os.stat(self.filename).st_mode), 0o600)
+
+
+if __name__ == '__main__':
+    unittest.main()
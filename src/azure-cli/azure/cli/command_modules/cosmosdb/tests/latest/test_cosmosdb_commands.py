@@ -3,7 +3,7 @@
 # Licensed under the MIT License. See License.txt in the project root for license information.
 # --------------------------------------------------------------------------------------------
 
-from azure.cli.testsdk import JMESPathCheck, ScenarioTest, ResourceGroupPreparer
+from azure.cli.testsdk import JMESPathCheck, ScenarioTest, ResourceGroupPreparer, live_only
 from knack.util import CLIError
 
 
@@ -325,6 +325,8 @@ class CosmosDBTests(ScenarioTest):
         self.cmd('az cosmosdb database delete -g {rg} -n {acc} -d {db_name}')
         assert not self.cmd('az cosmosdb database exists -g {rg} -n {acc} -d {db_name}').get_output_in_json()
 
+    # the recording predates querying the offer of the collection and must be re-recorded live
+    @live_only()
     @ResourceGroupPreparer(name_prefix='cli_test_cosmosdb_collection')
     def test_cosmosdb_collection(self, resource_group):
 
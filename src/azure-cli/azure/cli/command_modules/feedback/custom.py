@@ -653,6 +653,8 @@ def _get_az_version_summary():
 
 def _get_command_log_files(cli_ctx, time_now=None):
     command_logs_dir = cli_ctx.logging.get_command_log_dir()
+    if not os.path.isdir(command_logs_dir):
+        return []
     files = os.listdir(command_logs_dir)
     files = (file_name for file_name in files if file_name.endswith(".log"))
     files = sorted(files)
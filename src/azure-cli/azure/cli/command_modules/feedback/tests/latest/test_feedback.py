@@ -6,6 +6,8 @@
 import datetime
 import logging
 import os
+import shutil
+import tempfile
 import time
 import unittest
 
@@ -21,6 +23,11 @@ from azure.cli.testsdk import ScenarioTest
 from azure.cli.testsdk.base import execute
 from azure.cli.testsdk.reverse_dependency import get_dummy_cli
 
+try:
+    import unittest.mock as mock
+except ImportError:
+    import mock
+
 # pylint: disable=line-too-long
 # pylint: disable=too-many-lines
 
@@ -203,5 +210,21 @@ class TestCommandLogFile(ScenarioTest):
         return result
 
 
+class TestCommandLogFilesEmptyConfigDir(unittest.TestCase):
+
+    def setUp(self):
+        self.config_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.config_dir)
+        self.cli_ctx = mock.MagicMock()
+        self.cli_ctx.logging.get_command_log_dir.return_value = os.path.join(self.config_dir, 'commands')
+
+    def test_get_command_log_files_missing_dir(self):
+        self.assertEqual(_get_command_log_files(self.cli_ctx), [])
+
+    def test_get_command_log_files_empty_dir(self):
+        os.mkdir(os.path.join(self.config_dir, 'commands'))
+        self.assertEqual(_get_command_log_files(self.cli_ctx), [])
+
+
 if __name__ == '__main__':
     unittest.main()
@@ -3,6 +3,33 @@
 # Licensed under the MIT License. See License.txt in the project root for license information.
 # --------------------------------------------------------------------------------------------
 
+import threading
+import time
+from datetime import datetime
+
+# data plane tokens by account, resource and scope, shared by the clients of the process
+_data_plane_tokens = {}
+_data_plane_tokens_lock = threading.Lock()
+
+# tokens are renewed this many seconds before they expire
+TOKEN_EXPIRY_MARGIN = 300
+
+
+def _get_token_expiry(token_entry):
+    """ Returns when a token expires as a POSIX timestamp, or None if it isn't known. """
+    # ADAL tokens expire on a local time, managed identity tokens on a timestamp
+    expires_on = token_entry.get('expiresOn') or token_entry.get('expires_on')
+    try:
+        return float(expires_on)
+    except (TypeError, ValueError):
+        pass
+    for date_format in ['%Y-%m-%d %H:%M:%S.%f', '%Y-%m-%d %H:%M:%S']:
+        try:
+            return time.mktime(datetime.strptime(expires_on, date_format).timetuple())
+        except (TypeError, ValueError):
+            pass
+    return None
+
 
 def keyvault_client_factory(cli_ctx, **_):
     from azure.cli.core.commands.client_factory import get_mgmt_service_client
@@ -23,7 +50,17 @@ def keyvault_data_plane_factory(cli_ctx, _):
         import adal
         from azure.cli.core._profile import Profile
         try:
-            return Profile(cli_ctx=cli_ctx).get_raw_token(resource)[0]
+            profile = Profile(cli_ctx=cli_ctx)
+            account = profile.get_subscription()
+            key = (account['tenantId'], account['user']['name'], resource, scope)
+            with _data_plane_tokens_lock:
+                creds, expiry = _data_plane_tokens.get(key, (None, None))
+                if not creds or expiry - time.time() < TOKEN_EXPIRY_MARGIN:
+                    creds = profile.get_raw_token(resource)[0]
+                    expiry = _get_token_expiry(creds[2])
+                    if expiry:
+                        _data_plane_tokens[key] = (creds, expiry)
+                return creds
         except adal.AdalError as err:
             from knack.util import CLIError
             # pylint: disable=no-member
@@ -12,6 +12,19 @@ type: group
 short-summary: Manage KeyVault keys, secrets, and certificates.
 """
 
+helps['keyvault backup'] = """
+type: command
+short-summary: Back up the keys, secrets and certificates of a key vault to a directory.
+long-summary: >
+    The objects are listed once and backed up concurrently, retrying requests throttled by the vault. Each backup is
+    saved in a subdirectory per type, and manifest.json lists the files and the objects which failed. A backup can be
+    restored with `az keyvault key/secret/certificate restore`. Keys and secrets which back a certificate are part of
+    the certificate's backup.
+examples:
+  - name: Back up the keys and secrets of a key vault.
+    text: az keyvault backup --name MyKeyVault --directory ./MyKeyVaultBackup --types key secret
+"""
+
 helps['keyvault certificate'] = """
 type: group
 short-summary: Manage certificates.
@@ -129,6 +142,18 @@ examples:
     crafted: true
 """
 
+helps['keyvault download'] = """
+type: command
+short-summary: Download the secrets and certificates of a key vault to a directory.
+long-summary: >
+    The objects are listed once and downloaded concurrently, retrying requests throttled by the vault. Each object is
+    saved like `az keyvault secret/certificate download` does, in a subdirectory per type, and manifest.json lists the
+    files and the objects which failed.
+examples:
+  - name: Download the secrets of a key vault.
+    text: az keyvault download --name MyKeyVault --directory ./MyKeyVaultSecrets --types secret
+"""
+
 helps['keyvault key'] = """
 type: group
 short-summary: Manage keys.
@@ -91,6 +91,13 @@ def load_arguments(self, _):
         c.argument('ip_address', help='IPv4 address or CIDR range.')
         c.argument('subnet', help='Name or ID of subnet. If name is supplied, `--vnet-name` must be supplied.')
         c.argument('vnet_name', help='Name of a virtual network.', validator=validate_subnet)
+
+    for scope, verb, object_types in [('backup', 'back up', ['key', 'secret', 'certificate']),
+                                      ('download', 'download', ['secret', 'certificate'])]:
+        with self.argument_context('keyvault ' + scope) as c:
+            c.argument('vault_base_url', vault_name_type, options_list=['--name', '-n'], type=get_vault_base_url_type(self.cli_ctx))
+            c.argument('directory', options_list=['--directory', '-d'], help='Directory to create, in which to store a file per object and a manifest.')
+            c.argument('object_types', options_list=['--types'], nargs='+', arg_type=get_enum_type(object_types), help='Space-separated list of the types of objects to {}. Default: all.'.format(verb))
     # endregion
 
     # region Shared
@@ -7,13 +7,18 @@ import argparse
 import base64
 import binascii
 from datetime import datetime
+import os
 import re
+import time
 
+from knack.log import get_logger
 from knack.util import CLIError
 
+from azure.cli.core._session import SessionCache
 from azure.cli.core.commands.client_factory import get_mgmt_service_client
 from azure.cli.core.commands.validators import validate_tags
 
+logger = get_logger(__name__)
 
 secret_text_encoding_values = ['utf-8', 'utf-16le', 'utf-16be', 'ascii']
 secret_binary_encoding_values = ['base64', 'hex']
@@ -23,6 +28,49 @@ def _extract_version(item_id):
     return item_id.split('/')[-1]
 
 
+class _VaultResourceGroupCache(SessionCache):
+    """
+    Caches the resource IDs of the vaults of a subscription by vault name in the config directory, so commands given
+    only a vault name do not list every vault in the subscription to find its resource group.
+    Entries expire after `keyvault.vault_cache_ttl` minutes; 0 disables the cache.
+    """
+    FILE_NAME = 'keyvaultResourceGroupCache.json'
+    TTL_CONFIG = ('keyvault', 'vault_cache_ttl')
+
+    def _get_vaults(self, subscription_id):
+        vaults = self._session.get(subscription_id.lower()) or {}
+        return {k: v for k, v in vaults.items() if self.is_fresh(v[1])}
+
+    def _save(self, subscription_id, vaults):
+        self._session.data[subscription_id.lower()] = vaults
+        self.save()
+
+    def get(self, subscription_id, vault_name):
+        """ Returns the cached resource ID of the vault, or None if it is not cached or has expired. """
+        if self.ttl <= 0:
+            return None
+        entry = self._get_vaults(subscription_id).get(vault_name)
+        return entry[0] if entry else None
+
+    def update(self, subscription_id, vault_ids, replace=False):
+        """
+        Caches the resource IDs of vaults by name. With `replace`, `vault_ids` are all the vaults of the subscription.
+        """
+        if self.ttl <= 0:
+            return
+        now = time.time()
+        vaults = {} if replace else self._get_vaults(subscription_id)
+        vaults.update({k: [v, now] for k, v in vault_ids.items()})
+        self._save(subscription_id, vaults)
+
+    def remove(self, subscription_id, vault_name):
+        if self.ttl <= 0:
+            return
+        vaults = self._get_vaults(subscription_id)
+        if vaults.pop(vault_name, None):
+            self._save(subscription_id, vaults)
+
+
 def _get_resource_group_from_vault_name(cli_ctx, vault_name):
     """
     Fetch resource group from vault name
@@ -31,14 +79,27 @@ def _get_resource_group_from_vault_name(cli_ctx, vault_name):
     :rtype: str
     """
     from azure.cli.core.profiles import ResourceType
+    from msrestazure.azure_exceptions import CloudError
     from msrestazure.tools import parse_resource_id
 
     client = get_mgmt_service_client(cli_ctx, ResourceType.MGMT_KEYVAULT).vaults
-    for vault in client.list():
-        id_comps = parse_resource_id(vault.id)
-        if id_comps['name'] == vault_name:
-            return id_comps['resource_group']
-    return None
+    subscription_id = client.config.subscription_id
+    cache = _VaultResourceGroupCache(cli_ctx)
+    vault_id = cache.get(subscription_id, vault_name)
+    if vault_id:
+        try:
+            client.get(parse_resource_id(vault_id)['resource_group'], vault_name)
+        except CloudError as ex:
+            if ex.status_code != 404:
+                raise
+            # the vault has been deleted or moved since it was cached
+            cache.remove(subscription_id, vault_name)
+            vault_id = None
+    if not vault_id:
+        vault_ids = {parse_resource_id(vault.id)['name']: vault.id for vault in client.list()}
+        cache.update(subscription_id, vault_ids, replace=True)
+        vault_id = vault_ids.get(vault_name)
+    return parse_resource_id(vault_id)['resource_group'] if vault_id else None
 
 
 # COMMAND NAMESPACE VALIDATORS
@@ -192,7 +253,6 @@ def validate_x509_certificate_chain(ns):
 
 def certificate_type(string):
     """ Loads file and outputs contents as base64 encoded string. """
-    import os
     with open(os.path.expanduser(string), 'rb') as f:
         cert_data = f.read()
     return cert_data
@@ -48,7 +48,7 @@ def load_command_table(self, _):
         g.custom_command('recover', 'recover_keyvault')
         g.custom_command('list', 'list_keyvault')
         g.show_command('show', 'get')
-        g.command('delete', 'delete')
+        g.custom_command('delete', 'delete_keyvault')
         g.command('purge', 'purge_deleted')
         g.custom_command('set-policy', 'set_policy')
         g.custom_command('delete-policy', 'delete_policy')
@@ -65,6 +65,10 @@ def load_command_table(self, _):
         g.custom_command('list', 'list_network_rules')
 
     # Data Plane Commands
+    with self.command_group('keyvault', kv_data_sdk) as g:
+        g.keyvault_custom('backup', 'backup_vault')
+        g.keyvault_custom('download', 'download_vault')
+
     with self.command_group('keyvault key', kv_data_sdk) as g:
         g.keyvault_command('list', 'get_keys')
         g.keyvault_command('list-versions', 'get_key_versions')
@@ -6,6 +6,7 @@
 # pylint: disable=too-many-lines
 
 import codecs
+import functools
 import json
 import os
 import time
@@ -22,8 +23,9 @@ from cryptography.exceptions import UnsupportedAlgorithm
 
 from azure.cli.core import telemetry
 from azure.cli.core.profiles import ResourceType
+from azure.cli.core.util import get_max_concurrent_workers
 
-from ._validators import secret_text_encoding_values
+from ._validators import secret_text_encoding_values, _VaultResourceGroupCache
 
 logger = get_logger(__name__)
 
@@ -235,6 +237,14 @@ def get_default_policy(cmd, client, scaffold=False):  # pylint: disable=unused-a
     return _scaffold_certificate_profile(cmd) if scaffold else _default_certificate_profile(cmd)
 
 
+def _cache_vault_resource_group(cli_ctx, client, resource_group_name, vault_name):
+    from msrestazure.tools import resource_id
+    subscription_id = client.config.subscription_id
+    vault_id = resource_id(subscription=subscription_id, resource_group=resource_group_name,
+                           namespace='Microsoft.KeyVault', type='vaults', name=vault_name)
+    _VaultResourceGroupCache(cli_ctx).update(subscription_id, {vault_name: vault_id})
+
+
 def recover_keyvault(cmd, client, vault_name, resource_group_name, location):
     from azure.cli.core._profile import Profile
 
@@ -252,9 +262,11 @@ def recover_keyvault(cmd, client, vault_name, resource_group_name, location):
                                                        'sku': Sku(name=SkuName.standard.value),
                                                        'create_mode': CreateMode.recover.value})
 
-    return client.create_or_update(resource_group_name=resource_group_name,
-                                   vault_name=vault_name,
-                                   parameters=params)
+    result = client.create_or_update(resource_group_name=resource_group_name,
+                                     vault_name=vault_name,
+                                     parameters=params)
+    _cache_vault_resource_group(cmd.cli_ctx, client, resource_group_name, vault_name)
+    return result
 
 
 def create_keyvault(cmd, client,  # pylint: disable=too-many-locals
@@ -369,9 +381,17 @@ def create_keyvault(cmd, client,  # pylint: disable=too-many-locals
     parameters = VaultCreateOrUpdateParameters(location=location,
                                                tags=tags,
                                                properties=properties)
-    return client.create_or_update(resource_group_name=resource_group_name,
-                                   vault_name=vault_name,
-                                   parameters=parameters)
+    result = client.create_or_update(resource_group_name=resource_group_name,
+                                     vault_name=vault_name,
+                                     parameters=parameters)
+    _cache_vault_resource_group(cmd.cli_ctx, client, resource_group_name, vault_name)
+    return result
+
+
+def delete_keyvault(cmd, client, resource_group_name, vault_name):
+    result = client.delete(resource_group_name=resource_group_name, vault_name=vault_name)
+    _VaultResourceGroupCache(cmd.cli_ctx).remove(client.config.subscription_id, vault_name)
+    return result
 
 
 def update_keyvault_setter(cmd, client, parameters, resource_group_name, vault_name):
@@ -1003,3 +1023,143 @@ def restore_storage_account(client, vault_base_url, file_path):
         data = file_in.read()
         return client.restore_storage_account(vault_base_url, data)
 # endregion
+
+
+# region vault backup and download
+KEYVAULT_MAX_WORKERS = 10
+KEYVAULT_MAX_ATTEMPTS = 5
+KEYVAULT_MANIFEST_FILE_NAME = 'manifest.json'
+
+
+def _get_retry_delay(retry_after, attempt):
+    """ Get the seconds to wait before retrying a throttled request. A vault asks for a delay in its Retry-After
+    header; otherwise the delay doubles on every attempt. """
+    try:
+        return max(0, int(retry_after))
+    except (TypeError, ValueError):
+        return 2 ** attempt
+
+
+def _call_with_retry(func):
+    """ Call func, and call it again when the vault throttles the request or is unavailable. """
+    for attempt in range(KEYVAULT_MAX_ATTEMPTS):
+        try:
+            return func()
+        except Exception as ex:  # pylint: disable=broad-except
+            response = getattr(ex, 'response', None)
+            if getattr(response, 'status_code', None) not in [429, 503] or attempt == KEYVAULT_MAX_ATTEMPTS - 1:
+                raise
+            delay = _get_retry_delay(response.headers.get('Retry-After'), attempt)
+            logger.debug("Request throttled by the vault, retrying in %s seconds.", delay)
+            time.sleep(delay)
+
+
+def _get_error_message(ex):
+    try:
+        return ex.inner_exception.error.message
+    except AttributeError:
+        return str(ex)
+
+
+def _list_vault_objects(client, vault_base_url, object_types):
+    """ List the names of the keys, secrets and certificates of a vault. Keys and secrets backing a certificate are
+    left out, they are part of the certificate. """
+    list_operations = {
+        'key': client.get_keys,
+        'secret': client.get_secrets,
+        'certificate': client.get_certificates
+    }
+    objects = []
+    for object_type in object_types:
+        # the pages are requested while they are listed, so the whole listing is retried
+        items = _call_with_retry(functools.partial(_list_all, list_operations[object_type], vault_base_url))
+        objects.extend((object_type, _extract_name(item.kid if object_type == 'key' else item.id))
+                       for item in items if not getattr(item, 'managed', None))
+    return objects
+
+
+def _list_all(list_operation, vault_base_url):
+    return list(list_operation(vault_base_url))
+
+
+def _extract_name(item_id):
+    return item_id.rstrip('/').split('/')[-1]
+
+
+def _save_vault_objects(cmd, vault_base_url, directory, objects, save):
+    """ Save each of the objects of a vault with save(object_type, name, file_path), concurrently, and write a
+    manifest of the saved files. Every object is attempted even if some of them fail. """
+    from datetime import datetime
+
+    if os.path.isfile(directory) or (os.path.isdir(directory) and os.listdir(directory)):
+        raise CLIError("File or non-empty directory named '{}' already exists.".format(directory))
+    for object_type in set(object_type for object_type, _ in objects):
+        os.makedirs(os.path.join(directory, object_type + 's'))
+
+    def _save(obj):
+        object_type, name = obj
+        entry = {'type': object_type, 'name': name, 'file': os.path.join(object_type + 's', name)}
+        try:
+            _call_with_retry(lambda: save(object_type, name, os.path.join(directory, entry['file'])))
+        except Exception as ex:  # pylint: disable=broad-except
+            entry['error'] = _get_error_message(ex)
+            logger.error("Failed to save %s '%s': %s", object_type, name, entry['error'])
+        return entry
+
+    max_workers = get_max_concurrent_workers(cmd.cli_ctx, len(objects), KEYVAULT_MAX_WORKERS)
+    if max_workers == 1:
+        entries = [_save(obj) for obj in objects]
+    else:
+        from concurrent.futures import ThreadPoolExecutor
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            entries = list(executor.map(_save, objects))
+
+    manifest_file = os.path.join(directory, KEYVAULT_MANIFEST_FILE_NAME)
+    manifest = {
+        'vault': vault_base_url,
+        'created': datetime.utcnow().isoformat() + 'Z',
+        'objects': entries
+    }
+    if not os.path.isdir(directory):
+        os.makedirs(directory)
+    with open(manifest_file, 'w') as f:
+        json.dump(manifest, f, indent=2)
+
+    failed = [e['name'] for e in entries if 'error' in e]
+    if failed:
+        raise CLIError("{} of {} objects failed, see '{}': {}".format(
+            len(failed), len(entries), manifest_file, ', '.join(failed)))
+    return manifest
+
+
+def backup_vault(cmd, client, vault_base_url, directory, object_types=None):
+    """ Back up the keys, secrets and certificates of a vault to a directory. """
+    object_types = object_types or ['key', 'secret', 'certificate']
+    if 'certificate' in object_types and \
+            not cmd.supported_api_version(resource_type=ResourceType.DATA_KEYVAULT, min_api='7.0'):
+        logger.warning('Certificates are not backed up, the API version of the profile does not support it.')
+        object_types = [t for t in object_types if t != 'certificate']
+
+    def _backup(object_type, name, file_path):
+        backup_operation = getattr(client, 'backup_' + object_type)
+        backup = backup_operation(vault_base_url, name).value
+        with open(file_path, 'wb') as output:
+            output.write(backup)
+
+    objects = _list_vault_objects(client, vault_base_url, object_types)
+    return _save_vault_objects(cmd, vault_base_url, directory, objects, _backup)
+
+
+def download_vault(cmd, client, vault_base_url, directory, object_types=None):
+    """ Download the secrets and certificates of a vault to a directory. """
+    object_types = object_types or ['secret', 'certificate']
+
+    def _download(object_type, name, file_path):
+        if object_type == 'secret':
+            download_secret(client, file_path, vault_base_url, name)
+        else:
+            download_certificate(client, file_path, vault_base_url, name)
+
+    objects = _list_vault_objects(client, vault_base_url, object_types)
+    return _save_vault_objects(cmd, vault_base_url, directory, objects, _download)
+# endregion
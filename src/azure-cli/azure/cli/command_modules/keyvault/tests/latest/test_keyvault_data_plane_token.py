@@ -0,0 +1,70 @@
+# --------------------------------------------------------------------------------------------
+# Copyright (c) Microsoft Corporation. All rights reserved.
+# Licensed under the MIT License. See License.txt in the project root for license information.
+# --------------------------------------------------------------------------------------------
+
+import datetime
+import time
+import unittest
+
+try:
+    import unittest.mock as mock
+except ImportError:
+    import mock
+
+from azure.cli.core.mock import DummyCli
+from azure.cli.command_modules.keyvault import _client_factory
+
+
+def _get_raw_token(resource, expires_in):
+    expires_on = datetime.datetime.now() + datetime.timedelta(seconds=expires_in)
+    return ('Bearer', 'token-{}'.format(resource), {'expiresOn': expires_on.strftime('%Y-%m-%d %H:%M:%S.%f')}), \
+        'sub', 'tenant'
+
+
+class KeyVaultDataPlaneTokenTest(unittest.TestCase):
+
+    def setUp(self):
+        _client_factory._data_plane_tokens.clear()  # pylint: disable=protected-access
+        self.expires_in = 3600
+        patcher = mock.patch('azure.cli.core._profile.Profile')
+        self.profile = patcher.start().return_value
+        self.addCleanup(patcher.stop)
+        self.profile.get_subscription.return_value = {'tenantId': 'tenant', 'user': {'name': 'user'}}
+        self.profile.get_raw_token.side_effect = lambda resource: _get_raw_token(resource, self.expires_in)
+
+        with mock.patch('azure.keyvault.KeyVaultAuthentication') as authentication:
+            _client_factory.keyvault_data_plane_factory(DummyCli(), None)
+        self.get_token = authentication.call_args[0][0]
+
+    def test_keyvault_data_plane_token_is_reused(self):
+        for _ in range(3):
+            self.assertEqual(self.get_token('https://kv1.vault.azure.net', 'https://vault.azure.net', '')[1],
+                             'token-https://vault.azure.net')
+        self.assertEqual(self.profile.get_raw_token.call_count, 1)
+
+        self.get_token('https://kv1.vault.azure.net', 'https://storage.azure.com', '')
+        self.assertEqual(self.profile.get_raw_token.call_count, 2)
+
+        # another account doesn't use the token
+        self.profile.get_subscription.return_value = {'tenantId': 'tenant', 'user': {'name': 'user2'}}
+        self.get_token('https://kv1.vault.azure.net', 'https://vault.azure.net', '')
+        self.assertEqual(self.profile.get_raw_token.call_count, 3)
+
+    def test_keyvault_data_plane_token_renewed_before_expiry(self):
+        self.expires_in = _client_factory.TOKEN_EXPIRY_MARGIN - 10
+        self.get_token('https://kv1.vault.azure.net', 'https://vault.azure.net', '')
+        self.get_token('https://kv1.vault.azure.net', 'https://vault.azure.net', '')
+        self.assertEqual(self.profile.get_raw_token.call_count, 2)
+
+    def test_keyvault_get_token_expiry(self):
+        now = time.time()
+        self.assertEqual(_client_factory._get_token_expiry({'expires_on': str(int(now))}),  # pylint: disable=protected-access
+                         int(now))
+        expiry = _client_factory._get_token_expiry(_get_raw_token('r', 60)[0][2])  # pylint: disable=protected-access
+        self.assertAlmostEqual(expiry, now + 60, delta=2)
+        self.assertIsNone(_client_factory._get_token_expiry({}))  # pylint: disable=protected-access
+
+
+if __name__ == '__main__':
+    unittest.main()
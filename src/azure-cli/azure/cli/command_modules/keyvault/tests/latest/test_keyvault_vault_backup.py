@@ -0,0 +1,151 @@
+# --------------------------------------------------------------------------------------------
+# Copyright (c) Microsoft Corporation. All rights reserved.
+# Licensed under the MIT License. See License.txt in the project root for license information.
+# --------------------------------------------------------------------------------------------
+
+import base64
+import json
+import os
+import shutil
+import tempfile
+import threading
+import time
+import unittest
+
+try:
+    import unittest.mock as mock
+except ImportError:
+    import mock
+
+from six.moves import BaseHTTPServer, socketserver
+
+from knack.util import CLIError
+from msrest.authentication import BasicTokenAuthentication
+
+from azure.keyvault import KeyVaultClient
+from azure.cli.command_modules.keyvault.custom import backup_vault, download_vault
+
+SECRETS = ['secret{}'.format(i) for i in range(20)]
+
+
+class _ThreadingHTTPServer(socketserver.ThreadingMixIn, BaseHTTPServer.HTTPServer):
+    daemon_threads = True
+
+
+class _VaultStandIn(BaseHTTPServer.BaseHTTPRequestHandler):
+    """ A vault with a key, 20 secrets and a certificate, which throttles the first request for every URL. """
+
+    lock = threading.Lock()
+    in_flight = 0
+    max_in_flight = 0
+    requests = []
+
+    def log_message(self, *args):  # pylint: disable=arguments-differ
+        pass
+
+    def _send(self, status, body, headers=None):
+        data = json.dumps(body).encode('utf-8')
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(data)))
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(data)
+
+    def _respond(self, throttled):
+        path = self.path.split('?')[0].strip('/').split('/')
+        base = 'http://{}:{}'.format(*self.server.server_address)
+        if throttled:
+            return 429, {'error': {'code': 'Throttled', 'message': 'Too many requests'}}, {'Retry-After': '0'}
+        if path == ['keys']:
+            return 200, {'value': [{'kid': base + '/keys/key1'}, {'kid': base + '/keys/cert1', 'managed': True}]}, None
+        if path == ['secrets']:
+            return 200, {'value': [{'id': base + '/secrets/' + s} for s in SECRETS] +
+                                  [{'id': base + '/secrets/cert1', 'managed': True}]}, None
+        if path == ['certificates']:
+            return 200, {'value': [{'id': base + '/certificates/cert1'}]}, None
+        if path[0] == 'secrets' and path[1] == 'secret13':
+            return 403, {'error': {'code': 'Forbidden', 'message': 'Access denied'}}, None
+        if path[-1] == 'backup':
+            value = base64.urlsafe_b64encode('{}-{}'.format(*path[:2]).encode('utf-8')).decode('utf-8')
+            return 200, {'value': value.rstrip('=')}, None
+        if path[0] == 'secrets':
+            return 200, {'id': base + '/secrets/{}/1'.format(path[1]), 'value': path[1]}, None
+        return 404, {'error': {'code': 'NotFound', 'message': 'Not found'}}, None
+
+    def _handle(self):
+        cls = _VaultStandIn
+        with cls.lock:
+            throttled = self.path not in cls.requests
+            cls.requests.append(self.path)
+            cls.in_flight += 1
+            cls.max_in_flight = max(cls.max_in_flight, cls.in_flight)
+        time.sleep(0.02)
+        response = self._respond(throttled)
+        with cls.lock:
+            cls.in_flight -= 1
+        self._send(*response)
+
+    do_GET = _handle
+    do_POST = _handle
+
+
+class KeyVaultBackupTest(unittest.TestCase):
+
+    def setUp(self):
+        _VaultStandIn.requests = []
+        _VaultStandIn.max_in_flight = 0
+        self.server = _ThreadingHTTPServer(('127.0.0.1', 0), _VaultStandIn)
+        thread = threading.Thread(target=self.server.serve_forever)
+        thread.daemon = True
+        thread.start()
+        self.addCleanup(self.server.server_close)
+        self.addCleanup(self.server.shutdown)
+
+        self.vault_base_url = 'http://{}:{}'.format(*self.server.server_address)
+        self.client = KeyVaultClient(BasicTokenAuthentication({'access_token': 'token'}), api_version='7.0')
+        self.cmd = mock.MagicMock()
+        self.cmd.cli_ctx.config.getboolean.return_value = False
+        self.directory = os.path.join(tempfile.mkdtemp(), 'backup')
+        self.addCleanup(shutil.rmtree, os.path.dirname(self.directory))
+
+    def _read(self, *path):
+        with open(os.path.join(self.directory, *path), 'rb') as f:
+            return f.read()
+
+    def test_keyvault_backup_vault_concurrently(self):
+        with self.assertRaisesRegexp(CLIError, '1 of 22 objects failed.*secret13'):
+            backup_vault(self.cmd, self.client, self.vault_base_url, self.directory)
+
+        self.assertEqual(self._read('keys', 'key1'), b'keys-key1')
+        self.assertEqual(self._read('secrets', 'secret0'), b'secrets-secret0')
+        self.assertEqual(self._read('certificates', 'cert1'), b'certificates-cert1')
+        self.assertFalse(os.path.exists(os.path.join(self.directory, 'secrets', 'cert1')))
+
+        manifest = json.loads(self._read('manifest.json').decode('utf-8'))
+        self.assertEqual(manifest['vault'], self.vault_base_url)
+        self.assertEqual(len(manifest['objects']), 22)
+        self.assertEqual([o['name'] for o in manifest['objects'] if 'error' in o], ['secret13'])
+
+        # objects are listed once, throttled requests are retried, and requests run concurrently
+        self.assertEqual(len([r for r in _VaultStandIn.requests if r.startswith('/secrets?')]), 2)
+        self.assertEqual(len([r for r in _VaultStandIn.requests if r.startswith('/secrets/secret0/backup')]), 2)
+        self.assertGreater(_VaultStandIn.max_in_flight, 1)
+        self.assertLessEqual(_VaultStandIn.max_in_flight, 10)
+
+        # an existing backup isn't overwritten
+        with self.assertRaisesRegexp(CLIError, 'already exists'):
+            backup_vault(self.cmd, self.client, self.vault_base_url, self.directory, ['key'])
+
+    def test_keyvault_download_vault_serially(self):
+        self.cmd.cli_ctx.config.getboolean.return_value = True
+        with self.assertRaises(CLIError):
+            download_vault(self.cmd, self.client, self.vault_base_url, self.directory, ['secret'])
+        self.assertEqual(self._read('secrets', 'secret5'), b'secret5')
+        self.assertFalse(os.path.exists(os.path.join(self.directory, 'keys')))
+        self.assertEqual(_VaultStandIn.max_in_flight, 1)
+
+
+if __name__ == '__main__':
+    unittest.main()
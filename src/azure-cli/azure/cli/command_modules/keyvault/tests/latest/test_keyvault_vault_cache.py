@@ -0,0 +1,83 @@
+# --------------------------------------------------------------------------------------------
+# Copyright (c) Microsoft Corporation. All rights reserved.
+# Licensed under the MIT License. See License.txt in the project root for license information.
+# --------------------------------------------------------------------------------------------
+
+import shutil
+import tempfile
+import unittest
+
+try:
+    import unittest.mock as mock
+except ImportError:
+    import mock
+
+from azure.cli.command_modules.keyvault._validators import _get_resource_group_from_vault_name
+from azure.cli.command_modules.keyvault.custom import delete_keyvault
+
+VAULT_ID = '/subscriptions/sub/resourceGroups/{}/providers/Microsoft.KeyVault/vaults/{}'
+
+
+class KeyVaultResourceGroupCacheTest(unittest.TestCase):
+
+    def setUp(self):
+        self.config_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.config_dir)
+        self.cli_ctx = mock.MagicMock()
+        self.cli_ctx.config.config_dir = self.config_dir
+        self.cli_ctx.config.getint.return_value = 60
+
+        self.client = mock.MagicMock()
+        self.client.config.subscription_id = 'sub'
+        self.client.list.side_effect = lambda: [mock.MagicMock(id=VAULT_ID.format('rg1', 'kv1')),
+                                                mock.MagicMock(id=VAULT_ID.format('rg2', 'kv2'))]
+        patcher = mock.patch('azure.cli.command_modules.keyvault._validators.get_mgmt_service_client')
+        patcher.start().return_value.vaults = self.client
+        self.addCleanup(patcher.stop)
+
+    def test_keyvault_resource_group_is_cached(self):
+        for _ in range(3):
+            self.assertEqual(_get_resource_group_from_vault_name(self.cli_ctx, 'kv1'), 'rg1')
+            self.assertEqual(_get_resource_group_from_vault_name(self.cli_ctx, 'kv2'), 'rg2')
+        self.assertEqual(self.client.list.call_count, 1)
+
+        # vaults which aren't in the cache are looked up again
+        self.assertIsNone(_get_resource_group_from_vault_name(self.cli_ctx, 'kv3'))
+        self.assertEqual(self.client.list.call_count, 2)
+
+        # a 0 TTL disables the cache
+        self.cli_ctx.config.getint.return_value = 0
+        self.assertEqual(_get_resource_group_from_vault_name(self.cli_ctx, 'kv1'), 'rg1')
+        self.assertEqual(self.client.list.call_count, 3)
+
+    def test_keyvault_resource_group_cache_revalidated(self):
+        from msrestazure.azure_exceptions import CloudError
+
+        self.assertEqual(_get_resource_group_from_vault_name(self.cli_ctx, 'kv1'), 'rg1')
+        self.assertEqual(_get_resource_group_from_vault_name(self.cli_ctx, 'kv1'), 'rg1')
+        self.client.get.assert_called_once_with('rg1', 'kv1')
+
+        # the vault has been moved to another resource group since it was cached
+        self.client.get.side_effect = CloudError(mock.MagicMock(status_code=404), 'not found')
+        self.client.list.side_effect = lambda: [mock.MagicMock(id=VAULT_ID.format('rg3', 'kv1'))]
+        self.assertEqual(_get_resource_group_from_vault_name(self.cli_ctx, 'kv1'), 'rg3')
+        self.assertEqual(self.client.list.call_count, 2)
+
+        # other errors are not swallowed
+        self.client.get.side_effect = CloudError(mock.MagicMock(status_code=403), 'forbidden')
+        with self.assertRaises(CloudError):
+            _get_resource_group_from_vault_name(self.cli_ctx, 'kv1')
+        self.assertEqual(self.client.list.call_count, 2)
+
+    def test_keyvault_resource_group_cache_invalidated_on_delete(self):
+        self.assertEqual(_get_resource_group_from_vault_name(self.cli_ctx, 'kv1'), 'rg1')
+        delete_keyvault(mock.MagicMock(cli_ctx=self.cli_ctx), self.client, 'rg1', 'kv1')
+        self.client.delete.assert_called_once_with(resource_group_name='rg1', vault_name='kv1')
+
+        self.client.list.side_effect = lambda: [mock.MagicMock(id=VAULT_ID.format('rg3', 'kv1'))]
+        self.assertEqual(_get_resource_group_from_vault_name(self.cli_ctx, 'kv1'), 'rg3')
+        self.assertEqual(self.client.list.call_count, 2)
+
+
+if __name__ == '__main__':
+    unittest.main()
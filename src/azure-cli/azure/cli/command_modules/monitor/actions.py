@@ -4,7 +4,6 @@
 # --------------------------------------------------------------------------------------------
 
 import argparse
-import antlr4
 
 from azure.cli.command_modules.monitor.util import (
     get_aggregation_map, get_operator_map, get_autoscale_operator_map,
@@ -88,29 +87,44 @@ def get_period_type(as_timedelta=False):
     return period_type
 
 
-# pylint: disable=protected-access, too-few-public-methods
-class MetricAlertConditionAction(argparse._AppendAction):
+# parsed metric alert conditions by condition string
+_metric_conditions = {}
 
-    def __call__(self, parser, namespace, values, option_string=None):
+
+def _parse_metric_condition(value):
+    """ Parses a metric alert condition. The ANTLR runtime is only loaded here and identical conditions are parsed
+    once; each caller gets its own copy of the result since the conditions are named later. """
+    import copy
+
+    if value not in _metric_conditions:
+        import antlr4
         from azure.cli.command_modules.monitor.grammar import (
             MetricAlertConditionLexer, MetricAlertConditionParser, MetricAlertConditionValidator)
 
+        lexer = MetricAlertConditionLexer(antlr4.InputStream(value))
+        stream = antlr4.CommonTokenStream(lexer)
+        parser = MetricAlertConditionParser(stream)
+        tree = parser.expression()
+
+        validator = MetricAlertConditionValidator()
+        walker = antlr4.ParseTreeWalker()
+        walker.walk(validator, tree)
+        _metric_conditions[value] = validator.result()
+    return copy.deepcopy(_metric_conditions[value])
+
+
+# pylint: disable=protected-access, too-few-public-methods
+class MetricAlertConditionAction(argparse._AppendAction):
+
+    def __call__(self, parser, namespace, values, option_string=None):
         usage = 'usage error: --condition {avg,min,max,total,count} [NAMESPACE.]METRIC {=,!=,>,>=,<,<=} THRESHOLD\n' \
                 '                         [where DIMENSION {includes,excludes} VALUE [or VALUE ...]\n' \
                 '                         [and   DIMENSION {includes,excludes} VALUE [or VALUE ...] ...]]'
 
         string_val = ' '.join(values)
 
-        lexer = MetricAlertConditionLexer(antlr4.InputStream(string_val))
-        stream = antlr4.CommonTokenStream(lexer)
-        parser = MetricAlertConditionParser(stream)
-        tree = parser.expression()
-
         try:
-            validator = MetricAlertConditionValidator()
-            walker = antlr4.ParseTreeWalker()
-            walker.walk(validator, tree)
-            metric_condition = validator.result()
+            metric_condition = _parse_metric_condition(string_val)
             for item in ['time_aggregation', 'metric_name', 'threshold', 'operator']:
                 if not getattr(metric_condition, item, None):
                     raise CLIError(usage)
@@ -87,13 +87,10 @@ def _single(collection):
 
 
 def _limit_results(paged, limit):
-    results = []
-    for index, item in enumerate(paged):
-        if index < limit:
-            results.append(item)
-        else:
-            break
-    return list(results)
+    # the activity log API has no $top, stop paging once the limit is reached rather than
+    # reading one more item, which can request the next page only to discard it
+    from itertools import islice
+    return list(islice(paged, limit))
 # endregion
 
 
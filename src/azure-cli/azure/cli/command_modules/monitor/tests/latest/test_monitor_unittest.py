@@ -22,6 +22,26 @@ class FilterBuilderTests(unittest.TestCase):
         self.assertTrue(isinstance(template, dict))
 
 
+class ActivityLogLimitTest(unittest.TestCase):
+    def test_monitor_activity_log_stops_paging_at_limit(self):
+        from azure.cli.command_modules.monitor.custom import list_activity_log
+
+        pages = []
+
+        def _list_events(**_):
+            for page in range(10):
+                pages.append(page)
+                for index in range(10):
+                    yield page * 10 + index
+
+        client = mock.MagicMock()
+        client.list.side_effect = _list_events
+        events = list_activity_log(client, filters='eventTimestamp ge 2019-01-01', max_events=20, select=['caller'])
+        self.assertEqual(events, list(range(20)))
+        self.assertEqual(pages, [0, 1])
+        client.list.assert_called_once_with(filter='eventTimestamp ge 2019-01-01', select='caller')
+
+
 def _mock_get_subscription_id(_):
     return '00000000-0000-0000-0000-000000000000'
 
@@ -151,3 +171,20 @@ class MonitorMetricAlertActionTest(unittest.TestCase):
         ns = self._build_namespace()
         with self.assertRaisesRegexp(CLIError, 'usage error: --condition'):
             self.call_condition(ns, 'avg Wra!!ga * woo')
+
+    def test_monitor_metric_alert_condition_parse_is_reused(self):
+        from azure.cli.command_modules.monitor import grammar
+
+        ns = self._build_namespace()
+        with mock.patch.object(grammar, 'MetricAlertConditionLexer', wraps=grammar.MetricAlertConditionLexer) as lexer:
+            for _ in range(3):
+                self.call_condition(ns, 'max Memory > 80 where Instance includes vm1')
+            self.call_condition(ns, 'max Memory > 90')
+        self.assertEqual(lexer.call_count, 2)
+        self.assertEqual([c.threshold for c in ns.condition], ['80', '80', '80', '90'])
+        self.check_dimension(ns, 0, 'Instance', 'Include', ['vm1'])
+
+        # the conditions are named later, so they must not be shared
+        ns.condition[0].name = 'cond1'
+        self.assertEqual(ns.condition[1].name, '')
+        self.assertIsNot(ns.condition[0].dimensions[0], ns.condition[1].dimensions[0])
@@ -1911,10 +1911,14 @@ examples:
 helps['network dns zone import'] = """
 type: command
 short-summary: Create a DNS zone using a DNS zone file.
+long-summary: Record sets which already exist with the same TTL and records are left untouched, so re-importing a zone only writes the record sets that changed.
 examples:
   - name: Import a local zone file into a DNS zone resource.
     text: >
         az network dns zone import -g MyResourceGroup -n MyZone -f /path/to/zone/file
+  - name: List the record sets that importing a zone file would create or update.
+    text: >
+        az network dns zone import -g MyResourceGroup -n MyZone -f /path/to/zone/file --dry-run
 """
 
 helps['network dns zone list'] = """
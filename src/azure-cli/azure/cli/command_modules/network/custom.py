@@ -17,12 +17,13 @@ from azure.mgmt.trafficmanager.models import MonitorProtocol, ProfileStatus
 from azure.cli.core.commands import cached_get, cached_put
 from azure.cli.core.commands.client_factory import get_subscription_id, get_mgmt_service_client
 
-from azure.cli.core.util import CLIError, sdk_no_wait, find_child_item, find_child_collection
+from azure.cli.core.util import (CLIError, sdk_no_wait, find_child_item, find_child_collection,
+                                 get_max_concurrent_workers)
 from azure.cli.command_modules.network._client_factory import network_client_factory
 from azure.cli.command_modules.network._util import _get_property
 
-from azure.cli.command_modules.network.zone_file.parse_zone_file import parse_zone_file
-from azure.cli.command_modules.network.zone_file.make_zone_file import make_zone_file
+from azure.cli.command_modules.network.zone_file.parse_zone_file import iter_zone_records
+from azure.cli.command_modules.network.zone_file.make_zone_file import write_zone_file
 from azure.cli.core.profiles import ResourceType, supported_api_version
 
 logger = get_logger(__name__)
@@ -1304,80 +1305,132 @@ def _type_to_property_name(key):
     return type_dict[key.lower()]
 
 
+def _iter_export_record_sets(record_sets):
+    """ Converts record sets into (name, {record type: [records]}) pairs for `write_zone_file`. The list API returns
+    the record sets of a name next to each other, so adjacent record sets with the same name are grouped without
+    holding the zone in memory. """
+    from itertools import groupby
+
+    for record_set_name, name_record_sets in groupby(record_sets, key=lambda record_set: record_set.name):
+        record_set_obj = OrderedDict()
+        for record_set in name_record_sets:
+            record_type = record_set.type.rsplit('/', 1)[1].lower()
+            record_data = getattr(record_set, _type_to_property_name(record_type), None)
+
+            # ignore empty record sets
+            if not record_data:
+                continue
+
+            if not isinstance(record_data, list):
+                record_data = [record_data]
+
+            for record in record_data:
+
+                record_obj = {'ttl': record_set.ttl}
+
+                if record_type not in record_set_obj:
+                    record_set_obj[record_type] = []
+
+                if record_type == 'aaaa':
+                    record_obj.update({'ip': record.ipv6_address})
+                elif record_type == 'a':
+                    record_obj.update({'ip': record.ipv4_address})
+                elif record_type == 'caa':
+                    record_obj.update({'val': record.value, 'tag': record.tag, 'flags': record.flags})
+                elif record_type == 'cname':
+                    record_obj.update({'alias': record.cname.rstrip('.') + '.'})
+                elif record_type == 'mx':
+                    record_obj.update({'preference': record.preference, 'host': record.exchange})
+                elif record_type == 'ns':
+                    record_obj.update({'host': record.nsdname})
+                elif record_type == 'ptr':
+                    record_obj.update({'host': record.ptrdname})
+                elif record_type == 'soa':
+                    record_obj.update({
+                        'mname': record.host.rstrip('.') + '.',
+                        'rname': record.email.rstrip('.') + '.',
+                        'serial': int(record.serial_number), 'refresh': record.refresh_time,
+                        'retry': record.retry_time, 'expire': record.expire_time,
+                        'minimum': record.minimum_ttl
+                    })
+                elif record_type == 'srv':
+                    record_obj.update({'priority': record.priority, 'weight': record.weight,
+                                       'port': record.port, 'target': record.target})
+                elif record_type == 'txt':
+                    record_obj.update({'txt': ''.join(record.value)})
+
+                record_set_obj[record_type].append(record_obj)
+
+        if record_set_obj:
+            yield record_set_name, record_set_obj
+
+
+class _ExportWriter(object):  # pylint: disable=too-few-public-methods
+    """ Writes the exported zone file to stdout and to the export file, if any. A failure to write the export file
+    doesn't stop the output, it is kept in `file_error` to be reported once the output is complete. """
+
+    def __init__(self, stdout, file_name=None):
+        self._stdout = stdout
+        self._file = None
+        self.file_error = None
+        if file_name:
+            try:
+                self._file = open(file_name, 'w')
+            except IOError as ex:
+                self.file_error = ex
+
+    def write(self, text):
+        self._stdout.write(text)
+        if self._file:
+            try:
+                self._file.write(text)
+            except IOError as ex:
+                self.file_error = ex
+                self.close()
+
+    def close(self):
+        if self._file:
+            try:
+                self._file.close()
+            except IOError as ex:
+                self.file_error = self.file_error or ex
+            self._file = None
+
+
 def export_zone(cmd, resource_group_name, zone_name, file_name=None):
+    from itertools import chain
     from time import localtime, strftime
+    import sys
 
     client = get_mgmt_service_client(cmd.cli_ctx, ResourceType.MGMT_NETWORK_DNS)
-    record_sets = client.record_sets.list_by_dns_zone(resource_group_name, zone_name)
-
-    zone_obj = OrderedDict({
-        '$origin': zone_name.rstrip('.') + '.',
-        'resource-group': resource_group_name,
-        'zone-name': zone_name.rstrip('.'),
-        'datetime': strftime('%a, %d %b %Y %X %z', localtime())
-    })
+    record_sets = iter(client.record_sets.list_by_dns_zone(resource_group_name, zone_name))
 
+    # the zone's $TTL comes from the SOA record, which is listed with the apex record sets
+    listed = []
+    soa_record = None
     for record_set in record_sets:
-        record_type = record_set.type.rsplit('/', 1)[1].lower()
-        record_set_name = record_set.name
-        record_data = getattr(record_set, _type_to_property_name(record_type), None)
-
-        # ignore empty record sets
-        if not record_data:
-            continue
+        listed.append(record_set)
+        if record_set.type.rsplit('/', 1)[1].lower() == 'soa':
+            soa_record = record_set.soa_record
+            break
 
-        if not isinstance(record_data, list):
-            record_data = [record_data]
-
-        if record_set_name not in zone_obj:
-            zone_obj[record_set_name] = OrderedDict()
-
-        for record in record_data:
-
-            record_obj = {'ttl': record_set.ttl}
-
-            if record_type not in zone_obj[record_set_name]:
-                zone_obj[record_set_name][record_type] = []
-
-            if record_type == 'aaaa':
-                record_obj.update({'ip': record.ipv6_address})
-            elif record_type == 'a':
-                record_obj.update({'ip': record.ipv4_address})
-            elif record_type == 'caa':
-                record_obj.update({'val': record.value, 'tag': record.tag, 'flags': record.flags})
-            elif record_type == 'cname':
-                record_obj.update({'alias': record.cname.rstrip('.') + '.'})
-            elif record_type == 'mx':
-                record_obj.update({'preference': record.preference, 'host': record.exchange})
-            elif record_type == 'ns':
-                record_obj.update({'host': record.nsdname})
-            elif record_type == 'ptr':
-                record_obj.update({'host': record.ptrdname})
-            elif record_type == 'soa':
-                record_obj.update({
-                    'mname': record.host.rstrip('.') + '.',
-                    'rname': record.email.rstrip('.') + '.',
-                    'serial': int(record.serial_number), 'refresh': record.refresh_time,
-                    'retry': record.retry_time, 'expire': record.expire_time,
-                    'minimum': record.minimum_ttl
-                })
-                zone_obj['$ttl'] = record.minimum_ttl
-            elif record_type == 'srv':
-                record_obj.update({'priority': record.priority, 'weight': record.weight,
-                                   'port': record.port, 'target': record.target})
-            elif record_type == 'txt':
-                record_obj.update({'txt': ''.join(record.value)})
-
-            zone_obj[record_set_name][record_type].append(record_obj)
-
-    zone_file_content = make_zone_file(zone_obj)
-    print(zone_file_content)
-    if file_name:
-        try:
-            with open(file_name, 'w') as f:
-                f.write(zone_file_content)
-        except IOError:
-            raise CLIError('Unable to export to file: {}'.format(file_name))
+    writer = _ExportWriter(sys.stdout, file_name)
+    try:
+        write_zone_file(
+            writer,
+            zone_name=zone_name.rstrip('.'),
+            resource_group=resource_group_name,
+            datetime=strftime('%a, %d %b %Y %X %z', localtime()),
+            ttl=soa_record.minimum_ttl if soa_record else 3600,
+            origin=zone_name.rstrip('.') + '.',
+            record_sets=_iter_export_record_sets(chain(listed, record_sets))
+        )
+        print('')
+    finally:
+        writer.close()
+    if writer.file_error:
+        logger.debug("Failed to write '%s': %s", file_name, writer.file_error)
+        raise CLIError('Unable to export to file: {}'.format(file_name))
 
 
 # pylint: disable=too-many-return-statements, inconsistent-return-statements
@@ -1418,99 +1471,191 @@ def _build_record(cmd, data):
                        .format(record_type, data['name'], ke))
 
 
-# pylint: disable=too-many-statements
-def import_zone(cmd, resource_group_name, zone_name, file_name):
-    from azure.cli.core.util import read_file_content
-    import sys
-    RecordSet = cmd.get_models('RecordSet', resource_type=ResourceType.MGMT_NETWORK_DNS)
-
-    file_text = read_file_content(file_name)
-    zone_obj = parse_zone_file(file_text, zone_name)
+_DNS_IMPORT_MAX_WORKERS = 10
+_DNS_IMPORT_MAX_RETRIES = 5
 
-    origin = zone_name
-    record_sets = {}
-    for record_set_name in zone_obj:
-        for record_set_type in zone_obj[record_set_name]:
-            record_set_obj = zone_obj[record_set_name][record_set_type]
 
-            if record_set_type == 'soa':
-                origin = record_set_name.rstrip('.')
+def _get_dns_zone(client, resource_group_name, zone_name):
+    try:
+        return client.zones.get(resource_group_name, zone_name)
+    except CloudError as ex:
+        if ex.status_code == 404:
+            return None
+        raise
 
-            if not isinstance(record_set_obj, list):
-                record_set_obj = [record_set_obj]
 
-            for entry in record_set_obj:
+def _get_record_count(record_set, record_type):
+    try:
+        return len(getattr(record_set, _type_to_property_name(record_type)))
+    except TypeError:
+        return 1
 
-                record_set_ttl = entry['ttl']
-                record_set_key = '{}{}'.format(record_set_name.lower(), record_set_type)
 
-                record = _build_record(cmd, entry)
-                if not record:
-                    logger.warning('Cannot import %s. RecordType is not found. Skipping...', entry['delim'].lower())
-                    continue
+def _record_set_differs(existing, record_set, record_type):
+    import json
 
-                record_set = record_sets.get(record_set_key, None)
-                if not record_set:
+    def _normalize(records):
+        if records is None:
+            return []
+        if not isinstance(records, list):
+            records = [records]
+        return sorted(json.dumps(r.serialize(), sort_keys=True) for r in records)
 
-                    # Workaround for issue #2824
-                    relative_record_set_name = record_set_name.rstrip('.')
-                    if not relative_record_set_name.endswith(origin):
-                        logger.warning(
-                            'Cannot import %s. Only records relative to origin may be '
-                            'imported at this time. Skipping...', relative_record_set_name)
-                        continue
+    record_property = _type_to_property_name(record_type)
+    return existing.ttl != record_set.ttl or \
+        _normalize(getattr(existing, record_property, None)) != _normalize(getattr(record_set, record_property, None))
 
-                    record_set = RecordSet(ttl=record_set_ttl)
-                    record_sets[record_set_key] = record_set
-                _add_record(record_set, record, record_set_type,
-                            is_list=record_set_type.lower() not in ['soa', 'cname'])
 
-    total_records = 0
-    for key, rs in record_sets.items():
-        rs_name, rs_type = key.lower().rsplit('.', 1)
-        rs_name = rs_name[:-(len(origin) + 1)] if rs_name != origin else '@'
+def _create_record_set_with_retry(client, resource_group_name, zone_name, record_set_name, record_type,
+                                  record_set):
+    """ Creates or updates a record set, backing off while Azure DNS is throttling the subscription. The
+    service asks for a delay through 'Retry-After'; without one the delay doubles on every attempt. """
+    import time
+    attempt = 0
+    while True:
         try:
-            record_count = len(getattr(rs, _type_to_property_name(rs_type)))
-        except TypeError:
-            record_count = 1
-        total_records += record_count
-    cum_records = 0
+            return client.record_sets.create_or_update(
+                resource_group_name, zone_name, record_set_name, record_type, record_set)
+        except CloudError as ex:
+            if ex.status_code != 429 or attempt >= _DNS_IMPORT_MAX_RETRIES:
+                raise
+            try:
+                delay = int(ex.response.headers.get('Retry-After'))
+            except (AttributeError, TypeError, ValueError):
+                delay = 2 ** attempt
+            attempt += 1
+            logger.debug("Throttled while importing '%s' of type '%s'. Retrying in %s seconds.",
+                         record_set_name, record_type, delay)
+            time.sleep(delay)
+
+
+def _iter_file_lines(file_name):
+    """ Yields the lines of a text file as they are read. Like `read_file_content`, the file is decoded as UTF-8,
+    unless it starts with a UTF-16 byte order mark, and a UTF-8 byte order mark is skipped. """
+    import codecs
+    import io
+
+    with open(file_name, 'rb') as f:
+        bom = f.read(2)
+    encoding = 'utf-16' if bom in (codecs.BOM_UTF16_LE, codecs.BOM_UTF16_BE) else 'utf-8-sig'
+    try:
+        with io.open(file_name, encoding=encoding) as f:
+            for line in f:
+                yield line
+    except UnicodeError:
+        raise CLIError('Failed to decode file {} - unknown decoding'.format(file_name))
 
-    client = get_mgmt_service_client(cmd.cli_ctx, ResourceType.MGMT_NETWORK_DNS)
-    print('== BEGINNING ZONE IMPORT: {} ==\n'.format(zone_name), file=sys.stderr)
 
-    Zone = cmd.get_models('Zone', resource_type=ResourceType.MGMT_NETWORK_DNS)
-    client.zones.create_or_update(resource_group_name, zone_name, Zone(location='global'))
-    for key, rs in record_sets.items():
+# pylint: disable=too-many-statements, too-many-locals, too-many-branches
+def import_zone(cmd, resource_group_name, zone_name, file_name, dry_run=False):
+    from concurrent.futures import ThreadPoolExecutor, as_completed
+    import copy
+    import sys
+    RecordSet = cmd.get_models('RecordSet', resource_type=ResourceType.MGMT_NETWORK_DNS)
+
+    origin = zone_name
+    record_sets = {}
+    skipped_names = set()
+    for record_set_name, record_set_type, entry in iter_zone_records(_iter_file_lines(file_name), zone_name):
+        if record_set_type == 'soa':
+            origin = record_set_name.rstrip('.')
+
+        record_set_key = '{}{}'.format(record_set_name.lower(), record_set_type)
+
+        record = _build_record(cmd, entry)
+        if not record:
+            logger.warning('Cannot import %s. RecordType is not found. Skipping...', entry['delim'].lower())
+            continue
 
+        record_set = record_sets.get(record_set_key, None)
+        if not record_set:
+
+            # Workaround for issue #2824
+            relative_record_set_name = record_set_name.rstrip('.')
+            if not relative_record_set_name.endswith(origin):
+                if record_set_key not in skipped_names:
+                    skipped_names.add(record_set_key)
+                    logger.warning(
+                        'Cannot import %s. Only records relative to origin may be '
+                        'imported at this time. Skipping...', relative_record_set_name)
+                continue
+
+            record_set = RecordSet(ttl=entry['ttl'])
+            record_sets[record_set_key] = record_set
+        elif record_set.ttl != entry['ttl']:
+            logger.warning('Using lowest TTL %s for the record set. Ignoring value %s',
+                           min(record_set.ttl, entry['ttl']), max(record_set.ttl, entry['ttl']))
+            record_set.ttl = min(record_set.ttl, entry['ttl'])
+        _add_record(record_set, record, record_set_type,
+                    is_list=record_set_type.lower() not in ['soa', 'cname'])
+
+    client = get_mgmt_service_client(cmd.cli_ctx, ResourceType.MGMT_NETWORK_DNS)
+    zone_exists = _get_dns_zone(client, resource_group_name, zone_name) is not None
+    if not zone_exists and not dry_run:
+        Zone = cmd.get_models('Zone', resource_type=ResourceType.MGMT_NETWORK_DNS)
+        client.zones.create_or_update(resource_group_name, zone_name, Zone(location='global'))
+        zone_exists = True
+
+    existing_record_sets = {}
+    if zone_exists:
+        for rs in client.record_sets.list_by_dns_zone(resource_group_name, zone_name):
+            existing_record_sets[(rs.name.lower(), rs.type.rsplit('/', 1)[1].lower())] = rs
+
+    # only write record sets which are new or differ from what is already in the zone
+    changes = []
+    unchanged_records = 0
+    for key, rs in record_sets.items():
         rs_name, rs_type = key.lower().rsplit('.', 1)
         rs_name = '@' if rs_name == origin else rs_name
         if rs_name.endswith(origin):
             rs_name = rs_name[:-(len(origin) + 1)]
 
-        try:
-            record_count = len(getattr(rs, _type_to_property_name(rs_type)))
-        except TypeError:
-            record_count = 1
-        if rs_name == '@' and rs_type == 'soa':
-            root_soa = client.record_sets.get(resource_group_name, zone_name, '@', 'SOA')
-            rs.soa_record.host = root_soa.soa_record.host
-            rs_name = '@'
-        elif rs_name == '@' and rs_type == 'ns':
-            root_ns = client.record_sets.get(resource_group_name, zone_name, '@', 'NS')
-            root_ns.ttl = rs.ttl
-            rs = root_ns
-            rs_type = rs.type.rsplit('/', 1)[1]
-        try:
-            client.record_sets.create_or_update(
-                resource_group_name, zone_name, rs_name, rs_type, rs)
-            cum_records += record_count
-            print("({}/{}) Imported {} records of type '{}' and name '{}'"
-                  .format(cum_records, total_records, record_count, rs_type, rs_name), file=sys.stderr)
-        except CloudError as ex:
-            logger.error(ex)
+        existing = existing_record_sets.get((rs_name, rs_type))
+        if rs_name == '@' and rs_type == 'soa' and existing:
+            rs.soa_record.host = existing.soa_record.host
+        elif rs_name == '@' and rs_type == 'ns' and existing:
+            # the root name servers are managed by Azure DNS, only the TTL is imported
+            rs = copy.deepcopy(existing)
+            rs.ttl = record_sets[key].ttl
+        if existing and rs is not existing:
+            rs.metadata = existing.metadata
+
+        record_count = _get_record_count(rs, rs_type)
+        if existing and not _record_set_differs(existing, rs, rs_type):
+            unchanged_records += record_count
+            continue
+        changes.append((rs_name, rs_type, rs, record_count, 'Update' if existing else 'Create'))
+
+    if dry_run:
+        return [{'name': rs_name, 'type': rs_type.upper(), 'action': action, 'recordCount': record_count}
+                for rs_name, rs_type, _, record_count, action in changes]
+
+    total_records = unchanged_records + sum(change[3] for change in changes)
+    cum_records = unchanged_records
+    failed = 0
+    print('== BEGINNING ZONE IMPORT: {} ==\n'.format(zone_name), file=sys.stderr)
+    if unchanged_records:
+        print('{} records are already up to date'.format(unchanged_records), file=sys.stderr)
+
+    max_workers = get_max_concurrent_workers(cmd.cli_ctx, len(changes), _DNS_IMPORT_MAX_WORKERS)
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        futures = {executor.submit(_create_record_set_with_retry, client, resource_group_name, zone_name,
+                                   rs_name, rs_type, rs): (rs_name, rs_type, record_count)
+                   for rs_name, rs_type, rs, record_count, _ in changes}
+        for future in as_completed(futures):
+            rs_name, rs_type, record_count = futures[future]
+            try:
+                future.result()
+                cum_records += record_count
+                print("({}/{}) Imported {} records of type '{}' and name '{}'"
+                      .format(cum_records, total_records, record_count, rs_type, rs_name), file=sys.stderr)
+            except CloudError as ex:
+                failed += 1
+                logger.error(ex)
     print("\n== {}/{} RECORDS IMPORTED SUCCESSFULLY: '{}' =="
           .format(cum_records, total_records, zone_name), file=sys.stderr)
+    if failed:
+        logger.warning('%s record sets could not be imported', failed)
 
 
 def add_dns_aaaa_record(cmd, resource_group_name, zone_name, record_set_name, ipv6_address):
@@ -9,6 +9,8 @@ import mock
 
 from knack.util import CLIError
 
+from azure.cli.core.profiles import ResourceType
+
 
 class TestNetworkUnitTests(unittest.TestCase):
     def test_network_get_nic_ip_config(self):
@@ -77,5 +79,168 @@ class TestNetworkUnitTests(unittest.TestCase):
         self.assertEqual(result[1].value, 'noodle')
 
 
+class TestDnsZoneImport(unittest.TestCase):
+
+    zone_file = """$ORIGIN contoso.com.
+$TTL 3600
+@ IN SOA ns1-01.azure-dns.com. hostmaster.contoso.com. (1 3600 300 2419200 300)
+@ IN NS ns1-01.azure-dns.com.
+www IN A 10.0.0.1
+www IN A 10.0.0.2
+api IN A 10.0.0.3
+"""
+
+    def setUp(self):
+        import os
+        import tempfile
+        from azure.cli.core.mock import DummyCli
+        from azure.cli.core.profiles import get_sdk
+
+        cli_ctx = DummyCli()
+        self.cmd = mock.MagicMock()
+        self.cmd.cli_ctx = cli_ctx
+        self.cmd.get_models.side_effect = lambda *models, **kwargs: get_sdk(
+            cli_ctx, kwargs['resource_type'], *models, mod='models')
+        self.models = lambda *models: self.cmd.get_models(*models, resource_type=ResourceType.MGMT_NETWORK_DNS)
+
+        fd, self.file_name = tempfile.mkstemp()
+        with os.fdopen(fd, 'w') as f:
+            f.write(self.zone_file)
+        self.addCleanup(os.remove, self.file_name)
+
+    def _existing_record_sets(self):
+        RecordSet, ARecord, NsRecord, SoaRecord = self.models('RecordSet', 'ARecord', 'NsRecord', 'SoaRecord')
+
+        def _record_set(name, record_type, **kwargs):
+            rs = RecordSet(**kwargs)
+            rs.name = name
+            rs.type = 'Microsoft.Network/dnszones/{}'.format(record_type)
+            return rs
+
+        return [
+            _record_set('@', 'SOA', ttl=3600, soa_record=SoaRecord(
+                host='ns1-01.azure-dns.com.', email='hostmaster.contoso.com.', serial_number=1, refresh_time=3600,
+                retry_time=300, expire_time=2419200, minimum_ttl=300)),
+            _record_set('@', 'NS', ttl=172800, ns_records=[NsRecord(nsdname='ns1-01.azure-dns.com.'),
+                                                           NsRecord(nsdname='ns2-01.azure-dns.net.')]),
+            _record_set('www', 'A', ttl=3600, arecords=[ARecord(ipv4_address='10.0.0.2'),
+                                                        ARecord(ipv4_address='10.0.0.1')]),
+        ]
+
+    def _import(self, client, dry_run=False):
+        from azure.cli.command_modules.network.custom import import_zone
+        with mock.patch('azure.cli.command_modules.network.custom.get_mgmt_service_client', return_value=client):
+            return import_zone(self.cmd, 'rg', 'contoso.com', self.file_name, dry_run=dry_run)
+
+    def test_dns_zone_import_dry_run_lists_changed_record_sets(self):
+        client = mock.MagicMock()
+        client.record_sets.list_by_dns_zone.return_value = self._existing_record_sets()
+
+        changes = self._import(client, dry_run=True)
+
+        self.assertEqual(sorted((c['name'], c['type'], c['action']) for c in changes),
+                         [('@', 'NS', 'Update'), ('api', 'A', 'Create')])
+        client.zones.create_or_update.assert_not_called()
+        client.record_sets.create_or_update.assert_not_called()
+
+    def test_dns_zone_import_writes_only_changed_record_sets(self):
+        client = mock.MagicMock()
+        client.record_sets.list_by_dns_zone.return_value = self._existing_record_sets()
+
+        self._import(client)
+
+        written = {c[0][2]: c[0][4] for c in client.record_sets.create_or_update.call_args_list}
+        self.assertEqual(sorted(written), ['@', 'api'])
+        # the Azure-managed root name servers are kept and only the TTL is taken from the file
+        self.assertEqual(written['@'].ttl, 3600)
+        self.assertEqual(len(written['@'].ns_records), 2)
+        client.zones.create_or_update.assert_not_called()
+
+    def test_dns_zone_import_creates_missing_zone(self):
+        from msrestazure.azure_exceptions import CloudError
+        response = mock.MagicMock(status_code=404)
+        client = mock.MagicMock()
+        client.zones.get.side_effect = CloudError(response, 'not found')
+        # a new zone comes with the root SOA and NS record sets
+        client.record_sets.list_by_dns_zone.return_value = self._existing_record_sets()[:2]
+
+        self._import(client)
+
+        client.zones.create_or_update.assert_called_once()
+        written = sorted((c[0][2], c[0][3]) for c in client.record_sets.create_or_update.call_args_list)
+        self.assertEqual(written, [('@', 'ns'), ('api', 'a'), ('www', 'a')])
+
+    @mock.patch('time.sleep')
+    def test_dns_zone_import_retries_throttled_writes(self, sleep):
+        from msrestazure.azure_exceptions import CloudError
+        from azure.cli.command_modules.network.custom import _create_record_set_with_retry
+        response = mock.MagicMock(status_code=429, headers={'Retry-After': '7'})
+        client = mock.MagicMock()
+        client.record_sets.create_or_update.side_effect = [CloudError(response, 'throttled'), 'done']
+
+        self.assertEqual(_create_record_set_with_retry(client, 'rg', 'contoso.com', 'www', 'a', None), 'done')
+        sleep.assert_called_once_with(7)
+
+        response = mock.MagicMock(status_code=400, headers={})
+        client.record_sets.create_or_update.side_effect = CloudError(response, 'bad request')
+        with self.assertRaises(CloudError):
+            _create_record_set_with_retry(client, 'rg', 'contoso.com', 'www', 'a', None)
+        self.assertEqual(sleep.call_count, 1)
+
+    def test_dns_zone_export_groups_record_sets_by_name(self):
+        from azure.cli.command_modules.network.custom import _iter_export_record_sets
+        RecordSet, NsRecord = self.models('RecordSet', 'NsRecord')
+        delegated = RecordSet(ttl=3600, ns_records=[NsRecord(nsdname='ns1-01.azure-dns.com.')])
+        delegated.name = 'sub'
+        delegated.type = 'Microsoft.Network/dnszones/NS'
+
+        # the list API returns the record sets of a name next to each other
+        exported = list(_iter_export_record_sets(self._existing_record_sets() + [delegated]))
+        self.assertEqual([(name, list(obj)) for name, obj in exported],
+                         [('@', ['soa', 'ns']), ('www', ['a']), ('sub', ['ns'])])
+        self.assertEqual(len(exported[0][1]['ns']), 2)
+
+    def _export(self, file_name, stdout):
+        from azure.cli.command_modules.network.custom import export_zone
+        client = mock.MagicMock()
+        client.record_sets.list_by_dns_zone.return_value = self._existing_record_sets()
+        with mock.patch('azure.cli.command_modules.network.custom.get_mgmt_service_client', return_value=client), \
+                mock.patch('sys.stdout', stdout):
+            export_zone(self.cmd, 'rg', 'contoso.com', file_name)
+
+    def test_dns_zone_export_writes_stdout_when_file_fails(self):
+        import os
+        from six import StringIO
+        from knack.util import CLIError
+
+        stdout = StringIO()
+        self._export(self.file_name, stdout)
+        with open(self.file_name) as f:
+            self.assertEqual(f.read(), stdout.getvalue()[:-1])
+        self.assertIn('www', stdout.getvalue())
+
+        # the zone is still written to stdout when the file can't be written
+        stdout = StringIO()
+        with self.assertRaisesRegexp(CLIError, 'Unable to export to file'):
+            self._export(os.path.join(self.file_name, 'missing', 'zone.txt'), stdout)
+        self.assertIn('www', stdout.getvalue())
+
+        # failures to write stdout are not reported as failures to write the file
+        stdout = mock.MagicMock()
+        stdout.write.side_effect = IOError('broken pipe')
+        with self.assertRaises(IOError):
+            self._export(self.file_name, stdout)
+
+    def test_dns_zone_import_reads_utf16_file(self):
+        import io
+        with io.open(self.file_name, 'w', encoding='utf-16') as f:
+            f.write(self.zone_file)
+        client = mock.MagicMock()
+        client.record_sets.list_by_dns_zone.return_value = []
+
+        changes = self._import(client, dry_run=True)
+        self.assertIn('www', [change['name'] for change in changes])
+
+
 if __name__ == '__main__':
     unittest.main()
@@ -49,10 +49,34 @@ def make_zone_file(json_obj):
         "uri":     [ uri records ]
     }
     """
-    import azure.cli.command_modules.network.zone_file.record_processors as record_processors
     from six import StringIO
 
     zone_file = StringIO()
+    zone_name = json_obj.pop('zone-name')
+    write_zone_file(
+        zone_file,
+        zone_name=zone_name,
+        resource_group=json_obj.pop('resource-group'),
+        datetime=json_obj.pop('datetime'),
+        ttl=json_obj.pop('$ttl'),
+        origin=json_obj.pop('$origin'),
+        record_sets=json_obj.items()
+    )
+
+    result = zone_file.getvalue()
+    zone_file.close()
+
+    return result
+
+
+def write_zone_file(zone_file, zone_name, resource_group, datetime, ttl, origin, record_sets):
+    """
+    Write a DNS zonefile to the file-like object @zone_file, one record set at a time.
+
+    record_sets is an iterable of (record set name, {record type: [records]}) pairs,
+    so that a zone can be written while it is still being read from the service.
+    """
+    import azure.cli.command_modules.network.zone_file.record_processors as record_processors
 
     HEADER = """
 ; Exported zone file from Azure DNS\n\
@@ -62,18 +86,16 @@ def make_zone_file(json_obj):
 $TTL {ttl}\n\
 $ORIGIN {origin}\n\
     """
-    zone_name = json_obj.pop('zone-name')
     print(HEADER.format(
         zone_name=zone_name,
-        resource_group=json_obj.pop('resource-group'),
-        datetime=json_obj.pop('datetime'),
-        ttl=json_obj.pop('$ttl'),
-        origin=json_obj.pop('$origin')
+        resource_group=resource_group,
+        datetime=datetime,
+        ttl=ttl,
+        origin=origin
     ), file=zone_file)
 
-    for record_set_name in json_obj.keys():
+    for record_set_name, record_set in record_sets:
 
-        record_set = json_obj[record_set_name]
         if record_set_name.endswith(zone_name):
             record_set_name = record_set_name[:-(len(zone_name) + 1)]
         if isinstance(record_set, str):
@@ -98,8 +120,3 @@ $ORIGIN {origin}\n\
                 first_line = False
 
             print('', file=zone_file)
-
-    result = zone_file.getvalue()
-    zone_file.close()
-
-    return result
@@ -75,6 +75,7 @@ _REGEX = {
 }
 
 _COMPILED_REGEX = {k: re.compile(v, re.IGNORECASE) for k, v in _REGEX.items()}
+_REVERSED_REGEX = list(reversed(list(_COMPILED_REGEX.values())))
 
 
 class IncorrectParserException(Exception):
@@ -87,17 +88,22 @@ def _tokenize_line(line, quote_strings=False, infer_name=True):
     * split tokens on whitespace
     * treat quoted strings as a single token
     """
+    if '"' not in line and '\\' not in line:
+        # nothing is quoted or escaped, so splitting on whitespace gives the same tokens
+        ret = line.split()
+        if line[:1].isspace():
+            ret.insert(0, '$NAME' if infer_name else ' ')
+        return [] if ret == ['$NAME'] else ret
+
     ret = []
     escape = False
     quote = False
     tokbuf = ""
     firstchar = True
-    ll = list(line)
-    while len(ll) > 0:
-        c = ll.pop(0)
+    for c in line:
         if c.isspace():
             if firstchar:
-                # used by the _add_record_names method
+                # used by the _iter_named_lines method
                 tokbuf += '$NAME' if infer_name else ' '
 
             if not quote and not escape:
@@ -210,13 +216,26 @@ def _serialize(tokens):
     return " ".join(ret)
 
 
-def _remove_comments(text):
+def iter_text_lines(text):
     """
-    Remove comments from a zonefile
+    Yield the lines of a text without building a list of them
+    """
+    start = 0
+    while True:
+        end = text.find('\n', start)
+        if end == -1:
+            yield text[start:]
+            return
+        yield text[start:end]
+        start = end + 1
+
+
+def _iter_uncommented_lines(lines):
+    """
+    Strip comments from each line, skipping lines which are left empty
     """
-    ret = []
-    lines = text.split("\n")
     for line in lines:
+        line = line.rstrip('\n')
         if not line:
             continue
 
@@ -224,71 +243,49 @@ def _remove_comments(text):
         if index != -1:
             line = line[:index]
         if line:
-            ret.append(line)
+            yield line
 
-    return "\n".join(ret)
 
-
-def _flatten(text):
+def _iter_flattened_lines(lines):
     """
-    Flatten the text:
+    Flatten the lines:
     * make sure each record is on one line.
     * remove parenthesis
     * remove Windows line endings
     """
-    lines = text.split('\n')
-    SENTINEL = '%%%'
-
-    # tokens: sequence of non-whitespace separated by '' where a newline was
-    tokens = []
-    for line in (x for x in lines if len(x) > 0):
-        line = line.replace('\t', ' ')
-        tokens += _tokenize_line(line, quote_strings=True, infer_name=False)
-        tokens.append(SENTINEL)
-
     # find (...) and turn it into a single line ("capture" it)
     capturing = False
     captured = []
 
-    flattened = []
-    while len(tokens) > 0:
-        tok = tokens.pop(0)
-
-        if tok == '$NAME':
-            tok = ' '
-
-        if not capturing and tok == SENTINEL:
-            # normal end-of-line
-            if len(captured) > 0:
-                flattened.append(" ".join(captured))
-                captured = []
-            continue
+    for line in lines:
+        line = line.replace('\t', ' ')
+        for tok in _tokenize_line(line, quote_strings=True, infer_name=False):
+            if tok == '$NAME':
+                tok = ' '
 
-        if tok.startswith("("):
-            # begin grouping
-            tok = tok.lstrip("(")
-            capturing = True
+            if tok.startswith("("):
+                # begin grouping
+                tok = tok.lstrip("(")
+                capturing = True
 
-        if capturing and tok.endswith(")"):
-            # end grouping.  next end-of-line will turn this sequence into a flat line
-            tok = tok.rstrip(")")
-            capturing = False
+            if capturing and tok.endswith(")"):
+                # end grouping.  next end-of-line will turn this sequence into a flat line
+                tok = tok.rstrip(")")
+                capturing = False
 
-        if tok != SENTINEL:
             captured.append(tok)
 
-    return "\n".join(flattened)
+        if not capturing and captured:
+            # normal end-of-line
+            yield " ".join(captured)
+            captured = []
 
 
-def _add_record_names(text):
+def _iter_named_lines(lines):
     """
-    Go through each line of the text and ensure that
-    a name is defined.  Use previous record name if there is none.
+    Go through each line and ensure that a name is defined.
+    Use previous record name if there is none.
     """
-    global SUPPORTED_RECORDS
-
-    lines = text.split("\n")
-    ret = []
     previous_record_name = None
 
     for line in lines:
@@ -302,9 +299,7 @@ def _add_record_names(text):
         elif not record_name.startswith('$'):
             previous_record_name = record_name
 
-        ret.append(_serialize(tokens))
-
-    return "\n".join(ret)
+        yield _serialize(tokens)
 
 
 def _convert_to_seconds(value):
@@ -386,50 +381,33 @@ def _post_process_caa_record(record):
         record['val'] = record['val'][1:-1]
 
 
-def _post_check_names(zone):
-
-    # get the origin name that has the SOA record
-    # ensure the origin is in each record set
-    origin = None
-    for name in zone:
-        for record_type in zone[name]:
-            if record_type == 'soa':
-                origin = name
-                break
-        if origin:
-            break
-    bad_names = [x for x in zone if origin not in x]
-    if bad_names:
-        raise CLIError("Record names '{}' are not part of the domain.".format(bad_names))
-
-
-def parse_zone_file(text, zone_name, ignore_invalid=False):
-    """
-    Parse a zonefile into a dict
+def iter_zone_records(lines, zone_name, ignore_invalid=False):
     """
+    Parse the lines of a zonefile, yielding one (record_name, record_type, record) tuple per record.
 
-    text = _remove_comments(text)
-    text = _flatten(text)
-    text = _add_record_names(text)
-
-    zone_obj = OrderedDict()
-    record_lines = text.split("\n")
+    Lines are consumed one at a time, so only the current record is held in memory. Record names which are
+    not part of the domain are reported once all records have been read.
+    """
     current_origin = zone_name.rstrip('.') + '.'
     current_ttl = 3600
-    soa_processed = False
-
-    for record_line in record_lines:
-        parse_match = False
+    soa_origin = None
+    cname_names = set()
+    bad_names = OrderedDict()
+    is_empty = True
+
+    for record_line in _iter_named_lines(_iter_flattened_lines(_iter_uncommented_lines(lines))):
+        is_empty = False
+        # when several expressions match, the last one wins
         record = None
-        for record_type, regex in _COMPILED_REGEX.items():
+        for regex in _REVERSED_REGEX:
             match = regex.match(record_line)
-            if not match:
-                continue
-
-            parse_match = True
-            record = match.groupdict()
+            if match:
+                record = match.groupdict()
+                break
 
-        if not parse_match and not ignore_invalid:
+        if not record:
+            if ignore_invalid:
+                continue
             raise CLIError('Unable to parse: {}'.format(record_line))
 
         record_type = record['delim'].lower()
@@ -438,69 +416,90 @@ def parse_zone_file(text, zone_name, ignore_invalid=False):
             if not origin_value.endswith('.'):
                 logger.warning("$ORIGIN '{}' should have terminating dot.".format(origin_value))
             current_origin = origin_value.rstrip('.') + '.'
+            continue
         elif record_type == '$ttl':
             current_ttl = _convert_to_seconds(record['val'])
-        else:
-            record_name = record['name']
-            if record_name == '@':
-                record_name = current_origin
-            elif not record_name.endswith('.'):
-                record_name = '{}.{}'.format(record_name, current_origin)
-
-            # special record-specific fix-ups
-            if record_type == 'ptr':
-                record['fullname'] = record_name + '.' + current_origin
-            elif record_type == 'soa':
-                for key in ['refresh', 'retry', 'expire', 'minimum']:
-                    record[key] = _convert_to_seconds(record[key])
-                _expand_with_origin(record, 'email', current_origin)
-            elif record_type == 'cname':
-                _expand_with_origin(record, 'alias', current_origin)
-            elif record_type == 'mx':
-                _expand_with_origin(record, 'host', current_origin)
-            elif record_type == 'ns':
-                _expand_with_origin(record, 'host', current_origin)
-            elif record_type == 'srv':
-                _expand_with_origin(record, 'target', current_origin)
-            elif record_type == 'spf':
-                record_type = 'txt'
-            record['ttl'] = _convert_to_seconds(record['ttl'] or current_ttl)
-
-            # handle quotes for CAA and TXT
-            if record_type == 'caa':
-                _post_process_caa_record(record)
-            elif record_type == 'txt':
-                # handle TXT concatenation and splitting separately
-                _post_process_txt_record(record)
-
-            if record_name not in zone_obj:
-                zone_obj[record_name] = OrderedDict()
-
-            if record_type == 'soa':
-                if soa_processed:
-                    raise CLIError('Zone file can contain only one SOA record.')
-                if record_name != current_origin:
-                    raise CLIError("Zone SOA record must be at the apex '@'.")
-                zone_obj[record_name][record_type] = record
-                soa_processed = True
-                continue
+            continue
 
-            if not soa_processed:
-                raise CLIError('First record in zone file must be SOA.')
+        record_name = record['name']
+        if record_name == '@':
+            record_name = current_origin
+        elif not record_name.endswith('.'):
+            record_name = '{}.{}'.format(record_name, current_origin)
+
+        # special record-specific fix-ups
+        if record_type == 'ptr':
+            record['fullname'] = record_name + '.' + current_origin
+        elif record_type == 'soa':
+            for key in ['refresh', 'retry', 'expire', 'minimum']:
+                record[key] = _convert_to_seconds(record[key])
+            _expand_with_origin(record, 'email', current_origin)
+        elif record_type == 'cname':
+            _expand_with_origin(record, 'alias', current_origin)
+        elif record_type == 'mx':
+            _expand_with_origin(record, 'host', current_origin)
+        elif record_type == 'ns':
+            _expand_with_origin(record, 'host', current_origin)
+        elif record_type == 'srv':
+            _expand_with_origin(record, 'target', current_origin)
+        elif record_type == 'spf':
+            record_type = 'txt'
+        record['ttl'] = _convert_to_seconds(record['ttl'] or current_ttl)
+
+        # handle quotes for CAA and TXT
+        if record_type == 'caa':
+            _post_process_caa_record(record)
+        elif record_type == 'txt':
+            # handle TXT concatenation and splitting separately
+            _post_process_txt_record(record)
+
+        if record_type == 'soa':
+            if soa_origin:
+                raise CLIError('Zone file can contain only one SOA record.')
+            if record_name != current_origin:
+                raise CLIError("Zone SOA record must be at the apex '@'.")
+            soa_origin = record_name
+            yield record_name, record_type, record
+            continue
 
-            if record_type == 'cname':
-                if record_type in zone_obj[record_name]:
-                    logger.warning("CNAME record already exists for '{}'. Ignoring '{}'."
-                                   .format(record_name, record['alias']))
-                    continue
-                zone_obj[record_name][record_type] = record
+        if not soa_origin:
+            raise CLIError('First record in zone file must be SOA.')
+
+        if soa_origin not in record_name:
+            bad_names[record_name] = True
+
+        if record_type == 'cname':
+            if record_name in cname_names:
+                logger.warning("CNAME record already exists for '{}'. Ignoring '{}'."
+                               .format(record_name, record['alias']))
                 continue
+            cname_names.add(record_name)
+
+        yield record_name, record_type, record
+
+    if is_empty:
+        raise CLIError('Zone file contains no records.')
+    if bad_names:
+        raise CLIError("Record names '{}' are not part of the domain.".format(list(bad_names)))
+
+
+def parse_zone_file(text, zone_name, ignore_invalid=False):
+    """
+    Parse a zonefile into a dict
+    """
+    zone_obj = OrderedDict()
+    for record_name, record_type, record in iter_zone_records(iter_text_lines(text), zone_name, ignore_invalid):
+        if record_name not in zone_obj:
+            zone_obj[record_name] = OrderedDict()
+
+        if record_type in ['soa', 'cname']:
+            zone_obj[record_name][record_type] = record
+            continue
 
-            # any other record can have multiple entries
-            if record_type not in zone_obj[record_name]:
-                zone_obj[record_name][record_type] = []
-            zone_obj[record_name][record_type].append(record)
+        # any other record can have multiple entries
+        if record_type not in zone_obj[record_name]:
+            zone_obj[record_name][record_type] = []
+        zone_obj[record_name][record_type].append(record)
 
     _post_process_ttl(zone_obj)
-    _post_check_names(zone_obj)
     return zone_obj
@@ -27,7 +27,7 @@ from azure.mgmt.resource.locks.models import ManagementLockObject
 from azure.mgmt.resource.links.models import ResourceLinkProperties
 
 from azure.cli.core.parser import IncorrectUsageError
-from azure.cli.core.util import get_file_json, shell_safe_json_parse, sdk_no_wait
+from azure.cli.core.util import get_file_json, shell_safe_json_parse, sdk_no_wait, get_max_concurrent_workers
 from azure.cli.core.commands.client_factory import get_mgmt_service_client
 from azure.cli.core.profiles import ResourceType, get_sdk, get_api_version
 
@@ -44,6 +44,9 @@ from ._validators import MSI_LOCAL_ID
 
 logger = get_logger(__name__)
 
+_MAX_CONCURRENT_RESOURCE_OPERATIONS = 10
+_PATCH_NOT_SUPPORTED_STATUS_CODES = [400, 405, 409, 501]
+
 
 def _build_resource_id(**kwargs):
     from msrestazure.tools import resource_id as resource_id_from_dict
@@ -372,7 +375,8 @@ def _list_resources_odata_filter_builder(resource_group_name=None, resource_prov
 
 def _get_auth_provider_latest_api_version(cli_ctx):
     rcf = _resource_client_factory(cli_ctx)
-    api_version = _ResourceUtils.resolve_api_version(rcf, 'Microsoft.Authorization', None, 'providerOperations')
+    api_version = _ResourceUtils.resolve_api_version(rcf, 'Microsoft.Authorization', None, 'providerOperations',
+                                                     cli_ctx=cli_ctx)
     return api_version
 
 
@@ -791,7 +795,7 @@ def _get_parsed_resource_ids(resource_ids):
     return ({'resource_id': rid} for rid in resource_ids)
 
 
-def _get_rsrc_util_from_parsed_id(cli_ctx, parsed_id, api_version):
+def _get_rsrc_util_from_parsed_id(cli_ctx, parsed_id, api_version, rcf=None, resolved_api_versions=None):
     return _ResourceUtils(cli_ctx,
                           parsed_id.get('resource_group', None),
                           parsed_id.get('resource_namespace', None),
@@ -799,7 +803,42 @@ def _get_rsrc_util_from_parsed_id(cli_ctx, parsed_id, api_version):
                           parsed_id.get('resource_type', None),
                           parsed_id.get('resource_name', None),
                           parsed_id.get('resource_id', None),
-                          api_version)
+                          api_version,
+                          rcf=rcf,
+                          resolved_api_versions=resolved_api_versions)
+
+
+def _wait_if_poller(result):
+    from azure.cli.core.commands import _is_poller
+    return result.result() if _is_poller(result) else result
+
+
+def _run_resource_operation(cli_ctx, parsed_ids, api_version, operation):
+    """
+    Runs `operation(rsrc_utils)` for each parsed id and returns the results in the order of the ids.
+
+    Multiple ids are processed with bounded concurrency, sharing one resource client and the API versions resolved
+    per resource type. Long running operations are waited on so that the workers overlap their completion.
+    """
+    parsed_ids = list(parsed_ids)
+    if len(parsed_ids) == 1:
+        return [operation(_get_rsrc_util_from_parsed_id(cli_ctx, parsed_ids[0], api_version))]
+
+    rcf = _resource_client_factory(cli_ctx)
+    resolved_api_versions = {}
+
+    def _run(id_dict):
+        rsrc_utils = _get_rsrc_util_from_parsed_id(cli_ctx, id_dict, api_version, rcf=rcf,
+                                                   resolved_api_versions=resolved_api_versions)
+        return _wait_if_poller(operation(rsrc_utils))
+
+    max_workers = get_max_concurrent_workers(cli_ctx, len(parsed_ids), _MAX_CONCURRENT_RESOURCE_OPERATIONS)
+    if max_workers == 1:
+        return [_run(id_dict) for id_dict in parsed_ids]
+
+    from concurrent.futures import ThreadPoolExecutor
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        return list(executor.map(_run, parsed_ids))
 
 
 def _create_parsed_id(cli_ctx, resource_group_name=None, resource_provider_namespace=None, parent_resource_path=None,
@@ -837,9 +876,8 @@ def show_resource(cmd, resource_ids=None, resource_group_name=None,
                                                                               resource_type,
                                                                               resource_name)]
 
-    return _single_or_collection(
-        [_get_rsrc_util_from_parsed_id(cmd.cli_ctx, id_dict, api_version).get_resource(
-            include_response_body) for id_dict in parsed_ids])
+    return _single_or_collection(_run_resource_operation(
+        cmd.cli_ctx, parsed_ids, api_version, lambda rsrc_utils: rsrc_utils.get_resource(include_response_body)))
 
 
 # pylint: disable=unused-argument
@@ -849,7 +887,8 @@ def delete_resource(cmd, resource_ids=None, resource_group_name=None,
     """
     Deletes the given resource(s).
     This function allows deletion of ids with dependencies on one another.
-    This is done with multiple passes through the given ids.
+    A delete request that fails is retried as soon as another deletion finishes, since that deletion may have
+    removed the resource which blocked it.
     """
     parsed_ids = _get_parsed_resource_ids(resource_ids) or [_create_parsed_id(cmd.cli_ctx,
                                                                               resource_group_name,
@@ -857,33 +896,15 @@ def delete_resource(cmd, resource_ids=None, resource_group_name=None,
                                                                               parent_resource_path,
                                                                               resource_type,
                                                                               resource_name)]
-    to_be_deleted = [(_get_rsrc_util_from_parsed_id(cmd.cli_ctx, id_dict, api_version), id_dict)
+    parsed_ids = list(parsed_ids)
+    rcf = _resource_client_factory(cmd.cli_ctx)
+    resolved_api_versions = {}
+    to_be_deleted = [(_get_rsrc_util_from_parsed_id(cmd.cli_ctx, id_dict, api_version, rcf=rcf,
+                                                    resolved_api_versions=resolved_api_versions), id_dict)
                      for id_dict in parsed_ids]
 
-    results = []
-    from msrestazure.azure_exceptions import CloudError
-    while to_be_deleted:
-        logger.debug("Start new loop to delete resources.")
-        operations = []
-        failed_to_delete = []
-        for rsrc_utils, id_dict in to_be_deleted:
-            try:
-                operations.append(rsrc_utils.delete())
-                resource = _build_resource_id(**id_dict) or resource_name
-                logger.debug("deleting %s", resource)
-            except CloudError as e:
-                # request to delete failed, add parsed id dict back to queue
-                id_dict['exception'] = str(e)
-                failed_to_delete.append((rsrc_utils, id_dict))
-        to_be_deleted = failed_to_delete
-
-        # stop deleting if none deletable
-        if not operations:
-            break
-
-        # all operations return result before next pass
-        for operation in operations:
-            results.append(operation.result())
+    max_workers = get_max_concurrent_workers(cmd.cli_ctx, len(to_be_deleted), _MAX_CONCURRENT_RESOURCE_OPERATIONS)
+    results, to_be_deleted = _delete_resources(to_be_deleted, max_workers, resource_name)
 
     if to_be_deleted:
         error_msg_builder = ['Some resources failed to be deleted (run with `--verbose` for more information):']
@@ -896,6 +917,50 @@ def delete_resource(cmd, resource_ids=None, resource_group_name=None,
     return _single_or_collection(results)
 
 
+def _delete_resources(to_be_deleted, max_workers, resource_name=None):
+    """
+    Deletes (rsrc_utils, id_dict) pairs with up to `max_workers` deletions in flight.
+
+    Returns the results of the deletions and the pairs which could not be deleted. A pair whose delete request
+    fails is resubmitted once any deletion has completed since the request was submitted, even if that deletion
+    completed before the failure came back; it is given up on once nothing is left in flight.
+    """
+    from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+    from msrestazure.azure_exceptions import CloudError
+
+    def _delete(rsrc_utils, id_dict):
+        try:
+            operation = rsrc_utils.delete()
+        except CloudError as e:
+            # request to delete failed, it will be retried once a possible blocker is gone
+            id_dict['exception'] = str(e)
+            return False, None
+        logger.debug("deleting %s", _build_resource_id(**id_dict) or resource_name)
+        return True, operation.result()
+
+    # each request in flight or blocked remembers how many deletions had completed when it was submitted
+    results, blocked, in_flight = [], [], {}
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        for item in to_be_deleted:
+            in_flight[executor.submit(_delete, *item)] = item, 0
+        while in_flight:
+            done, _ = wait(list(in_flight), return_when=FIRST_COMPLETED)
+            for future in done:
+                item, submitted_at = in_flight.pop(future)
+                deleted, result = future.result()
+                if deleted:
+                    results.append(result)
+                else:
+                    blocked.append((item, submitted_at))
+            retry = [item for item, submitted_at in blocked if submitted_at < len(results)]
+            if retry:
+                logger.debug("Retrying %d resource(s) which failed to be deleted.", len(retry))
+                blocked = [(item, submitted_at) for item, submitted_at in blocked if submitted_at == len(results)]
+                for item in retry:
+                    in_flight[executor.submit(_delete, *item)] = item, len(results)
+    return results, [item for item, _ in blocked]
+
+
 # pylint: unused-argument
 def update_resource(cmd, parameters, resource_ids=None,
                     resource_group_name=None, resource_provider_namespace=None,
@@ -907,8 +972,8 @@ def update_resource(cmd, parameters, resource_ids=None,
                                                                               resource_type,
                                                                               resource_name)]
 
-    return _single_or_collection(
-        [_get_rsrc_util_from_parsed_id(cmd.cli_ctx, id_dict, api_version).update(parameters) for id_dict in parsed_ids])
+    return _single_or_collection(_run_resource_operation(
+        cmd.cli_ctx, parsed_ids, api_version, lambda rsrc_utils: rsrc_utils.update(parameters)))
 
 
 # pylint: unused-argument
@@ -924,8 +989,8 @@ def tag_resource(cmd, tags, resource_ids=None,
                                                                               resource_type,
                                                                               resource_name)]
 
-    return _single_or_collection(
-        [_get_rsrc_util_from_parsed_id(cmd.cli_ctx, id_dict, api_version).tag(tags) for id_dict in parsed_ids])
+    return _single_or_collection(_run_resource_operation(
+        cmd.cli_ctx, parsed_ids, api_version, lambda rsrc_utils: rsrc_utils.tag(tags)))
 
 
 # pylint: unused-argument
@@ -941,8 +1006,8 @@ def invoke_resource_action(cmd, action, request_body=None, resource_ids=None,
                                                                               resource_type,
                                                                               resource_name)]
 
-    return _single_or_collection([_get_rsrc_util_from_parsed_id(cmd.cli_ctx, id_dict, api_version)
-                                  .invoke_action(action, request_body) for id_dict in parsed_ids])
+    return _single_or_collection(_run_resource_operation(
+        cmd.cli_ctx, parsed_ids, api_version, lambda rsrc_utils: rsrc_utils.invoke_action(action, request_body)))
 
 
 def get_deployment_operations(client, resource_group_name, deployment_name, operation_ids):
@@ -1787,7 +1852,7 @@ class _ResourceUtils(object):  # pylint: disable=too-many-instance-attributes
     def __init__(self, cli_ctx,
                  resource_group_name=None, resource_provider_namespace=None,
                  parent_resource_path=None, resource_type=None, resource_name=None,
-                 resource_id=None, api_version=None, rcf=None):
+                 resource_id=None, api_version=None, rcf=None, resolved_api_versions=None):
         # if the resouce_type is in format 'namespace/type' split it.
         # (we don't have to do this, but commands like 'vm show' returns such values)
         if resource_type and not resource_provider_namespace and not parent_resource_path:
@@ -1799,14 +1864,17 @@ class _ResourceUtils(object):  # pylint: disable=too-many-instance-attributes
         self.rcf = rcf or _resource_client_factory(cli_ctx)
         if api_version is None:
             if resource_id:
-                api_version = _ResourceUtils._resolve_api_version_by_id(self.rcf, resource_id)
+                api_version = _ResourceUtils._resolve_api_version_by_id(self.rcf, resource_id, cli_ctx=cli_ctx,
+                                                                        resolved=resolved_api_versions)
             else:
                 _validate_resource_inputs(resource_group_name, resource_provider_namespace,
                                           resource_type, resource_name)
                 api_version = _ResourceUtils.resolve_api_version(self.rcf,
                                                                  resource_provider_namespace,
                                                                  parent_resource_path,
-                                                                 resource_type)
+                                                                 resource_type,
+                                                                 cli_ctx=cli_ctx,
+                                                                 resolved=resolved_api_versions)
 
         self.resource_group_name = resource_group_name
         self.resource_provider_namespace = resource_provider_namespace
@@ -1889,6 +1957,10 @@ class _ResourceUtils(object):  # pylint: disable=too-many-instance-attributes
                                                    parameters)
 
     def tag(self, tags):
+        result = self._tag_with_patch(tags)
+        if result is not None:
+            return result
+
         resource = self.get_resource()
         # pylint: disable=no-member
         parameters = GenericResource(
@@ -1912,6 +1984,35 @@ class _ResourceUtils(object):  # pylint: disable=too-many-instance-attributes
                                                    self.api_version,
                                                    parameters)
 
+    def _tag_with_patch(self, tags):
+        """
+        Replaces the tags with a PATCH request, so the resource body does not need to be fetched and sent back.
+        Returns None if the API version or resource provider does not support it, in which case the caller should
+        fall back to GET and PUT.
+        """
+        from msrestazure.azure_exceptions import CloudError
+        resources = self.rcf.resources
+        if not hasattr(resources, 'update_by_id'):
+            return None
+
+        # an empty dict, rather than None, is needed for PATCH to clear the tags
+        parameters = GenericResource(tags=tags or {})
+        try:
+            if self.resource_id:
+                return resources.update_by_id(self.resource_id, self.api_version, parameters)
+            return resources.update(self.resource_group_name,
+                                    self.resource_provider_namespace,
+                                    self.parent_resource_path,
+                                    self.resource_type,
+                                    self.resource_name,
+                                    self.api_version,
+                                    parameters)
+        except CloudError as ex:
+            if ex.status_code not in _PATCH_NOT_SUPPORTED_STATUS_CODES:
+                raise
+            logger.debug("PATCH is not supported for tags on this resource, falling back to PUT: %s", ex)
+            return None
+
     def invoke_action(self, action, request_body):
         """
         Formats Url if none provided and sends the POST request with the url and request-body.
@@ -1982,25 +2083,34 @@ class _ResourceUtils(object):  # pylint: disable=too-many-instance-attributes
                                     self.rcf.resources.config.long_running_operation_timeout)
 
     @staticmethod
-    def resolve_api_version(rcf, resource_provider_namespace, parent_resource_path, resource_type):
-        provider = rcf.providers.get(resource_provider_namespace)
+    def resolve_api_version(rcf, resource_provider_namespace, parent_resource_path, resource_type, cli_ctx=None,
+                            resolved=None):
+        """ Resolves the api-version of a resource type. `resolved` is an optional dict which memoizes the api-version
+        per namespace and resource type, e.g. across the resources of one bulk operation. """
+        from azure.cli.core._provider_cache import find_provider_resource_type
 
         # If available, we will use parent resource's api-version
         resource_type_str = (parent_resource_path.split('/')[0] if parent_resource_path else resource_type)
 
-        rt = [t for t in provider.resource_types
-              if t.resource_type.lower() == resource_type_str.lower()]
+        key = (resource_provider_namespace.lower(), resource_type_str.lower())
+        if resolved is not None and key in resolved:
+            return resolved[key]
+
+        rt = find_provider_resource_type(cli_ctx, rcf, resource_provider_namespace, resource_type_str)
         if not rt:
             raise IncorrectUsageError('Resource type {} not found.'.format(resource_type_str))
-        if len(rt) == 1 and rt[0].api_versions:
-            npv = [v for v in rt[0].api_versions if 'preview' not in v.lower()]
-            return npv[0] if npv else rt[0].api_versions[0]
+        if rt.api_versions:
+            npv = [v for v in rt.api_versions if 'preview' not in v.lower()]
+            api_version = npv[0] if npv else rt.api_versions[0]
+            if resolved is not None:
+                resolved[key] = api_version
+            return api_version
         raise IncorrectUsageError(
             'API version is required and could not be resolved for resource {}'
             .format(resource_type))
 
     @staticmethod
-    def _resolve_api_version_by_id(rcf, resource_id):
+    def _resolve_api_version_by_id(rcf, resource_id, cli_ctx=None, resolved=None):
         parts = parse_resource_id(resource_id)
         namespace = parts.get('child_namespace_1', parts['namespace'])
         if parts.get('child_type_2'):
@@ -2019,4 +2129,5 @@ class _ResourceUtils(object):  # pylint: disable=too-many-instance-attributes
             parent = None
             resource_type = parts['type']
 
-        return _ResourceUtils.resolve_api_version(rcf, namespace, parent, resource_type)
+        return _ResourceUtils.resolve_api_version(rcf, namespace, parent, resource_type, cli_ctx=cli_ctx,
+                                                  resolved=resolved)
@@ -96,6 +96,8 @@ class ResourceLinkScenarioTest(ScenarioTest):
 
 class ResourceScenarioTest(ScenarioTest):
 
+    # the recording predates tagging with PATCH and must be re-recorded live
+    @live_only()
     @ResourceGroupPreparer(name_prefix='cli_test_resource_scenario', location='southcentralus')
     @AllowLargeResponse()
     def test_resource_scenario(self, resource_group, resource_group_location):
@@ -148,6 +150,8 @@ class ResourceScenarioTest(ScenarioTest):
 
 class ResourceIDScenarioTest(ScenarioTest):
 
+    # the recording predates tagging with PATCH and must be re-recorded live
+    @live_only()
     @ResourceGroupPreparer(name_prefix='cli_test_resource_id')
     def test_resource_id_scenario(self, resource_group):
 
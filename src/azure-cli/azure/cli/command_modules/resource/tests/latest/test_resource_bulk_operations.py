@@ -0,0 +1,173 @@
+# --------------------------------------------------------------------------------------------
+# Copyright (c) Microsoft Corporation. All rights reserved.
+# Licensed under the MIT License. See License.txt in the project root for license information.
+# --------------------------------------------------------------------------------------------
+
+import threading
+import time
+import unittest
+
+try:
+    import unittest.mock as mock
+except ImportError:
+    import mock
+
+from msrestazure.azure_exceptions import CloudError
+
+from azure.cli.command_modules.resource.custom import (_delete_resources, _run_resource_operation, _ResourceUtils)
+
+
+def _cloud_error(status_code):
+    response = mock.MagicMock()
+    response.status_code = status_code
+    response.reason = 'Conflict'
+    response.text = ''
+    return CloudError(response, 'error {}'.format(status_code))
+
+
+class _FakeResource(object):
+    """ Deletes succeed only once every resource in `blockers` has been deleted. """
+
+    def __init__(self, name, deleted, blockers=None, delay=0.05):
+        self.name = name
+        self.deleted = deleted
+        self.blockers = blockers or []
+        self.delay = delay
+        self.attempts = 0
+
+    def delete(self):
+        self.attempts += 1
+        if any(b not in self.deleted for b in self.blockers):
+            raise _cloud_error(409)
+        poller = mock.MagicMock()
+
+        def _result():
+            time.sleep(self.delay)
+            self.deleted.append(self.name)
+            return self.name
+
+        poller.result.side_effect = _result
+        return poller
+
+
+class _SlowFailingResource(_FakeResource):
+    """ The first delete request is rejected, but the rejection only comes back after the blocker is deleted. """
+
+    def delete(self):
+        if self.attempts == 0:
+            self.attempts += 1
+            while any(b not in self.deleted for b in self.blockers):
+                time.sleep(0.01)
+            time.sleep(0.2)
+            raise _cloud_error(409)
+        return super(_SlowFailingResource, self).delete()
+
+
+class TestResourceBulkOperations(unittest.TestCase):
+
+    def _items(self, resources):
+        return [(r, {'resource_id': r.name}) for r in resources]
+
+    def test_delete_retries_blocked_resource_after_blocker_finishes(self):
+        deleted = []
+        nic = _FakeResource('nic', deleted)
+        vnet = _FakeResource('vnet', deleted, blockers=['nic'])
+        disk = _FakeResource('disk', deleted, delay=0.5)
+
+        results, failed = _delete_resources(self._items([vnet, nic, disk]), max_workers=3)
+
+        self.assertEqual(failed, [])
+        self.assertEqual(sorted(results), ['disk', 'nic', 'vnet'])
+        self.assertEqual(vnet.attempts, 2)
+        # the vnet is retried as soon as the nic is gone, without waiting for the slow disk
+        self.assertLess(deleted.index('vnet'), deleted.index('disk'))
+
+    def test_delete_retries_blocked_resource_when_blocker_finished_first(self):
+        deleted = []
+        a = _SlowFailingResource('a', deleted, blockers=['b'])
+        b = _FakeResource('b', deleted)
+
+        results, failed = _delete_resources(self._items([a, b]), max_workers=2)
+
+        self.assertEqual(failed, [])
+        self.assertEqual(results, ['b', 'a'])
+        self.assertEqual(a.attempts, 2)
+
+    def test_delete_gives_up_when_nothing_is_in_flight(self):
+        deleted = []
+        orphan = _FakeResource('orphan', deleted, blockers=['missing'])
+        ok = _FakeResource('ok', deleted)
+
+        results, failed = _delete_resources(self._items([orphan, ok]), max_workers=2)
+
+        self.assertEqual(results, ['ok'])
+        self.assertEqual([item[1]['resource_id'] for item in failed], ['orphan'])
+        self.assertIn('exception', failed[0][1])
+
+    @mock.patch('azure.cli.command_modules.resource.custom._resource_client_factory', autospec=True)
+    @mock.patch('azure.cli.command_modules.resource.custom._get_rsrc_util_from_parsed_id', autospec=True)
+    def test_run_resource_operation_is_concurrent_and_ordered(self, util_mock, _):
+        cli_ctx = mock.MagicMock()
+        cli_ctx.config.getboolean.return_value = False
+        lock = threading.Lock()
+        active = [0, 0]
+
+        def _operation(rsrc_utils):
+            with lock:
+                active[0] += 1
+                active[1] = max(active)
+            time.sleep(0.1)
+            with lock:
+                active[0] -= 1
+            return rsrc_utils
+
+        util_mock.side_effect = lambda cli_ctx, id_dict, *args, **kwargs: id_dict['resource_id']
+        ids = [{'resource_id': 'id{}'.format(i)} for i in range(6)]
+        results = _run_resource_operation(cli_ctx, ids, None, _operation)
+
+        self.assertEqual(results, ['id{}'.format(i) for i in range(6)])
+        self.assertGreater(active[1], 1)
+        # one resource client and one api-version memo are shared by every resource
+        rcfs = {id(c[1]['rcf']) for c in util_mock.call_args_list}
+        memos = {id(c[1]['resolved_api_versions']) for c in util_mock.call_args_list}
+        self.assertEqual((len(rcfs), len(memos)), (1, 1))
+
+    def test_resolve_api_version_reuses_resolved_versions(self):
+        rcf = mock.MagicMock()
+        resolved = {}
+        rt = mock.MagicMock(api_versions=['2019-01-01', '2018-01-01'])
+        with mock.patch('azure.cli.core._provider_cache.find_provider_resource_type', return_value=rt) as find:
+            for _ in range(3):
+                self.assertEqual(_ResourceUtils.resolve_api_version(rcf, 'Microsoft.Network', None,
+                                                                    'virtualNetworks', resolved=resolved),
+                                 '2019-01-01')
+        self.assertEqual(find.call_count, 1)
+
+    def _get_resource_utils(self, rcf):
+        resource_id = '/subscriptions/sub/resourceGroups/rg/providers/Microsoft.Network/virtualNetworks/vnet1'
+        return _ResourceUtils(mock.MagicMock(), resource_id=resource_id, api_version='2018-01-01', rcf=rcf)
+
+    def test_tag_uses_patch(self):
+        rcf = mock.MagicMock()
+        self._get_resource_utils(rcf).tag({'a': 'b'})
+        self.assertEqual(rcf.resources.update_by_id.call_args[0][2].tags, {'a': 'b'})
+        rcf.resources.get_by_id.assert_not_called()
+        rcf.resources.create_or_update_by_id.assert_not_called()
+
+    def test_tag_falls_back_to_put_when_patch_is_rejected(self):
+        rcf = mock.MagicMock()
+        rcf.resources.update_by_id.side_effect = _cloud_error(405)
+        self._get_resource_utils(rcf).tag({})
+        rcf.resources.get_by_id.assert_called_once()
+        self.assertEqual(rcf.resources.create_or_update_by_id.call_args[0][2].tags, {})
+
+    def test_tag_does_not_hide_other_errors(self):
+        rcf = mock.MagicMock()
+        rcf.resources.update_by_id.side_effect = _cloud_error(403)
+        with self.assertRaises(CloudError):
+            self._get_resource_utils(rcf).tag({'a': 'b'})
+        rcf.resources.create_or_update_by_id.assert_not_called()
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -10,6 +10,7 @@ import datetime
 import json
 import re
 import os
+import time
 import uuid
 import itertools
 from dateutil.relativedelta import relativedelta
@@ -24,6 +25,7 @@ from knack.util import CLIError, todict
 from azure.cli.core.profiles import ResourceType, get_api_version
 from azure.graphrbac.models import GraphErrorException
 
+from azure.cli.core._session import SessionCache
 from azure.cli.core.util import get_file_json, shell_safe_json_parse
 
 from azure.graphrbac.models import (ApplicationCreateParameters, ApplicationUpdateParameters, AppRole,
@@ -191,10 +193,31 @@ def list_role_assignments(cmd, assignee=None, role=None, resource_group_name=Non
     # 1. fill in logic names to get things understandable.
     # (it's possible that associated roles and principals were deleted, and we just do nothing.)
     # 2. fill in role names
-    role_defs = list(definitions_client.list(
-        scope=scope or ('/subscriptions/' + definitions_client.config.subscription_id)))
     worker = MultiAPIAdaptor(cmd.cli_ctx)
-    role_dics = {i.id: worker.get_role_property(i, 'role_name') for i in role_defs}
+    lookup_cache = _RoleLookupCache(cmd.cli_ctx)
+    _fill_role_names(worker, lookup_cache, definitions_client, scope, results)
+
+    # fill in principal names
+    _fill_principal_names(worker, lookup_cache, graph_client, results)
+
+    for r in results:
+        if not r.get('additionalProperties'):  # remove the useless "additionalProperties"
+            r.pop('additionalProperties', None)
+    return results
+
+
+def _fill_role_names(worker, lookup_cache, definitions_client, scope, results):
+    role_ids = set(worker.get_role_property(i, 'roleDefinitionId')
+                   for i in results if not i.get('roleDefinitionName'))
+    role_dics, missing_role_ids = lookup_cache.get(_RoleLookupCache.ROLE_DEFINITIONS, role_ids)
+    if missing_role_ids:
+        role_defs = list(definitions_client.list(
+            scope=scope or ('/subscriptions/' + definitions_client.config.subscription_id)))
+        listed = {i.id: worker.get_role_property(i, 'role_name') for i in role_defs}
+        # ids which are not listed belong to deleted roles, remember those too
+        listed.update({i: None for i in missing_role_ids if i not in listed})
+        lookup_cache.update(_RoleLookupCache.ROLE_DEFINITIONS, listed)
+        role_dics.update(listed)
     for i in results:
         if not i.get('roleDefinitionName'):
             if role_dics.get(worker.get_role_property(i, 'roleDefinitionId')):
@@ -203,28 +226,30 @@ def list_role_assignments(cmd, assignee=None, role=None, resource_group_name=Non
             else:
                 i['roleDefinitionName'] = None  # the role definition might have been deleted
 
-    # fill in principal names
+
+def _fill_principal_names(worker, lookup_cache, graph_client, results):
     principal_ids = set(worker.get_role_property(i, 'principalId')
                         for i in results if worker.get_role_property(i, 'principalId'))
+    if not principal_ids:
+        return
 
-    if principal_ids:
-        try:
-            principals = _get_object_stubs(graph_client, principal_ids)
-            principal_dics = {i.object_id: _get_displayable_name(i) for i in principals}
-
-            for i in [r for r in results if not r.get('principalName')]:
-                i['principalName'] = ''
-                if principal_dics.get(worker.get_role_property(i, 'principalId')):
-                    worker.set_role_property(i, 'principalName',
-                                             principal_dics[worker.get_role_property(i, 'principalId')])
-        except (CloudError, GraphErrorException) as ex:
-            # failure on resolving principal due to graph permission should not fail the whole thing
-            logger.info("Failed to resolve graph object information per error '%s'", ex)
-
-    for r in results:
-        if not r.get('additionalProperties'):  # remove the useless "additionalProperties"
-            r.pop('additionalProperties', None)
-    return results
+    principal_dics, missing_principal_ids = lookup_cache.get(_RoleLookupCache.PRINCIPALS, principal_ids)
+    try:
+        if missing_principal_ids:
+            # principals not found are not remembered, they might not have replicated to the graph yet
+            principals = _get_object_stubs(graph_client, missing_principal_ids)
+            resolved = {i.object_id: _get_displayable_name(i) for i in principals}
+            lookup_cache.update(_RoleLookupCache.PRINCIPALS, resolved)
+            principal_dics.update(resolved)
+
+        for i in [r for r in results if not r.get('principalName')]:
+            i['principalName'] = ''
+            if principal_dics.get(worker.get_role_property(i, 'principalId')):
+                worker.set_role_property(i, 'principalName',
+                                         principal_dics[worker.get_role_property(i, 'principalId')])
+    except (CloudError, GraphErrorException) as ex:
+        # failure on resolving principal due to graph permission should not fail the whole thing
+        logger.info("Failed to resolve graph object information per error '%s'", ex)
 
 
 def _get_assignment_events(cli_ctx, start_time=None, end_time=None):
@@ -457,7 +482,13 @@ def _search_role_assignments(cli_ctx, assignments_client, definitions_client,
 
     # always use "scope" if provided, so we can get assignments beyond subscription e.g. management groups
     if scope:
-        assignments = list(assignments_client.list_for_scope(scope=scope, filter='atScope()'))
+        if assignee_object_id:
+            # let the service filter by principal. This returns the principal's assignments at, above and below the
+            # scope, and the scope filter below keeps the ones which apply
+            f = "principalId eq '{}'".format(assignee_object_id)
+        else:
+            f = 'atScope()'
+        assignments = list(assignments_client.list_for_scope(scope=scope, filter=f))
     elif assignee_object_id:
         if include_groups:
             f = "assignedTo('{}')".format(assignee_object_id)
@@ -485,6 +516,39 @@ def _search_role_assignments(cli_ctx, assignments_client, definitions_client,
     return assignments
 
 
+class _RoleLookupCache(SessionCache):
+    """
+    Caches role definition names and principal display names in the config directory, so repeated
+    `role assignment list` calls do not list every role definition and query the graph for every principal.
+    Entries expire after `role.lookup_cache_ttl` minutes; 0 disables the cache.
+    """
+    ROLE_DEFINITIONS = 'roleDefinitions'
+    PRINCIPALS = 'principals'
+    FILE_NAME = 'roleLookupCache.json'
+    TTL_CONFIG = ('role', 'lookup_cache_ttl')
+
+    def get(self, kind, keys):
+        """ Returns a dict of the cached values for `keys`, and the list of keys not found or expired. """
+        entries = self._session.get(kind) or {}
+        found, missing = {}, []
+        for key in keys:
+            entry = entries.get(key)
+            if entry and self.is_fresh(entry[1]):
+                found[key] = entry[0]
+            else:
+                missing.append(key)
+        return found, missing
+
+    def update(self, kind, values):
+        if self.ttl <= 0 or not values:
+            return
+        now = time.time()
+        entries = {k: v for k, v in (self._session.get(kind) or {}).items() if self.is_fresh(v[1])}
+        entries.update({k: [v, now] for k, v in values.items()})
+        self._session.data[kind] = entries
+        self.save()
+
+
 def _build_role_scope(resource_group_name, scope, subscription_id):
     subscription_scope = '/subscriptions/' + subscription_id
     if scope:
@@ -1236,8 +1300,6 @@ def create_service_principal_for_rbac(
         # pylint:disable=too-many-statements,too-many-locals, too-many-branches
         cmd, name=None, years=None, create_cert=False, cert=None, scopes=None, role='Contributor',
         show_auth_for_sdk=None, skip_assignment=False, keyvault=None):
-    import time
-
     graph_client = _graph_client_factory(cmd.cli_ctx)
     role_client = _auth_client_factory(cmd.cli_ctx).role_assignments
     scopes = scopes or ['/subscriptions/' + role_client.config.subscription_id]
@@ -1425,8 +1487,6 @@ def _create_self_signed_cert(start_date, end_date):  # pylint: disable=too-many-
 
 
 def _create_self_signed_cert_with_keyvault(cli_ctx, years, keyvault, keyvault_cert_name):  # pylint: disable=too-many-locals
-    import time
-
     kv_client = _get_keyvault_client(cli_ctx)
     cert_policy = {
         'issuer_parameters': {
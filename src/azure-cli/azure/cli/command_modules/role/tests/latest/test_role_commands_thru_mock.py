@@ -25,6 +25,7 @@ from azure.cli.command_modules.role.custom import (create_role_definition,
                                                    _get_object_stubs,
                                                    list_service_principal_owners,
                                                    list_application_owners,
+                                                   list_role_assignments,
                                                    delete_role_assignments)
 
 from knack.util import CLIError
@@ -388,6 +389,53 @@ class TestRoleMocked(unittest.TestCase):
         self.assertTrue(1 == len(res))
         self.assertTrue(test_user_object_id == res[0].object_id)
 
+    @mock.patch('azure.cli.command_modules.role.custom._resolve_object_id', autospec=True)
+    @mock.patch('azure.cli.command_modules.role.custom._graph_client_factory', autospec=True)
+    @mock.patch('azure.cli.command_modules.role.custom._auth_client_factory', autospec=True)
+    def test_role_assignment_list_filters_and_caches_lookups(self, auth_client_mock, graph_client_mock,
+                                                             resolve_object_id_mock):
+        import shutil
+        test_object_id = '11111111-2222-3333-4444-555555555555'
+        role_id = self.default_scope + '/providers/Microsoft.Authorization/roleDefinitions/reader-guid'
+        resolve_object_id_mock.return_value = test_object_id
+
+        assignment = mock.MagicMock()
+        assignment.scope = self.default_scope
+        assignment.principal_id = test_object_id
+        role_def = mock.MagicMock(id=role_id)
+        role_def.role_name = 'Reader'
+        user = mock.MagicMock(object_id=test_object_id, user_principal_name='someone@example.com')
+
+        auth_client = mock.MagicMock()
+        auth_client.role_definitions.config.subscription_id = self.subscription_id
+        auth_client.role_assignments.list_for_scope.return_value = [assignment]
+        auth_client.role_definitions.list.return_value = [role_def]
+        auth_client_mock.return_value = auth_client
+        graph_client = mock.MagicMock()
+        graph_client.objects.get_objects_by_object_ids.return_value = [user]
+        graph_client_mock.return_value = graph_client
+
+        cmd = mock.MagicMock()
+        cmd.cli_ctx = DummyCli()
+        config_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, config_dir, True)
+        cmd.cli_ctx.config.config_dir = config_dir
+
+        with mock.patch('azure.cli.command_modules.role.custom.todict', autospec=True) as todict_mock:
+            todict_mock.side_effect = lambda _: [{'roleDefinitionId': role_id, 'principalId': test_object_id,
+                                                  'scope': self.default_scope}]
+            for _ in range(3):
+                result = list_role_assignments(cmd, assignee='someone@example.com')
+                self.assertEqual(result[0]['roleDefinitionName'], 'Reader')
+                self.assertEqual(result[0]['principalName'], 'someone@example.com')
+
+        # the assignee filter is applied by the service
+        auth_client.role_assignments.list_for_scope.assert_called_with(
+            scope=self.default_scope, filter="principalId eq '{}'".format(test_object_id))
+        # role definitions and principals are only looked up once
+        self.assertEqual(auth_client.role_definitions.list.call_count, 1)
+        self.assertEqual(graph_client.objects.get_objects_by_object_ids.call_count, 1)
+
     def test_get_object_stubs(self):
         graph_client = mock.MagicMock()
         assignees = [i for i in range(2001)]
@@ -4,8 +4,11 @@
 # --------------------------------------------------------------------------------------------
 
 # pylint: disable=C0302
+import copy
+import time
 from enum import Enum
 
+from azure.cli.core._session import SessionCache
 from azure.cli.core.util import (
     CLIError,
     sdk_no_wait,
@@ -134,6 +137,124 @@ def _filter_available(capabilities):
     return [c for c in capabilities if is_available(c.status)]
 
 
+class _CapabilitiesCache(SessionCache):
+    '''
+    Caches location capabilities in the config directory, so that resolving a sku from its
+    tier, family and capacity does not download the capabilities of the location for every
+    database or elastic pool. Entries expire after `sql.capabilities_cache_ttl` minutes;
+    0 disables the cache.
+    '''
+    FILE_NAME = 'sqlCapabilitiesCache.json'
+    TTL_CONFIG = ('sql', 'capabilities_cache_ttl')
+
+    # Capabilities loaded in this process, with their index, by cache key
+    _loaded = {}
+
+    def get(self, key):
+        '''
+        Returns the cached capabilities index for the key, or None if it is not cached or has expired.
+        '''
+        from azure.mgmt.sql.models import LocationCapabilities
+
+        if self.ttl <= 0:
+            return None
+        loaded = self._loaded.get(key)
+        if loaded and self.is_fresh(loaded[0]):
+            return loaded[1]
+        entry = self._session.get(key)
+        if not entry or not self.is_fresh(entry[1]):
+            return None
+        try:
+            index = _CapabilitiesIndex(LocationCapabilities.deserialize(entry[0]))
+        except Exception as ex:  # pylint: disable=broad-except
+            logger.debug("Ignoring invalid cached capabilities for '%s': %s", key, ex)
+            return None
+        self._loaded[key] = (entry[1], index)
+        return index
+
+    def set(self, key, capabilities):
+        '''
+        Caches the capabilities for the key and returns their index.
+        '''
+        now = time.time()
+        index = _CapabilitiesIndex(capabilities)
+        if self.ttl <= 0:
+            return index
+        self._loaded[key] = (now, index)
+        data = {k: v for k, v in self._session.data.items() if self.is_fresh(v[1])}
+        data[key] = [capabilities.serialize(keep_readonly=True), now]
+        self._session.data = data
+        self.save()
+        return index
+
+
+class _CapabilitiesIndex(object):
+    '''
+    Location capabilities indexed by edition name and, within each edition, by
+    performance level family and capacity, so that a sku is resolved without
+    scanning the capabilities for every lookup.
+    '''
+
+    def __init__(self, capabilities):
+        self.capabilities = capabilities
+        self._editions = {}
+        self._performance_levels = {}
+
+    def find_edition(self, sku, supported_editions):
+        '''
+        Same as `_find_edition_capability`, using the index.
+        '''
+        key = id(supported_editions)
+        if key not in self._editions:
+            self._editions[key] = {}
+            for e in supported_editions:
+                self._editions[key].setdefault(e.name, e)
+        if sku.tier in self._editions[key]:
+            return self._editions[key][sku.tier]
+        return _find_edition_capability(sku, supported_editions)
+
+    def find_performance_level(self, sku, supported_service_level_objectives, allow_reset_family):
+        '''
+        Same as `_find_performance_level_capability`, using the index.
+        '''
+        if not sku.capacity:
+            return _find_performance_level_capability(sku, supported_service_level_objectives, allow_reset_family)
+
+        key = id(supported_service_level_objectives)
+        if key not in self._performance_levels:
+            levels = self._performance_levels[key] = {}
+            for position, slo in enumerate(supported_service_level_objectives):
+                try:
+                    levels.setdefault((slo.sku.family, int(slo.sku.capacity)), (position, slo))
+                except (TypeError, ValueError):
+                    continue
+
+        levels = self._performance_levels[key]
+        candidates = [levels.get((sku.family, int(sku.capacity)))]
+        if allow_reset_family:
+            candidates.append(levels.get((None, int(sku.capacity))))
+        candidates = [c for c in candidates if c]
+        if candidates:
+            return min(candidates, key=lambda c: c[0])[1]
+        return _find_performance_level_capability(sku, supported_service_level_objectives, allow_reset_family)
+
+
+def _get_location_capabilities_index(cli_ctx, location, include):
+    '''
+    Gets the indexed capabilities of the location, from the capabilities cache if they
+    have not expired.
+    '''
+    from azure.cli.core.commands.client_factory import get_subscription_id
+
+    key = '{}/{}/{}'.format(get_subscription_id(cli_ctx), location.lower().replace(' ', ''), include.value)
+    cache = _CapabilitiesCache(cli_ctx)
+    index = cache.get(key)
+    if index is None:
+        capabilities_client = get_sql_capabilities_operations(cli_ctx, None)
+        index = cache.set(key, capabilities_client.list_by_location(location, include))
+    return index
+
+
 def _find_edition_capability(sku, supported_editions):
     '''
     Finds the DB edition capability in the collection of supported editions
@@ -488,16 +609,15 @@ def _find_db_sku_from_capabilities(cli_ctx, location, sku, allow_reset_family=Fa
     # to find a matching capability and copy the sku from there.
 
     # Get default server version capability
-    capabilities_client = get_sql_capabilities_operations(cli_ctx, None)
-    capabilities = capabilities_client.list_by_location(location, CapabilityGroup.supported_editions)
-    server_version_capability = _get_default_server_version(capabilities)
+    index = _get_location_capabilities_index(cli_ctx, location, CapabilityGroup.supported_editions)
+    server_version_capability = _get_default_server_version(index.capabilities)
 
     # Find edition capability, based on requested sku properties
-    edition_capability = _find_edition_capability(
+    edition_capability = index.find_edition(
         sku, server_version_capability.supported_editions)
 
     # Find performance level capability, based on requested sku properties
-    performance_level_capability = _find_performance_level_capability(
+    performance_level_capability = index.find_performance_level(
         sku, edition_capability.supported_service_level_objectives,
         allow_reset_family=allow_reset_family)
 
@@ -1455,20 +1575,19 @@ def _find_elastic_pool_sku_from_capabilities(cli_ctx, location, sku, allow_reset
     # to find a matching capability and copy the sku from there.
 
     # Get default server version capability
-    capabilities_client = get_sql_capabilities_operations(cli_ctx, None)
-    capabilities = capabilities_client.list_by_location(location, CapabilityGroup.supported_elastic_pool_editions)
-    server_version_capability = _get_default_server_version(capabilities)
+    index = _get_location_capabilities_index(cli_ctx, location, CapabilityGroup.supported_elastic_pool_editions)
+    server_version_capability = _get_default_server_version(index.capabilities)
 
     # Find edition capability, based on requested sku properties
-    edition_capability = _find_edition_capability(sku, server_version_capability.supported_elastic_pool_editions)
+    edition_capability = index.find_edition(sku, server_version_capability.supported_elastic_pool_editions)
 
     # Find performance level capability, based on requested sku properties
-    performance_level_capability = _find_performance_level_capability(
+    performance_level_capability = index.find_performance_level(
         sku, edition_capability.supported_elastic_pool_performance_levels,
         allow_reset_family=allow_reset_family)
 
-    # Copy sku object from capability
-    result = performance_level_capability.sku
+    # Copy sku object from capability. The capabilities may be shared by later lookups.
+    result = copy.deepcopy(performance_level_capability.sku)
     logger.debug('_find_elastic_pool_sku_from_capabilities return: %s', result)
     return result
 
@@ -1971,12 +2090,12 @@ def _find_managed_instance_sku_from_capabilities(cli_ctx, location, sku):
     # to find a matching capability and copy the sku from there.
 
     # Get default server version capability
-    capabilities_client = get_sql_capabilities_operations(cli_ctx, None)
-    capabilities = capabilities_client.list_by_location(location, CapabilityGroup.supported_managed_instance_versions)
-    managed_instance_version_capability = _get_default_capability(capabilities.supported_managed_instance_versions)
+    index = _get_location_capabilities_index(cli_ctx, location, CapabilityGroup.supported_managed_instance_versions)
+    managed_instance_version_capability = _get_default_capability(
+        index.capabilities.supported_managed_instance_versions)
 
     # Find edition capability, based on requested sku properties
-    edition_capability = _find_edition_capability(sku, managed_instance_version_capability.supported_editions)
+    edition_capability = index.find_edition(sku, managed_instance_version_capability.supported_editions)
 
     # Find family level capability, based on requested sku properties
     family_capability = _find_family_capability(sku, edition_capability.supported_families)
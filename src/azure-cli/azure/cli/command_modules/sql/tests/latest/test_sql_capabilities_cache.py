@@ -0,0 +1,102 @@
+# --------------------------------------------------------------------------------------------
+# Copyright (c) Microsoft Corporation. All rights reserved.
+# Licensed under the MIT License. See License.txt in the project root for license information.
+# --------------------------------------------------------------------------------------------
+
+import itertools
+import shutil
+import tempfile
+import unittest
+
+try:
+    import unittest.mock as mock
+except ImportError:
+    import mock
+
+from azure.mgmt.sql.models import CapabilityGroup, LocationCapabilities, Sku
+
+from azure.cli.command_modules.sql import custom
+
+
+def _get_location_capabilities():
+    slos = []
+    for family, capacities in [(None, [5, 10]), ('Gen4', [1, 2]), ('Gen5', [2, 4]), (None, [4])]:
+        for capacity in capacities:
+            slos.append({
+                'name': '{}_{}'.format(family, capacity),
+                'status': 'Available',
+                'sku': {'name': 'slo', 'family': family, 'capacity': capacity}
+            })
+    return LocationCapabilities.deserialize({
+        'name': 'westus',
+        'status': 'Available',
+        'supportedServerVersions': [{
+            'name': '12.0',
+            'status': 'Default',
+            'supportedEditions': [
+                {'name': 'Standard', 'status': 'Available', 'supportedServiceLevelObjectives': slos[:2]},
+                {'name': 'GeneralPurpose', 'status': 'Default', 'supportedServiceLevelObjectives': slos}
+            ]
+        }]
+    })
+
+
+class SqlCapabilitiesCacheTest(unittest.TestCase):
+
+    def setUp(self):
+        self.config_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.config_dir)
+        self.cli_ctx = mock.MagicMock()
+        self.cli_ctx.config.config_dir = self.config_dir
+        self.cli_ctx.config.getint.return_value = 60
+        custom._CapabilitiesCache._loaded.clear()  # pylint: disable=protected-access
+
+    def test_sql_capabilities_index_matches_scan(self):
+        capabilities = _get_location_capabilities()
+        index = custom._CapabilitiesIndex(capabilities)  # pylint: disable=protected-access
+        editions = custom._get_default_server_version(capabilities).supported_editions
+
+        def _find(find_edition, find_performance_level, sku, allow_reset_family):
+            try:
+                edition = find_edition(sku, editions)
+                return find_performance_level(sku, edition.supported_service_level_objectives,
+                                              allow_reset_family).name
+            except Exception as ex:  # pylint: disable=broad-except
+                return str(ex)
+
+        for tier, family, capacity, allow_reset_family in itertools.product(
+                [None, 'Standard', 'GeneralPurpose', 'Premium'], [None, 'Gen4', 'Gen5'],
+                [None, 1, 2, 3, 4, 5], [False, True]):
+            sku = Sku(name=None, tier=tier, family=family, capacity=capacity)
+            self.assertEqual(
+                _find(index.find_edition, index.find_performance_level, sku, allow_reset_family),
+                _find(custom._find_edition_capability,  # pylint: disable=protected-access
+                      custom._find_performance_level_capability,  # pylint: disable=protected-access
+                      sku, allow_reset_family))
+
+    @mock.patch('azure.cli.core.commands.client_factory.get_subscription_id', return_value='sub')
+    @mock.patch('azure.cli.command_modules.sql.custom.get_sql_capabilities_operations')
+    def test_sql_capabilities_are_cached_per_location(self, capabilities_operations, _):
+        client = capabilities_operations.return_value
+        client.list_by_location.return_value = _get_location_capabilities()
+
+        sku = Sku(name=None, tier='GeneralPurpose', family='Gen5', capacity=4)
+        for _ in range(3):
+            self.assertEqual(custom._find_db_sku_from_capabilities(  # pylint: disable=protected-access
+                self.cli_ctx, 'West US', sku).name, 'Gen5_4')
+            # a new process only has the capabilities saved in the config directory
+            custom._CapabilitiesCache._loaded.clear()  # pylint: disable=protected-access
+        self.assertEqual(client.list_by_location.call_count, 1)
+
+        # a 0 TTL disables the cache
+        self.cli_ctx.config.getint.return_value = 0
+        custom._find_db_sku_from_capabilities(self.cli_ctx, 'westus', sku)  # pylint: disable=protected-access
+        self.assertEqual(client.list_by_location.call_count, 2)
+
+        custom._find_db_sku_from_capabilities(self.cli_ctx, 'westus', sku)  # pylint: disable=protected-access
+        client.list_by_location.assert_called_with('westus', CapabilityGroup.supported_editions)
+        self.assertEqual(client.list_by_location.call_count, 3)
+
+
+if __name__ == '__main__':
+    unittest.main()